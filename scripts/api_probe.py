@@ -11,155 +11,602 @@ import requests
 import sys
 import os
 import argparse
-from typing import List, Dict
+import shlex
+import signal
+import subprocess
+import threading
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Optional
 from urllib.parse import urljoin
+from latency_histogram import LatencyHistogram, PERCENTILES, format_percentile, record_result
+from probe_timing import TimedHTTPAdapter, begin_request, PHASES
+from probe_resilience import AdaptiveTimeouts, CircuitBreaker
+from audit_profile import Profiler, finish
+
+BODY_CHUNK_SIZE = 64 * 1024
+
+FIELDNAMES = ['controller', 'action', 'method', 'route', 'url', 'status_code', 'latency_ms', 'content_length', 'error', 'note']
+TIMING_FIELDNAMES = list(PHASES)
+COLD_FIELDNAMES = ['first_status_code', 'first_latency_ms', 'cold_penalty_ms']
+DEFAULT_COLD_SAMPLES = 5
+READY_POLL_INTERVAL = 0.1
+STOP_GRACE_PERIOD = 10
+SAMPLE_FIELDNAMES = ['samples', 'errors'] + [f'p{p}_ms' for p in PERCENTILES] + ['max_ms', 'timeouts', 'lower_bound']
+CIRCUIT_OPEN = 'CircuitOpen'
+FIXTURE_ERROR = 'Fixture error'
 
 class ApiProber:
-    def __init__(self, base_url: str, timeout: int = 10):
+    def __init__(self, base_url: str, timeout: int = 10, concurrency: int = 1,
+                 per_controller: Optional[int] = None, pool_size: Optional[int] = None,
+                 samples: int = 0, duration: Optional[float] = None, warmup: int = 0,
+                 max_body_bytes: Optional[int] = None, cold_start: bool = False,
+                 fixtures=None, adaptive_timeout: bool = False, min_timeout: float = 0.5,
+                 breaker_threshold: Optional[int] = None, breaker_cooldown: float = 30.0,
+                 profiler: Optional[Profiler] = None):
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
-        self.session = requests.Session()
+        self.concurrency = max(1, concurrency)
+        self.per_controller = per_controller
+        self.samples = samples
+        self.duration = duration
+        self.warmup = warmup
+        self.cold_start = cold_start
+        if cold_start and not (samples or duration):
+            # Steady state needs more than the single request already spent on the first hit
+            self.samples = DEFAULT_COLD_SAMPLES
+        self.sampling = bool(self.samples or duration)
+        self.max_body_bytes = max_body_bytes
+        self.time_to_ready_ms: Optional[float] = None
+        self.fixtures = fixtures
+        self.timeouts = AdaptiveTimeouts(timeout, min_timeout) if adaptive_timeout else None
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown) if breaker_threshold else None
         self.results = []
+        self.profiler = profiler or Profiler('api_probe', enabled=False)
+        
+        # One keep-alive pool per host, sized so every worker thread can hold a connection
+        self.adapter = TimedHTTPAdapter(pool_maxsize=pool_size or self.concurrency, pool_block=True)
+        self._local = threading.local()
+    
+    @property
+    def session(self) -> requests.Session:
+        """Per-thread session; all sessions share the adapter's connection pools"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('http://', self.adapter)
+            session.mount('https://', self.adapter)
+            self._local.session = session
+        return session
+        
+    def probe_route(self, route_info: Dict, retry_auth: bool = True) -> Dict:
+        """Probe a single API route.
         
-    def probe_route(self, route_info: Dict) -> Dict:
-        """Probe a single API route"""
-        url = urljoin(self.base_url, route_info['route'].lstrip('/'))
+        ``route_info`` may carry a concrete ``path`` (used instead of the route
+        template for the URL), a request ``body`` and extra ``headers``. With
+        fixtures configured, template parameters are filled in and a bearer
+        token is attached; a 401 invalidates the token and retries once.
+        With a circuit breaker, routes of a controller whose circuit is open
+        are skipped without sending a request.
+        """
+        path = route_info.get('path')
+        headers = route_info.get('headers')
+        missing = []
+        token = None
+        fixture_error = ''
+        if self.fixtures is not None:
+            try:
+                if path is None:
+                    path, missing = self.fixtures.resolve(route_info)
+                if self.fixtures.auth is not None:
+                    token = self.fixtures.auth.get_token()
+                    headers = dict(headers or {}, Authorization=f'Bearer {token}')
+            except Exception as e:
+                fixture_error = f'{FIXTURE_ERROR}: {e}'
+        
+        url = urljoin(self.base_url, (path or route_info['route']).lstrip('/'))
         method = route_info['method'].upper()
         
-        start_time = time.time()
+        result = {
+            'controller': route_info['controller'],
+            'action': route_info['action'],
+            'method': method,
+            'route': route_info['route'],
+            'url': url,
+            'status_code': 0,
+            'latency_ms': 0,
+            'content_length': 0,
+            'error': ''
+        }
+        
+        if fixture_error:
+            result['error'] = fixture_error
+            return result
+        
+        controller = route_info['controller']
+        if self.breaker is not None and not self.breaker.allow(controller):
+            result['error'] = CIRCUIT_OPEN
+            result['note'] = f"Skipped: {controller} circuit open after {self.breaker.threshold} consecutive failures"
+            return result
+        
+        timeout = self.timeouts.timeout_for(route_info) if self.timeouts is not None else self.timeout
+        phases = begin_request()
+        adaptive_expiry = False
+        start_time = time.perf_counter()
         
         try:
-            response = self.session.request(
-                method=method,
-                url=url,
-                timeout=self.timeout,
-                allow_redirects=False
-            )
+            with self.profiler.phase('network'):
+                response = self.session.request(
+                    method=method,
+                    url=url,
+                    data=route_info.get('body'),
+                    headers=headers,
+                    timeout=timeout,
+                    allow_redirects=False,
+                    stream=True
+                )
+                headers_time = time.perf_counter()
             
-            latency = (time.time() - start_time) * 1000  # Convert to ms
+            with self.profiler.phase('read'), response:
+                content_length, truncated = self.read_body(response)
+            end_time = time.perf_counter()
             
+            setup_ms = phases['dns_ms'] + phases['connect_ms'] + phases['tls_ms']
+            if response.status_code == 401 and token is not None and retry_auth:
+                self.fixtures.auth.invalidate(token)
+                if self.breaker is not None:
+                    self.breaker.record(controller, failed=False)
+                return self.probe_route(route_info, retry_auth=False)
+            if self.timeouts is not None:
+                self.timeouts.observe(route_info, end_time - start_time)
+            
+            note = ''
             if response.status_code in (401, 403):
-                note = "Auth required (treated as pass)"
-                error = ''
-            else:
-                note = ''
-                error = ''
+                note = "Auth rejected" if token is not None else "Auth required (treated as pass)"
+            if missing:
+                note = '; '.join(filter(None, [note, f"Unresolved parameters: {', '.join(missing)}"]))
+            if truncated:
+                note = '; '.join(filter(None, [note, f"Body truncated at {self.max_body_bytes} bytes"]))
             
-            result = {
-                'controller': route_info['controller'],
-                'action': route_info['action'],
-                'method': method,
-                'route': route_info['route'],
-                'url': url,
+            result.update({
                 'status_code': response.status_code,
-                'latency_ms': round(latency, 2),
-                'content_length': len(response.content),
-                'error': error,
-                'note': note
-            }
+                'latency_ms': round((end_time - start_time) * 1000, 2),
+                'content_length': content_length,
+                'note': note,
+                'ttfb_ms': max(0.0, (headers_time - start_time) * 1000 - setup_ms),
+                'transfer_ms': (end_time - headers_time) * 1000
+            })
+            result.update(phases)
+            for phase in PHASES:
+                result[phase] = round(result[phase], 2)
             
         except requests.exceptions.Timeout:
-            result = {
-                'controller': route_info['controller'],
-                'action': route_info['action'],
-                'method': method,
-                'route': route_info['route'],
-                'url': url,
-                'status_code': 0,
-                'latency_ms': self.timeout * 1000,
-                'content_length': 0,
-                'error': 'Timeout'
-            }
+            result.update({'latency_ms': timeout * 1000, 'error': 'Timeout'})
+            if self.timeouts is not None:
+                self.timeouts.timed_out(route_info)
+            if timeout < self.timeout:
+                adaptive_expiry = True
+                result['note'] = f"Adaptive timeout {timeout}s"
             
         except requests.exceptions.ConnectionError:
-            result = {
-                'controller': route_info['controller'],
-                'action': route_info['action'],
-                'method': method,
-                'route': route_info['route'],
-                'url': url,
-                'status_code': 0,
-                'latency_ms': 0,
-                'content_length': 0,
-                'error': 'Connection Error'
-            }
+            result['error'] = 'Connection Error'
             
         except Exception as e:
-            result = {
-                'controller': route_info['controller'],
-                'action': route_info['action'],
-                'method': method,
-                'route': route_info['route'],
-                'url': url,
-                'status_code': 0,
-                'latency_ms': 0,
-                'content_length': 0,
-                'error': str(e)
-            }
+            result['error'] = str(e)
+        
+        if self.breaker is not None:
+            if adaptive_expiry:
+                # Our own estimate expired, not the configured budget: no evidence the controller is down
+                self.breaker.release(controller)
+            else:
+                self.breaker.record(controller, result['status_code'] == 0 or result['status_code'] >= 500)
+        return result
+    
+    def read_body(self, response: requests.Response) -> tuple:
+        """Stream the body, counting bytes without buffering; stop at the byte cap"""
+        received = 0
+        for chunk in response.iter_content(chunk_size=BODY_CHUNK_SIZE):
+            received += len(chunk)
+            if self.max_body_bytes is not None and received >= self.max_body_bytes:
+                return self.max_body_bytes, True
+        return received, False
+    
+    def sample_route(self, route_info: Dict) -> Dict:
+        """Probe a route repeatedly after a warmup and summarise its latency histogram"""
+        first = self.probe_route(route_info) if self.cold_start else None
+        
+        for _ in range(self.warmup):
+            self.probe_route(route_info)
+        
+        histogram = LatencyHistogram()
+        phase_totals = dict.fromkeys(PHASES, 0.0)
+        errors = 0
+        attempts = 0
+        responses = 0
+        deadline = time.monotonic() + self.duration if self.duration else None
+        
+        while True:
+            result = self.probe_route(route_info)
+            attempts += 1
+            if result['status_code'] == 0 or result['status_code'] >= 500:
+                errors += 1
+            # Timeouts stay in the histogram as lower bounds so the tail is not hidden
+            record_result(histogram, result)
+            if result['status_code'] != 0:
+                responses += 1
+                for phase in PHASES:
+                    phase_totals[phase] += result[phase]
+            elif result['error'] in ('Connection Error', CIRCUIT_OPEN):
+                break
+            
+            if self.samples and attempts >= self.samples:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                break
         
+        result = dict(result)
+        result.update(histogram.summary())
+        result['samples'] = attempts
+        result['errors'] = errors
+        result['latency_ms'] = histogram.mean
+        result['histogram'] = histogram
+        if first is not None:
+            result['first_status_code'] = first['status_code']
+            result['first_latency_ms'] = first['latency_ms']
+            if first['status_code'] != 0 and histogram.total:
+                result['cold_penalty_ms'] = round(first['latency_ms'] - result['p50_ms'], 2)
+        if responses:
+            # Per-phase columns report the mean across answered samples
+            for phase in PHASES:
+                result[phase] = round(phase_totals[phase] / responses, 2)
         return result
     
+    def run_route(self, route_info: Dict) -> Dict:
+        """Probe a route once, or sample it when a sampling mode is configured"""
+        if self.sampling:
+            return self.sample_route(route_info)
+        return self.probe_route(route_info)
+    
     def probe_all_routes(self, routes: List[Dict]) -> None:
         """Probe all routes"""
         print(f"Probing {len(routes)} routes...")
         
+        if self.concurrency > 1:
+            self.probe_routes_concurrently(routes)
+            return
+        
         for i, route_info in enumerate(routes):
-            result = self.probe_route(route_info)
+            result = self.run_route(route_info)
             self.results.append(result)
             
             print(f"[{i+1}/{len(routes)}] {result['method']} {result['route']} -> {result['status_code']} ({result['latency_ms']}ms)")
     
+    def probe_routes_concurrently(self, routes: List[Dict]) -> None:
+        """Probe routes on a thread pool, honouring the per-controller limit.
+        
+        Results are stored in route order so the report matches a sequential run.
+        """
+        results = [None] * len(routes)
+        pending = deque(enumerate(routes))
+        in_flight = Counter()
+        futures = {}
+        completed = 0
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            def dispatch():
+                deferred = []
+                while pending and len(futures) < self.concurrency:
+                    index, route_info = pending.popleft()
+                    controller = route_info['controller']
+                    if self.per_controller and in_flight[controller] >= self.per_controller:
+                        deferred.append((index, route_info))
+                        continue
+                    in_flight[controller] += 1
+                    futures[pool.submit(self.run_route, route_info)] = (index, controller)
+                pending.extendleft(reversed(deferred))
+            
+            dispatch()
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, controller = futures.pop(future)
+                    in_flight[controller] -= 1
+                    result = future.result()
+                    results[index] = result
+                    completed += 1
+                    print(f"[{completed}/{len(routes)}] {result['method']} {result['route']} -> {result['status_code']} ({result['latency_ms']}ms)")
+                dispatch()
+        
+        self.results.extend(results)
+    
     def generate_report(self, output_file: str) -> None:
         """Generate CSV report"""
         with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['controller', 'action', 'method', 'route', 'url', 'status_code', 'latency_ms', 'content_length', 'error', 'note']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            fieldnames = FIELDNAMES + TIMING_FIELDNAMES + (SAMPLE_FIELDNAMES if self.sampling else [])
+            if self.cold_start:
+                fieldnames += COLD_FIELDNAMES
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore')
             
             writer.writeheader()
             for result in self.results:
                 writer.writerow(result)
     
+    def controller_histograms(self) -> Dict[str, LatencyHistogram]:
+        """Merge route histograms into one histogram per controller"""
+        controllers = {}
+        for result in self.results:
+            histogram = controllers.setdefault(result['controller'], LatencyHistogram())
+            if 'histogram' in result:
+                histogram.merge(result['histogram'])
+            else:
+                record_result(histogram, result)
+        return controllers
+    
+    def generate_controller_report(self, output_file: str) -> None:
+        """Generate per-controller percentile CSV report"""
+        with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+            fieldnames = ['controller', 'routes', 'errors'] + SAMPLE_FIELDNAMES[:1] + SAMPLE_FIELDNAMES[2:]
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            
+            writer.writeheader()
+            for controller, histogram in sorted(self.controller_histograms().items()):
+                routes = [r for r in self.results if r['controller'] == controller]
+                row = {'controller': controller, 'routes': len(routes)}
+                row['errors'] = sum(r.get('errors', int(r['status_code'] == 0 or r['status_code'] >= 500)) for r in routes)
+                row.update(histogram.summary())
+                writer.writerow(row)
+    
     def get_summary(self) -> Dict:
         """Get summary statistics"""
         total = len(self.results)
         success = len([r for r in self.results if 200 <= r['status_code'] < 300])
         client_errors = len([r for r in self.results if 400 <= r['status_code'] < 500])
         server_errors = len([r for r in self.results if 500 <= r['status_code'] < 600])
-        connection_errors = len([r for r in self.results if r['status_code'] == 0])
+        skipped = len([r for r in self.results if r['error'] == CIRCUIT_OPEN])
+        # Requests whose parameters or token could not be set up never reached the API
+        fixture_errors = len([r for r in self.results if r['error'].startswith(FIXTURE_ERROR)])
+        connection_errors = len([r for r in self.results if r['status_code'] == 0]) - skipped - fixture_errors
         
-        avg_latency = sum(r['latency_ms'] for r in self.results if r['latency_ms'] > 0) / max(1, total - connection_errors)
+        avg_latency = sum(r['latency_ms'] for r in self.results if r['latency_ms'] > 0) / max(1, total - connection_errors - skipped - fixture_errors)
         
-        return {
+        summary = {
             'total': total,
             'success': success,
             'client_errors': client_errors,
             'server_errors': server_errors,
             'connection_errors': connection_errors,
+            'fixture_errors': fixture_errors,
+            'skipped': skipped,
             'avg_latency_ms': round(avg_latency, 2)
         }
+        
+        if self.sampling:
+            controllers = self.controller_histograms()
+            summary['latency'] = LatencyHistogram.merged(controllers.values()).summary()
+            summary['controllers'] = {name: h.summary() for name, h in sorted(controllers.items())}
+        
+        if self.cold_start:
+            first_hits = LatencyHistogram()
+            for result in self.results:
+                if result.get('first_status_code'):
+                    first_hits.record(result['first_latency_ms'])
+            summary['cold_start'] = {
+                'time_to_ready_ms': self.time_to_ready_ms,
+                'first_hit': first_hits.summary(),
+                'warm': summary['latency']
+            }
+        
+        return summary
+    
+    def launch_and_wait(self, launch_cmd: str, ready_path: str, ready_timeout: float,
+                        log_file: Optional[str] = None) -> subprocess.Popen:
+        """Launch the API and record the time from process start until it reports ready.
+        
+        Readiness is polled on fresh connections so the probe's own pool stays cold.
+        """
+        log = open(log_file, 'w') if log_file else subprocess.DEVNULL
+        start_time = time.perf_counter()
+        try:
+            proc = subprocess.Popen(shlex.split(launch_cmd), stdout=log, stderr=subprocess.STDOUT,
+                                    start_new_session=True)
+        finally:
+            # The child holds its own copy of the log descriptor
+            if log is not subprocess.DEVNULL:
+                log.close()
+        ready_url = urljoin(self.base_url, ready_path.lstrip('/'))
+        
+        while time.perf_counter() - start_time < ready_timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"API process exited with {proc.returncode} before becoming ready")
+            try:
+                if requests.get(ready_url, timeout=2).ok:
+                    self.time_to_ready_ms = round((time.perf_counter() - start_time) * 1000, 2)
+                    return proc
+            except requests.exceptions.RequestException:
+                pass
+            time.sleep(READY_POLL_INTERVAL)
+        
+        stop_process_group(proc)
+        raise RuntimeError(f"API not ready at {ready_url} after {ready_timeout}s")
+
+def stop_process_group(proc: subprocess.Popen, grace: float = STOP_GRACE_PERIOD) -> None:
+    """Terminate a launched API and everything it spawned, killing it after ``grace`` seconds.
+
+    Launch commands are usually wrappers (dotnet run, shell scripts) whose
+    server is a grandchild, so the whole session started for it is signalled.
+    """
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    try:
+        proc.wait(timeout=grace)
+    except subprocess.TimeoutExpired:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        proc.wait()
+
+def load_fixtures(base_url: str, args):
+    """Build ProbeFixtures from --fixtures, or None when not configured"""
+    if not args.fixtures:
+        return None
+    from probe_fixtures import ProbeFixtures
+    return ProbeFixtures.from_file(args.fixtures, base_url, args.timeout)
+
+def run_load(base_url: str, routes: List[Dict], args) -> None:
+    """Run the open-loop load mode and report per-step latency"""
+    from load_generator import LoadGenerator, load_weights, print_load_summary
+    
+    prober = ApiProber(base_url, args.timeout, pool_size=args.pool_size or args.max_in_flight,
+                       max_body_bytes=args.max_body_bytes, fixtures=load_fixtures(base_url, args))
+    generator = LoadGenerator(prober, routes, load_weights(args.weights),
+                              max_in_flight=args.max_in_flight, arrival=args.arrival, seed=args.seed)
+    rates = [float(rate) for rate in args.rate.split(',')]
+    generator.run_steps(rates, args.load_duration, slo_p99_ms=args.slo_p99)
+    
+    generator.generate_report(args.output_file)
+    if args.timeseries_out:
+        generator.generate_timeseries(args.timeseries_out)
+    
+    print_load_summary(generator.steps, slo_p99_ms=args.slo_p99)
+    print(f"Report saved to: {args.output_file}")
+
+def run_replay(base_url: str, routes: List[Dict], args) -> None:
+    """Replay a recording and report latency per route template"""
+    from probe_replay import TrafficReplayer, read_recording
+    
+    prober = ApiProber(base_url, args.timeout, pool_size=args.pool_size or args.max_in_flight,
+                       max_body_bytes=args.max_body_bytes, fixtures=load_fixtures(base_url, args))
+    replayer = TrafficReplayer(prober, routes, speed=args.speed, max_in_flight=args.max_in_flight)
+    print(f"Replaying {args.replay} at {args.speed}x...")
+    step = replayer.replay(read_recording(args.replay, args.replay_format), limit=args.replay_limit)
+    replayer.generate_report(args.output_file)
+    
+    summary = step.summary()
+    print(f"\nReplay Summary:")
+    print(f"  Requests: {summary['completed']} ({replayer.unmatched} unmatched to a route template)")
+    print(f"  Throughput: {round(summary['completed'] / step.elapsed, 2) if step.elapsed else 0} req/s")
+    print(f"  Errors: {summary['errors']}")
+    print(f"  Latency: p50={summary['p50_ms']}ms p95={summary['p95_ms']}ms "
+          f"p99={summary['p99_ms']}ms max={summary['max_ms']}ms")
+    print(f"Report saved to: {args.output_file}")
 
-def main():
+def main(argv: Optional[List[str]] = None):
     parser = argparse.ArgumentParser(description='API Route Prober')
     parser.add_argument('base_url', nargs='?', help='Base URL of the API')
     parser.add_argument('routes_file', help='JSON file containing routes')
     parser.add_argument('output_file', help='Output CSV file')
     parser.add_argument('--timeout', type=int, default=10, help='Request timeout in seconds')
+    parser.add_argument('--concurrency', type=int, default=1,
+                       help='Number of routes probed in parallel (1 = sequential)')
+    parser.add_argument('--per-controller', type=int,
+                       help='Maximum in-flight requests per controller')
+    parser.add_argument('--pool-size', type=int,
+                       help='Keep-alive connections per host (defaults to --concurrency)')
+    parser.add_argument('--adaptive-timeout', action='store_true',
+                        help='Derive per-route timeouts from observed latency, capped at --timeout')
+    parser.add_argument('--min-timeout', type=float, default=0.5, help='Lower bound for adaptive timeouts in seconds')
+    parser.add_argument('--breaker-threshold', type=int,
+                        help='Skip a controller\'s remaining routes after this many consecutive failures')
+    parser.add_argument('--breaker-cooldown', type=float, default=30,
+                        help='Seconds an open circuit waits before letting one trial request through')
+    parser.add_argument('--fixtures', help='JSON fixtures: route parameter sources and auth login')
+    parser.add_argument('--max-body-bytes', type=int,
+                       help='Stop reading each response body after this many bytes')
+    parser.add_argument('--samples', type=int, default=0,
+                       help='Sample each route N times and report latency percentiles')
+    parser.add_argument('--duration', type=float,
+                       help='Sample each route for this many seconds')
+    parser.add_argument('--warmup', type=int, default=0,
+                       help='Unrecorded requests per route before sampling')
+    parser.add_argument('--cold-start', action='store_true',
+                       help='Record each route\'s first-hit latency separately from warm samples')
+    parser.add_argument('--launch-cmd', help='Command that starts the API; time-to-ready is measured from launch')
+    parser.add_argument('--ready-path', default='/health/ready', help='Readiness endpoint polled after launch')
+    parser.add_argument('--ready-timeout', type=float, default=120, help='Seconds to wait for readiness')
+    parser.add_argument('--launch-log', help='File receiving the launched API\'s output')
+    parser.add_argument('--keep-alive', action='store_true', help='Leave the launched API running after probing')
+    parser.add_argument('--baseline', help='Latency baseline store (JSON, .gz for gzip)')
+    parser.add_argument('--save-baseline', action='store_true',
+                       help='Append this run to the baseline store unless it regressed')
+    parser.add_argument('--accept', action='store_true',
+                       help='With --save-baseline, record the run even if it regressed and report regressions without failing')
+    parser.add_argument('--compare-baseline', action='store_true',
+                       help='Fail if any route regressed against the baseline store')
+    parser.add_argument('--baseline-runs', type=int, default=10, help='Runs kept in the baseline store')
+    parser.add_argument('--p95-threshold', type=float, default=0.2,
+                       help='Relative p95 increase (beyond the confidence band) treated as a regression')
+    parser.add_argument('--min-delta-ms', type=float, default=5.0,
+                       help='Ignore p95 increases smaller than this many ms')
+    parser.add_argument('--error-threshold', type=float, default=0.05,
+                       help='Absolute error-rate increase treated as a regression')
+    parser.add_argument('--controller-out', help='Per-controller percentile CSV report')
+    parser.add_argument('--rate', help='Open-loop load mode: target req/s, or comma-separated steps (e.g. 10,20,50)')
+    parser.add_argument('--load-duration', type=float, default=30, help='Seconds per load step')
+    parser.add_argument('--weights', help='JSON weights per controller/route for the load mix')
+    parser.add_argument('--arrival', choices=['constant', 'poisson'], default='constant',
+                       help='Inter-arrival distribution in load mode')
+    parser.add_argument('--max-in-flight', type=int, default=200, help='Concurrent requests cap in load mode')
+    parser.add_argument('--slo-p99', type=float, help='p99 latency SLO in ms; load steps stop once it is broken')
+    parser.add_argument('--timeseries-out', help='Per-second load time series CSV')
+    parser.add_argument('--seed', type=int, help='Random seed for the load mix')
+    parser.add_argument('--replay', help='Replay a recorded access log / JSONL log / HAR file (.gz allowed)')
+    parser.add_argument('--replay-format', choices=['auto', 'clf', 'jsonl', 'har'], default='auto',
+                       help='Recording format (guessed from the extension by default)')
+    parser.add_argument('--speed', type=float, default=1.0,
+                       help='Replay speed factor (2 = twice as fast, 0 = as fast as possible)')
+    parser.add_argument('--replay-limit', type=int, help='Stop after replaying this many requests')
+    parser.add_argument('--profile', metavar='FILE',
+                       help='Write a JSON profile of time spent on the network, reading bodies and writing reports')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
-    import os
     BASE = args.base_url if args.base_url else os.getenv("API_BASE_URL", "http://127.0.0.1:5080")
     
+    profiler = Profiler('api_probe', enabled=bool(args.profile))
     try:
-        with open(args.routes_file, 'r') as f:
+        with profiler.phase('load'), open(args.routes_file, 'r') as f:
             routes = json.load(f)
     except Exception as e:
         print(f"Error loading routes file: {e}")
         sys.exit(1)
     
-    prober = ApiProber(BASE, args.timeout)
-    prober.probe_all_routes(routes)
-    prober.generate_report(args.output_file)
+    if args.rate:
+        run_load(BASE, routes, args)
+        return
+    
+    if args.replay:
+        run_replay(BASE, routes, args)
+        return
+    
+    prober = ApiProber(BASE, args.timeout, concurrency=args.concurrency,
+                       per_controller=args.per_controller, pool_size=args.pool_size,
+                       samples=args.samples, duration=args.duration, warmup=args.warmup,
+                       max_body_bytes=args.max_body_bytes, cold_start=args.cold_start,
+                       fixtures=load_fixtures(BASE, args), adaptive_timeout=args.adaptive_timeout,
+                       min_timeout=args.min_timeout, breaker_threshold=args.breaker_threshold,
+                       breaker_cooldown=args.breaker_cooldown, profiler=profiler)
+    
+    api_proc = None
+    if args.launch_cmd:
+        try:
+            api_proc = prober.launch_and_wait(args.launch_cmd, args.ready_path, args.ready_timeout, args.launch_log)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        print(f"API ready after {prober.time_to_ready_ms}ms")
+    
+    try:
+        prober.probe_all_routes(routes)
+    finally:
+        if api_proc is not None and not args.keep_alive:
+            stop_process_group(api_proc)
+    with profiler.phase('write'):
+        prober.generate_report(args.output_file)
+        if args.controller_out:
+            prober.generate_controller_report(args.controller_out)
     
     summary = prober.get_summary()
     print(f"\nAPI Probe Summary:")
@@ -168,8 +615,72 @@ def main():
     print(f"  Client errors (4xx): {summary['client_errors']}")
     print(f"  Server errors (5xx): {summary['server_errors']}")
     print(f"  Connection errors: {summary['connection_errors']}")
+    if prober.fixtures is not None:
+        print(f"  Fixture errors: {summary['fixture_errors']}")
+    if prober.breaker is not None:
+        print(f"  Skipped (circuit open): {summary['skipped']}")
     print(f"  Average latency: {summary['avg_latency_ms']}ms")
+    if 'latency' in summary:
+        latency = summary['latency']
+        print(f"  Latency percentiles ({latency['samples']} samples): "
+              f"p50={format_percentile(latency, 50)}ms p90={format_percentile(latency, 90)}ms "
+              f"p95={format_percentile(latency, 95)}ms p99={format_percentile(latency, 99)}ms "
+              f"max={latency['max_ms']}ms")
+        if latency['timeouts']:
+            print(f"  ('>=' marks percentiles reached by the {latency['timeouts']} timed-out requests)")
+        print(f"\nPer-controller latency:")
+        for controller, stats in summary['controllers'].items():
+            print(f"  {controller:<24} p50={format_percentile(stats, 50)}ms p95={format_percentile(stats, 95)}ms "
+                  f"p99={format_percentile(stats, 99)}ms max={stats['max_ms']}ms")
+    if 'cold_start' in summary:
+        cold = summary['cold_start']
+        print(f"\nCold start:")
+        if cold['time_to_ready_ms'] is not None:
+            print(f"  Time to ready: {cold['time_to_ready_ms']}ms")
+        print(f"  First hit: p50={cold['first_hit']['p50_ms']}ms p95={cold['first_hit']['p95_ms']}ms "
+              f"max={cold['first_hit']['max_ms']}ms")
+        print(f"\nWarm path:")
+        print(f"  Steady state: p50={cold['warm']['p50_ms']}ms p95={cold['warm']['p95_ms']}ms "
+              f"max={cold['warm']['max_ms']}ms")
     print(f"Report saved to: {args.output_file}")
+    if args.profile:
+        finish(profiler, args.profile)
+    
+    if args.baseline and (args.compare_baseline or args.save_baseline):
+        check_baseline(prober, args)
+
+def check_baseline(prober: ApiProber, args) -> None:
+    """Compare against and/or extend the baseline store; exit 1 on regressions.
+
+    With --accept (used on the main branch, where the change has already
+    landed) the run always becomes part of the baseline, so a deliberate
+    slowdown does not keep failing every later run.
+    """
+    from probe_baseline import BaselineStore, compare
+    
+    store = BaselineStore(args.baseline, max_runs=args.baseline_runs)
+    regressions = []
+    if args.compare_baseline:
+        if store.runs:
+            regressions = compare(store.baseline(), prober.results, p95_threshold=args.p95_threshold,
+                                  min_delta_ms=args.min_delta_ms, error_threshold=args.error_threshold)
+            print(f"\nBaseline comparison ({len(store.runs)} stored runs): {len(regressions)} regressions")
+            for regression in regressions:
+                print(f"  {regression['route']}: {regression['reason']}")
+        else:
+            print(f"\nBaseline store {args.baseline} is empty; nothing to compare")
+    
+    if args.save_baseline and (args.accept or not regressions):
+        store.add_run(prober.results)
+        store.save()
+        print(f"Baseline updated: {args.baseline}")
+    
+    if regressions:
+        if args.accept:
+            print(f"WARNING: Accepted {len(regressions)} latency/error regressions into the baseline")
+            return
+        print(f"FAIL: Found {len(regressions)} latency/error regressions")
+        sys.exit(1)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Audit Analytics for BARQ Platform
+Streams any number of audit CSVs once, row by row, and reports severity /
+type / file / directory counts, a trend table across snapshots and hot files
+"""
+
+import argparse
+import csv
+import os
+import posixpath
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from findings_store import guess_tool, natural_key
+
+SEVERITIES = ('High', 'Medium', 'Low')
+TREND_FIELDNAMES = ['tool', 'run', 'High', 'Medium', 'Low', 'total', 'delta_high', 'delta_total']
+HOT_FIELDNAMES = ['tool', 'file', 'high', 'total', 'runs_present', 'first_run', 'first_total', 'total_change']
+
+
+class RunStats:
+    """Counters for one snapshot; memory grows with distinct files and types, not rows"""
+
+    def __init__(self, name: str, fieldnames: List[str]):
+        self.name = name
+        self.fieldnames = fieldnames
+        self.severity = Counter()
+        self.types = Counter()
+        self.files = Counter()
+        self.file_high = Counter()
+        self.directories = Counter()
+
+    def add(self, file: str, severity: str, finding_type: str) -> None:
+        self.severity[severity] += 1
+        self.types[(severity, finding_type)] += 1
+        self.files[file] += 1
+        if severity == 'High':
+            self.file_high[file] += 1
+        self.directories[posixpath.dirname(file) or '.'] += 1
+
+    @property
+    def total(self) -> int:
+        return sum(self.severity.values())
+
+
+class ToolHistory:
+    """Trend rows and per-file history for one tool, plus its latest snapshot"""
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.trend: List[Dict] = []
+        self.latest: Optional[RunStats] = None
+        self.file_runs = Counter()
+        self.file_first: Dict[str, tuple] = {}
+
+    def add_run(self, stats: RunStats) -> None:
+        previous = self.trend[-1] if self.trend else None
+        row = {'tool': self.tool, 'run': stats.name, 'total': stats.total}
+        for severity in SEVERITIES:
+            row[severity] = stats.severity[severity]
+        row['delta_high'] = row['High'] - previous['High'] if previous else 0
+        row['delta_total'] = row['total'] - previous['total'] if previous else 0
+        self.trend.append(row)
+
+        for file, count in stats.files.items():
+            self.file_runs[file] += 1
+            self.file_first.setdefault(file, (stats.name, count))
+        self.latest = stats
+
+    def hot_files(self, limit: int) -> List[Dict]:
+        """Files of the latest snapshot ranked by High, then total findings, then persistence"""
+        latest = self.latest
+        ranked = sorted(latest.files, key=lambda f: (-latest.file_high[f], -latest.files[f],
+                                                     -self.file_runs[f], f))
+        rows = []
+        for file in ranked[:limit]:
+            first_run, first_total = self.file_first[file]
+            rows.append({'tool': self.tool, 'file': file, 'high': latest.file_high[file],
+                         'total': latest.files[file], 'runs_present': self.file_runs[file],
+                         'first_run': first_run, 'first_total': first_total,
+                         'total_change': latest.files[file] - first_total})
+        return rows
+
+
+def expand_inputs(inputs: List[str]) -> List[str]:
+    """CSV paths from files and directories, in natural snapshot order"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(str(path) for path in Path(item).glob('*.csv'))
+        else:
+            paths.append(item)
+    return sorted(paths, key=lambda p: natural_key(Path(p).stem))
+
+
+def stream_run(path: str) -> Optional[RunStats]:
+    """Aggregate one CSV row by row; None if it is not an audit report"""
+    with open(path, 'r', newline='', encoding='utf-8', errors='replace') as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        stats = RunStats(Path(path).stem, header)
+        try:
+            file_index, severity_index, type_index = (header.index(c) for c in ('file', 'severity', 'type'))
+        except ValueError:
+            return None
+        width = max(file_index, severity_index, type_index)
+        for row in reader:
+            if len(row) > width:
+                stats.add(row[file_index], row[severity_index], row[type_index])
+    return stats
+
+
+def write_rows(output_file: str, fieldnames: List[str], rows: List[Dict]) -> None:
+    with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Streaming Audit Analytics')
+    parser.add_argument('inputs', nargs='+', help='Audit CSV files or directories of them')
+    parser.add_argument('--top', type=int, default=15, help='Rows shown per ranking')
+    parser.add_argument('--trend-out', help='CSV trend table across snapshots')
+    parser.add_argument('--hot-out', help='CSV ranking of hot files')
+    args = parser.parse_args()
+
+    csv.field_size_limit(sys.maxsize)
+    histories: Dict[str, ToolHistory] = {}
+    for path in expand_inputs(args.inputs):
+        stats = stream_run(path)
+        if stats is None:
+            print(f"Warning: {path} is not an audit report, skipped")
+            continue
+        tool = guess_tool(stats.name, stats.fieldnames)
+        histories.setdefault(tool, ToolHistory(tool)).add_run(stats)
+
+    trend_rows = []
+    hot_rows = []
+    for tool, history in sorted(histories.items()):
+        latest = history.latest
+        print(f"\n=== {tool.upper()} ({len(history.trend)} snapshots, latest: {latest.name}) ===")
+        print(f"  High: {latest.severity['High']}  Medium: {latest.severity['Medium']}  "
+              f"Low: {latest.severity['Low']}  Total: {latest.total}")
+
+        print(f"\n  By type:")
+        for (severity, finding_type), count in latest.types.most_common(args.top):
+            print(f"    {severity:<7} {finding_type:<24} {count:>6}")
+        print(f"\n  By directory:")
+        for directory, count in latest.directories.most_common(args.top):
+            print(f"    {directory:<70} {count:>6}")
+
+        if len(history.trend) > 1:
+            print(f"\n  Trend:")
+            print(f"    {'run':<40} {'High':>6} {'Medium':>7} {'Low':>5} {'Total':>6} {'dHigh':>6}")
+            for row in history.trend:
+                print(f"    {row['run']:<40} {row['High']:>6} {row['Medium']:>7} {row['Low']:>5} "
+                      f"{row['total']:>6} {row['delta_high']:>+6}")
+
+        hot = history.hot_files(args.top)
+        print(f"\n  Hot files:")
+        for row in hot:
+            print(f"    {row['file']:<80} High {row['high']:>3}  Total {row['total']:>4}  "
+                  f"in {row['runs_present']}/{len(history.trend)} runs  ({row['total_change']:+d} since {row['first_run']})")
+        trend_rows.extend(history.trend)
+        hot_rows.extend(hot)
+
+    if args.trend_out:
+        write_rows(args.trend_out, TREND_FIELDNAMES, trend_rows)
+        print(f"\nTrend saved to: {args.trend_out}")
+    if args.hot_out:
+        write_rows(args.hot_out, HOT_FIELDNAMES, hot_rows)
+        print(f"Hot files saved to: {args.hot_out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite for BARQ Platform audit and probe tooling
+Generates a seeded synthetic C#/TS corpus (with node_modules and bin decoy
+trees), times the scanners and route extractor, measures probe throughput
+against an in-process stand-in server and writes the results as JSON
+
+Runs offline; compare two runs with --compare:
+    python3 scripts/audit_benchmark.py --out audit/bench-before.json
+    python3 scripts/audit_benchmark.py --out audit/bench-after.json --compare audit/bench-before.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from audit_walk import SourceTree, walk_files
+from backend_audit import BackendAuditor
+from controller_routes import RouteExtractor
+from placeholder_sweep import PlaceholderSweeper
+
+BENCHMARK_VERSION = 1
+DEFAULT_LATENCIES = 'fixed:2,exponential:5,lognormal:5:3'
+FRONTEND_EXTENSIONS = ['ts', 'tsx', 'js', 'jsx']
+# Higher is better for these metrics; everything else compared is a duration
+THROUGHPUT_METRICS = ('files_per_s', 'lines_per_s', 'requests_per_s')
+
+SERVICE_SNIPPETS = [
+    """        public async Task<List<{entity}>> GetAll{n}Async(int page)
+        {{
+            return await _context.{entity}s.Where(x => x.Amount > 0).OrderBy(x => x.Name)
+                .Skip(page * 20).Take(20).AsNoTracking().ToListAsync();
+        }}""",
+    """        public async Task Refresh{n}Async(List<Guid> ids)
+        {{
+            foreach (var id in ids)
+            {{
+                var item = await _context.{entity}s.FindAsync(id);
+                item.Amount += 1;
+            }}
+            await _context.SaveChangesAsync();
+        }}""",
+    """        public decimal Total{n}()
+        {{
+            var rows = _context.{entity}s.ToList().Where(x => x.Amount > 10);
+            return rows.Sum(x => x.Amount);
+        }}""",
+    """        public {entity} Load{n}(Guid id)
+        {{
+            return _context.{entity}s.FirstOrDefaultAsync(x => x.Id == id).Result;
+        }}""",
+    """        public Task<int> Count{n}Async()
+        {{
+            // TODO: cache the count per tenant
+            throw new NotImplementedException();
+        }}""",
+    """        public async Task<string> Fetch{n}Async(string url)
+        {{
+            var client = new HttpClient();
+            return await client.GetStringAsync(url);
+        }}""",
+    """        public async Task<List<{entity}>> Search{n}Async(string term)
+        {{
+            return await _context.{entity}s.Where(x => x.Name.Contains(term)).ToListAsync();
+        }}""",
+]
+
+CONTROLLER_SNIPPETS = [
+    """        [HttpGet]
+        public async Task<IActionResult> List{n}([FromQuery] int page = 0) => Ok(await _service.GetAll{n}Async(page));""",
+    """        [HttpGet("{{id:guid}}")]
+        public IActionResult Get{n}(Guid id) => Ok(_service.Load{n}(id));""",
+    """        [HttpPost("refresh")]
+        public async Task<IActionResult> Refresh{n}([FromBody] List<Guid> ids)
+        {{
+            await _service.Refresh{n}Async(ids);
+            return NoContent();
+        }}""",
+    """        [HttpGet("search/{{term}}")]
+        public async Task<IActionResult> Search{n}(string term, CancellationToken cancellationToken)
+            => Ok(await _service.Search{n}Async(term));""",
+]
+
+TS_SNIPPETS = [
+    "  const [items{n}, setItems{n}] = useState<Item[]>([]);",
+    "  // TODO: move the fetch into a hook",
+    "  console.log('rendered {n}', items{n}.length);",
+    "  const mockItems{n} = [{{ id: {n}, name: 'sample' }}];",
+    "  const label{n} = t('items.title', {{ count: items{n}.length }});",
+    "  useEffect(() => {{ api.get(`/api/items/{n}`).then(r => setItems{n}(r.data)); }}, []);",
+    "  const placeholder{n} = 'Search...';",
+]
+
+DECOY_LINE = "// TODO: vendored code, never scanned\nconsole.log('decoy {n}'); const mockData{n} = 'placeholder';\n"
+
+
+class CorpusGenerator:
+    """Deterministic synthetic source tree of about ``lines`` lines per file"""
+
+    def __init__(self, root: str, cs_files: int = 200, ts_files: int = 100, lines: int = 200,
+                 decoy_files: int = 200, seed: int = 1):
+        self.root = Path(root)
+        self.cs_files = cs_files
+        self.ts_files = ts_files
+        self.lines = lines
+        self.decoy_files = decoy_files
+        self.random = random.Random(seed)
+        self.controllers = max(1, cs_files // 5)
+        self.entities = max(1, cs_files // 5)
+        self.services = max(1, cs_files - self.controllers - self.entities)
+
+    @property
+    def backend(self) -> Path:
+        return self.root / 'Backend'
+
+    @property
+    def frontend(self) -> Path:
+        return self.root / 'Frontend'
+
+    @property
+    def controllers_dir(self) -> Path:
+        return self.backend / 'src' / 'Bench.API' / 'Controllers'
+
+    def _write(self, path: Path, text: str) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def _body(self, snippets: List[str], count: int, **names) -> List[str]:
+        parts = []
+        used = 0
+        index = 0
+        while used < count:
+            snippet = self.random.choice(snippets).format(n=index, **names)
+            parts.append(snippet)
+            used += snippet.count('\n') + 2
+            index += 1
+        return parts
+
+    def generate(self) -> Dict:
+        self._write(self.backend / 'src' / 'Bench.Core' / 'Entities' / 'BaseEntity.cs', """namespace Bench.Core.Entities
+{
+    public abstract class BaseEntity
+    {
+        public Guid Id { get; set; }
+        public Guid TenantId { get; set; }
+    }
+
+    public abstract class TenantEntity : BaseEntity
+    {
+    }
+}
+""")
+        entity_names = [f'Order{i}' for i in range(self.entities)]
+        for name in entity_names:
+            base = 'TenantEntity' if self.random.random() < 0.7 else 'BaseEntity'
+            properties = '\n'.join(f'        public string Field{i} {{ get; set; }} = string.Empty;'
+                                   for i in range(max(0, self.lines - 12)))
+            self._write(self.backend / 'src' / 'Bench.Core' / 'Entities' / f'{name}.cs',
+                        f"""namespace Bench.Core.Entities
+{{
+    public class {name} : {base}
+    {{
+        public string Name {{ get; set; }} = string.Empty;
+        public decimal Amount {{ get; set; }}
+{properties}
+    }}
+}}
+""")
+        db_sets = '\n'.join(f'        public DbSet<{name}> {name}s {{ get; set; }}' for name in entity_names)
+        self._write(self.backend / 'src' / 'Bench.Infrastructure' / 'Data' / 'BenchDbContext.cs',
+                    f"""using Microsoft.EntityFrameworkCore;
+
+namespace Bench.Infrastructure.Data
+{{
+    public class BenchDbContext : DbContext
+    {{
+{db_sets}
+    }}
+}}
+""")
+
+        for i in range(self.services):
+            entity = entity_names[i % len(entity_names)]
+            body = '\n\n'.join(self._body(SERVICE_SNIPPETS, self.lines - 20, entity=entity))
+            self._write(self.backend / 'src' / 'Bench.Application' / 'Services' / f'Item{i}Service.cs',
+                        f"""using Microsoft.EntityFrameworkCore;
+using Bench.Infrastructure.Data;
+
+namespace Bench.Application.Services
+{{
+    public class Item{i}Service : IItem{i}Service
+    {{
+        private readonly BenchDbContext _context;
+
+        public Item{i}Service(BenchDbContext context)
+        {{
+            _context = context;
+        }}
+
+{body}
+    }}
+}}
+""")
+
+        for i in range(self.controllers):
+            body = '\n\n'.join(self._body(CONTROLLER_SNIPPETS, self.lines - 20))
+            self._write(self.controllers_dir / f'Item{i}Controller.cs',
+                        f"""using Microsoft.AspNetCore.Mvc;
+
+namespace Bench.API.Controllers
+{{
+    [ApiController]
+    [Route("api/items{i}")]
+    public class Item{i}Controller : ControllerBase
+    {{
+        private readonly IItem{i}Service _service;
+
+        public Item{i}Controller(IItem{i}Service service)
+        {{
+            _service = service;
+        }}
+
+{body}
+    }}
+}}
+""")
+
+        for i in range(self.ts_files):
+            body = '\n'.join(self._body(TS_SNIPPETS, self.lines - 10))
+            extension = 'tsx' if i % 2 == 0 else 'ts'
+            self._write(self.frontend / 'src' / 'components' / f'Items{i}.{extension}',
+                        f"""import {{ useEffect, useState }} from 'react';
+import {{ api }} from '../lib/api';
+
+export function Items{i}() {{
+{body}
+  return null;
+}}
+""")
+
+        # Decoys: excluded directories that a correct walk never enters
+        decoy_lines = max(1, self.lines // 2)
+        for i in range(self.decoy_files):
+            text = ''.join(DECOY_LINE.format(n=n) for n in range(decoy_lines))
+            if i % 4 == 3:
+                self._write(self.backend / 'src' / 'Bench.API' / 'bin' / 'Debug' / f'Generated{i}.cs', text)
+            else:
+                self._write(self.frontend / 'node_modules' / f'decoy-pkg-{i}' / 'index.ts', text)
+
+        return self.describe()
+
+    def describe(self) -> Dict:
+        return {'cs_files': self.cs_files, 'ts_files': self.ts_files, 'lines_per_file': self.lines,
+                'decoy_files': self.decoy_files, 'controllers': self.controllers,
+                'services': self.services, 'entities': self.entities}
+
+
+def count_lines(paths: List[Path]) -> int:
+    total = 0
+    for path in paths:
+        with open(path, 'rb') as f:
+            total += f.read().count(b'\n')
+    return total
+
+
+def time_runs(run: Callable[[], Dict], repeat: int) -> Dict:
+    """Best and median wall/CPU time of ``repeat`` runs, plus the last run's counters"""
+    walls = []
+    cpus = []
+    counters = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        start_cpu = time.process_time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            counters = run()
+        walls.append(time.perf_counter() - start)
+        cpus.append(time.process_time() - start_cpu)
+    result = {'best_s': round(min(walls), 4), 'median_s': round(statistics.median(walls), 4),
+              'cpu_s': round(min(cpus), 4), 'runs': repeat}
+    result.update(counters)
+    return result
+
+
+def add_rates(result: Dict, files: int, lines: int) -> Dict:
+    best = result['best_s'] or 1e-9
+    result.update({'files': files, 'lines': lines, 'files_per_s': round(files / best, 1),
+                   'lines_per_s': round(lines / best, 1)})
+    return result
+
+
+def decoy_findings(issues: List[Dict]) -> int:
+    return sum(1 for issue in issues if 'node_modules' in issue['file'] or '/bin/' in issue['file'].replace(os.sep, '/'))
+
+
+def bench_scanners(corpus: CorpusGenerator, repeat: int, jobs: int) -> Dict[str, Dict]:
+    backend, frontend = str(corpus.backend), str(corpus.frontend)
+    results = {}
+
+    def backend_audit() -> Dict:
+        auditor = BackendAuditor(backend, jobs)
+        auditor.scan_directory()
+        return {'findings': len(auditor.issues), 'decoy_findings': decoy_findings(auditor.issues)}
+    paths = [path for _, path in walk_files(backend, ['cs'])]
+    results['backend_audit'] = add_rates(time_runs(backend_audit, repeat), len(paths), count_lines(paths))
+
+    def placeholder_sweep() -> Dict:
+        sweeper = PlaceholderSweeper(jobs)
+        sweeper.scan_directory(backend, ['cs'])
+        sweeper.scan_directory(frontend, FRONTEND_EXTENSIONS)
+        return {'findings': len(sweeper.issues), 'decoy_findings': decoy_findings(sweeper.issues)}
+    sweep_paths = paths + [path for _, path in walk_files(frontend, FRONTEND_EXTENSIONS)]
+    results['placeholder_sweep'] = add_rates(time_runs(placeholder_sweep, repeat),
+                                             len(sweep_paths), count_lines(sweep_paths))
+
+    def route_extractor() -> Dict:
+        extractor = RouteExtractor(str(corpus.controllers_dir))
+        extractor.extract_all_routes()
+        return {'routes': len(extractor.routes)}
+    controller_paths = [path for _, path in walk_files(str(corpus.controllers_dir), ['cs'])]
+    results['route_extractor'] = add_rates(time_runs(route_extractor, repeat),
+                                           len(controller_paths), count_lines(controller_paths))
+
+    def shared_tree() -> Dict:
+        # What barq-audit does: all three over one walk and one content cache
+        source = SourceTree([backend, frontend])
+        RouteExtractor(str(corpus.controllers_dir), source=source).extract_all_routes()
+        sweeper = PlaceholderSweeper(jobs, source=source)
+        sweeper.scan_directory(backend, ['cs'])
+        sweeper.scan_directory(frontend, FRONTEND_EXTENSIONS)
+        BackendAuditor(backend, jobs, source=source).scan_directory()
+        return {'files_read': source.disk_reads}
+    results['shared_tree'] = add_rates(time_runs(shared_tree, repeat), len(sweep_paths), count_lines(sweep_paths))
+    return results
+
+
+def parse_latencies(spec: str) -> List[Tuple[str, float, float]]:
+    """'fixed:2,lognormal:5:3' -> [(distribution, mean_ms, jitter_ms)]"""
+    latencies = []
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        fields = item.split(':')
+        latencies.append((fields[0], float(fields[1]) if len(fields) > 1 else 5.0,
+                          float(fields[2]) if len(fields) > 2 else 0.0))
+    return latencies
+
+
+def bench_probe(routes: List[Dict], latencies: List[Tuple[str, float, float]], requests: int,
+                concurrency: int, seed: int) -> Dict[str, Dict]:
+    # Imported here so scanner-only runs do not need requests installed
+    from api_probe import ApiProber
+    from latency_histogram import LatencyHistogram, record_result
+    from probe_standin import LatencyModel, StandinServer
+
+    schedule = [routes[i % len(routes)] for i in range(requests)]
+    results = {}
+    for distribution, mean_ms, jitter_ms in latencies:
+        name = f"{distribution}:{mean_ms:g}" + (f":{jitter_ms:g}" if jitter_ms else '')
+        with StandinServer(LatencyModel(distribution, mean_ms, jitter_ms, seed), seed=seed) as server:
+            prober = ApiProber(server.base_url, concurrency=concurrency)
+            start = time.perf_counter()
+            start_cpu = time.process_time()
+            with contextlib.redirect_stdout(io.StringIO()):
+                prober.probe_all_routes(schedule)
+            elapsed = time.perf_counter() - start
+            cpu = time.process_time() - start_cpu
+        histogram = LatencyHistogram()
+        for result in prober.results:
+            record_result(histogram, result)
+        summary = histogram.summary()
+        results[name] = {
+            'requests': len(schedule), 'concurrency': concurrency,
+            'errors': sum(1 for r in prober.results if r['status_code'] == 0 or r['status_code'] >= 500),
+            'elapsed_s': round(elapsed, 4), 'cpu_s': round(cpu, 4),
+            'requests_per_s': round(len(schedule) / elapsed, 1) if elapsed else 0.0,
+            'p50_ms': summary['p50_ms'], 'p95_ms': summary['p95_ms'], 'p99_ms': summary['p99_ms'],
+            # Client overhead: measured latency above what the server was asked to sleep
+            'overhead_p50_ms': round(summary['p50_ms'] - mean_ms, 2) if distribution == 'fixed' else None
+        }
+    return results
+
+
+def compare(current: Dict, baseline: Dict) -> List[Tuple[str, str, float, float, float]]:
+    """(section, metric, before, after, % change) for metrics in both runs; a positive change is faster"""
+    rows = []
+    for section in ('scanners', 'probe'):
+        for name, result in current.get(section, {}).items():
+            before = baseline.get(section, {}).get(name)
+            if not before:
+                continue
+            for metric in THROUGHPUT_METRICS + ('best_s', 'p95_ms'):
+                if metric not in result or not before.get(metric) or result[metric] is None:
+                    continue
+                change = (result[metric] - before[metric]) / before[metric] * 100
+                if metric not in THROUGHPUT_METRICS:
+                    change = -change
+                rows.append((f"{section}.{name}", metric, before[metric], result[metric], round(change, 1)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Audit & Probe Tooling Benchmarks')
+    parser.add_argument('--out', default='audit/benchmark.json', help='Results JSON file')
+    parser.add_argument('--compare', metavar='FILE', help='Earlier results JSON to compare against')
+    parser.add_argument('--corpus', help='Generate the corpus here and keep it (default: a temporary directory)')
+    parser.add_argument('--cs-files', type=int, default=200, help='Synthetic C# files')
+    parser.add_argument('--ts-files', type=int, default=100, help='Synthetic TS/TSX files')
+    parser.add_argument('--lines', type=int, default=200, help='Approximate lines per file')
+    parser.add_argument('--decoy-files', type=int, default=200,
+                        help='Files under node_modules/ and bin/ that the walk must skip')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for the corpus and latency models')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per scanner (best and median reported)')
+    parser.add_argument('--jobs', type=int, default=1, help='Scanner processes (0 = one per CPU)')
+    parser.add_argument('--latencies', default=DEFAULT_LATENCIES,
+                        help='Stand-in server latencies: distribution:mean_ms[:jitter_ms], comma-separated')
+    parser.add_argument('--probe-requests', type=int, default=500, help='Requests per probe benchmark')
+    parser.add_argument('--probe-concurrency', type=int, default=8, help='Probe concurrency')
+    parser.add_argument('--skip-probe', action='store_true', help='Only benchmark the scanners')
+    args = parser.parse_args()
+
+    if args.compare and not os.path.exists(args.compare):
+        print(f"Error: {args.compare} does not exist")
+        sys.exit(1)
+
+    corpus_dir = args.corpus or tempfile.mkdtemp(prefix='barq-bench-')
+    try:
+        corpus = CorpusGenerator(corpus_dir, args.cs_files, args.ts_files, args.lines, args.decoy_files, args.seed)
+        print(f"Generating corpus in {corpus_dir}...")
+        description = corpus.generate()
+
+        print(f"Benchmarking scanners ({args.repeat} runs each)...")
+        scanners = bench_scanners(corpus, args.repeat, args.jobs)
+        probe = {}
+        if not args.skip_probe:
+            routes = RouteExtractor(str(corpus.controllers_dir))
+            routes.extract_all_routes()
+            print(f"Benchmarking probe ({args.probe_requests} requests over {len(routes.routes)} routes)...")
+            probe = bench_probe(routes.routes, parse_latencies(args.latencies), args.probe_requests,
+                                args.probe_concurrency, args.seed)
+    finally:
+        if not args.corpus:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    results = {
+        'version': BENCHMARK_VERSION,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': {'python': platform.python_version(), 'implementation': platform.python_implementation(),
+                        'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'settings': {'repeat': args.repeat, 'jobs': args.jobs, 'seed': args.seed},
+        'corpus': description,
+        'scanners': scanners,
+        'probe': probe
+    }
+    directory = os.path.dirname(args.out)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+        f.write('\n')
+
+    print(f"\nScanners:")
+    for name, result in scanners.items():
+        print(f"  {name:<18} best {result['best_s']:>7.3f}s  median {result['median_s']:>7.3f}s  "
+              f"{result['files_per_s']:>9.1f} files/s  {result['lines_per_s']:>10.1f} lines/s")
+        if result.get('decoy_findings'):
+            print(f"  Warning: {name} reported {result['decoy_findings']} findings inside decoy directories")
+    if probe:
+        print(f"\nProbe:")
+        for name, result in probe.items():
+            print(f"  {name:<18} {result['requests_per_s']:>8.1f} req/s  p50={result['p50_ms']}ms "
+                  f"p95={result['p95_ms']}ms  errors={result['errors']}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('corpus') != description:
+            print(f"\nWarning: {args.compare} used a different corpus; changes are not like for like")
+        print(f"\nAgainst {args.compare} (+ = faster):")
+        for section, metric, before, after, change in compare(results, baseline):
+            print(f"  {section:<32} {metric:<14} {before:>10} -> {after:>10}  {change:+.1f}%")
+    print(f"\nResults saved to: {args.out}")
+
+
+if __name__ == '__main__':
+    main()
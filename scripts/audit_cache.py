@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Incremental Scan Cache for BARQ Platform audits
+Per-file findings keyed by path, reused while the file's size and mtime,
+or failing that its content hash, are unchanged and the rules and scanner
+code are the same
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from audit_pool import scan_files
+
+CACHE_VERSION = 1
+# Files modified this recently may change again within the mtime granularity
+RACY_WINDOW_NS = 2 * 10 ** 9
+
+
+def _open(path: str, mode: str, compressed: bool):
+    if compressed:
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def file_digest(path: Path) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def code_fingerprint(*modules: str) -> str:
+    """Hash of the given source files, for cache keys that must change with the scanner code"""
+    digest = hashlib.sha256()
+    for module in modules:
+        with open(module, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class ScanCache:
+    """JSON (optionally gzipped) map of path -> size, mtime, sha256 and findings.
+
+    Entries are keyed by the path as scanned, so a cache restored into a
+    fresh checkout still matches. Checkouts reset mtimes, so those files
+    are confirmed by content hash and their stat data refreshed. A cache
+    written for a different rule fingerprint, or one that cannot be read,
+    is discarded.
+
+    Findings that also depend on other files declare them through
+    ``inputs``: ``inputs.references(path)`` names what a file looked up
+    and ``inputs.state(references)`` is the current answer. Both are stored
+    with the entry, which is only reused while the answer is unchanged, so
+    an edit elsewhere re-scans just the files that depend on it.
+    """
+
+    def __init__(self, path: str, fingerprint: str, inputs=None):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.inputs = inputs
+        self.entries: Dict[str, Dict] = {}
+        self.seen = set()
+        self.hits = 0
+        self.misses = 0
+        if os.path.exists(path):
+            try:
+                with _open(path, 'r', path.endswith('.gz')) as f:
+                    data = json.load(f)
+                if data.get('version') == CACHE_VERSION and data.get('fingerprint') == fingerprint:
+                    self.entries = data.get('files', {})
+            except (OSError, ValueError, EOFError):
+                self.entries = {}
+
+    def lookup(self, path: Path) -> Optional[List[Dict]]:
+        """Cached findings for an unchanged file, or None"""
+        key = str(path)
+        self.seen.add(key)
+        entry = self.entries.get(key)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.entries.pop(key, None)
+            return None
+
+        if entry is not None and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return self._reuse(entry)
+
+        digest = file_digest(path)
+        if entry is not None and entry['sha256'] == digest:
+            entry['size'] = stat.st_size
+            entry['mtime_ns'] = self._trusted_mtime(stat)
+            return self._reuse(entry)
+
+        self.entries[key] = {'size': stat.st_size, 'mtime_ns': self._trusted_mtime(stat),
+                             'sha256': digest, 'issues': None}
+        self.misses += 1
+        return None
+
+    def _reuse(self, entry: Dict) -> Optional[List[Dict]]:
+        """The entry's findings for an unchanged file, unless an input they depend on changed"""
+        if self.inputs is not None:
+            references, state = entry.get('inputs') or (None, None)
+            if references is None or self.inputs.state(references) != state:
+                entry['issues'] = None
+                self.misses += 1
+                return None
+        self.hits += 1
+        return entry['issues']
+
+    @staticmethod
+    def _trusted_mtime(stat: os.stat_result) -> Optional[int]:
+        """None forces a hash check next time for files that may still be changing"""
+        if time.time_ns() - stat.st_mtime_ns < RACY_WINDOW_NS:
+            return None
+        return stat.st_mtime_ns
+
+    def store(self, path: Path, issues: List[Dict]) -> None:
+        entry = self.entries.get(str(path))
+        if entry is None:
+            return
+        if any(issue.get('type') == 'ScanError' for issue in issues):
+            # Read failures may be transient; scan the file again next time
+            del self.entries[str(path)]
+            return
+        entry['issues'] = issues
+        if self.inputs is not None:
+            references = self.inputs.references(path)
+            entry['inputs'] = [references, self.inputs.state(references)]
+
+    def save(self, prune: bool = True) -> None:
+        """Write atomically; ``prune`` drops files not seen in this run"""
+        files = {key: entry for key, entry in self.entries.items()
+                 if (key in self.seen or not prune) and entry['issues'] is not None}
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            with _open(tmp_path, 'w', self.path.endswith('.gz')) as f:
+                json.dump({'version': CACHE_VERSION, 'fingerprint': self.fingerprint, 'files': files},
+                          f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def scan_with_cache(scan: Callable[[Path], List[Dict]], paths: List[Path], jobs: int = 1,
+                    cache: Optional[ScanCache] = None,
+                    prepare: Optional[Callable[[List[Path]], None]] = None) -> Iterator[List[Dict]]:
+    """Like ``scan_files``, but unchanged files are served from ``cache``.
+
+    Results stream in input order: cached findings are yielded as soon as
+    every earlier miss has been scanned, and misses are pulled from the
+    scan one at a time rather than collected first. ``prepare`` gets the
+    files about to be scanned, once before the first of them, and is not
+    called when nothing needs scanning.
+    """
+    if cache is None:
+        if paths and prepare is not None:
+            prepare(paths)
+        yield from scan_files(scan, paths, jobs)
+        return
+
+    cached: List[Optional[List[Dict]]] = [cache.lookup(path) for path in paths]
+    missed = [path for path, issues in zip(paths, cached) if issues is None]
+    if missed and prepare is not None:
+        prepare(missed)
+    scanned = scan_files(scan, missed, jobs)
+    for path, issues in zip(paths, cached):
+        if issues is None:
+            issues = next(scanned)
+            cache.store(path, issues)
+        yield issues
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+PR Scan Support for BARQ Platform audits
+Finds files changed since a git ref, merges their fresh findings into a
+stored baseline report and splits the difference into new and fixed findings
+"""
+
+import csv
+import hashlib
+import os
+import re
+import subprocess
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+WHITESPACE = re.compile(r'\s+')
+
+
+def finding_fingerprint(issue: Dict) -> str:
+    """Stable identity of a finding: file, rule and code with whitespace collapsed.
+
+    Line numbers are left out so findings keep their identity when
+    unrelated edits move them up or down.
+    """
+    code = WHITESPACE.sub(' ', issue.get('code') or '').strip()
+    key = f"{issue['file']}\x00{issue['type']}\x00{code}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def _git(*args: str) -> str:
+    result = subprocess.run(['git', *args], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"git {args[0]} failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+class ChangeSet:
+    """Files that differ between the merge base with ``ref`` and the working tree"""
+
+    def __init__(self, ref: str):
+        self.ref = ref
+        self.root = Path(_git('rev-parse', '--show-toplevel').strip())
+        base = self.base = _git('merge-base', ref, 'HEAD').strip()
+        self.changed: Set[Path] = set()
+        self.deleted: Set[Path] = set()
+        output = _git('diff', '--name-status', '--no-renames', '-z', base)
+        fields = output.split('\0')
+        for status, name in zip(fields[0::2], fields[1::2]):
+            path = (self.root / name).resolve()
+            (self.deleted if status == 'D' else self.changed).add(path)
+        # New files git has not seen yet are changes too
+        for name in _git('ls-files', '--others', '--exclude-standard', '-z').split('\0'):
+            if name:
+                self.changed.add((self.root / name).resolve())
+
+    def base_content(self, path: Path) -> Optional[str]:
+        """Text of ``path`` at the merge base, or None if it did not exist there"""
+        name = path.resolve().relative_to(self.root).as_posix()
+        result = subprocess.run(['git', 'show', f'{self.base}:{name}'], cwd=self.root, capture_output=True)
+        if result.returncode != 0:
+            return None
+        return result.stdout.decode('utf-8', errors='replace')
+
+    def select(self, paths: Iterable[Path]) -> List[Path]:
+        """The subset of ``paths`` that changed"""
+        return [path for path in paths if path.resolve() in self.changed]
+
+    def touched(self, base_dir: Path) -> Set[str]:
+        """Report 'file' values under ``base_dir`` that changed or were deleted"""
+        base = base_dir.resolve()
+        files = set()
+        for path in self.changed | self.deleted:
+            if base == path or base in path.parents:
+                files.add(path.relative_to(base).as_posix())
+        return files
+
+
+def read_report(path: str) -> List[Dict]:
+    """Rows of an audit CSV with 'line' converted back to int"""
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        row['line'] = int(row['line'] or 0)
+    return rows
+
+
+def merge_findings(baseline: List[Dict], scanned: List[Dict], touched: Set[str]) -> List[Dict]:
+    """Baseline rows for untouched files plus the fresh findings for touched ones"""
+    return [row for row in baseline if row['file'] not in touched] + list(scanned)
+
+
+def diff_findings(baseline: List[Dict], scanned: List[Dict], touched: Set[str]) -> Tuple[List[Dict], List[Dict]]:
+    """(new, fixed) findings in touched files, matched by fingerprint as multisets"""
+    before = [row for row in baseline if row['file'] in touched]
+    before_counts = Counter(finding_fingerprint(row) for row in before)
+    after_counts = Counter(finding_fingerprint(issue) for issue in scanned)
+
+    new = []
+    for issue in scanned:
+        fingerprint = finding_fingerprint(issue)
+        if before_counts[fingerprint] > 0:
+            before_counts[fingerprint] -= 1
+        else:
+            new.append(issue)
+    fixed = []
+    for row in before:
+        fingerprint = finding_fingerprint(row)
+        if after_counts[fingerprint] > 0:
+            after_counts[fingerprint] -= 1
+        else:
+            fixed.append(row)
+    return new, fixed
+
+
+def write_delta(output_file: str, new: List[Dict], fixed: List[Dict], fieldnames: List[str]) -> None:
+    """CSV of new and fixed findings with a leading 'change' column"""
+    directory = os.path.dirname(output_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=['change'] + fieldnames, extrasaction='ignore')
+        writer.writeheader()
+        order = {'High': 0, 'Medium': 1, 'Low': 2}
+        for change, issues in (('new', new), ('fixed', fixed)):
+            for issue in sorted(issues, key=lambda x: (order.get(x['severity'], 3), x['file'], x['line'])):
+                writer.writerow(dict(issue, change=change))
+
+
+def print_delta(ref: str, scanned_files: int, new: List[Dict], fixed: List[Dict]) -> None:
+    print(f"\nChanges since {ref}: {scanned_files} files scanned")
+    for label, issues in (('New', new), ('Fixed', fixed)):
+        counts = Counter(issue['severity'] for issue in issues)
+        print(f"  {label}: {len(issues)} (High {counts['High']}, Medium {counts['Medium']}, Low {counts['Low']})")
+    for issue in new:
+        if issue['severity'] == 'High':
+            print(f"    + {issue['file']}:{issue['line']} {issue['type']}: {issue['code'][:100]}")
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Profiling Hooks for BARQ Platform audits
+Wall and CPU time per phase, match time and hits per rule, and the slowest
+files, written as a JSON profile plus a short summary
+"""
+
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+from audit_rules import RuleEngine
+
+DEFAULT_TOP_FILES = 20
+PREFILTER = '(literal prefilter)'
+
+
+class Profiler:
+    """Cost accounting for one run; a disabled profiler records nothing.
+
+    Phase CPU time is the calling thread's, so concurrent phases (probe
+    requests on worker threads) add up to more than the run's wall time.
+    """
+
+    def __init__(self, tool: str, enabled: bool = True, top_files: int = DEFAULT_TOP_FILES):
+        self.tool = tool
+        self.enabled = enabled
+        self.top_files = top_files
+        self.started = time.perf_counter()
+        self.started_cpu = time.process_time()
+        self.phases: Dict[str, List[float]] = {}
+        self.rules: Dict[str, List[float]] = {}
+        self.files: List[tuple] = []
+        self.lock = threading.Lock()
+
+    def __getstate__(self) -> Dict:
+        # Scanners holding a profiler are pickled into worker processes
+        state = dict(self.__dict__)
+        del state['lock']
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        start_cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            cpu = time.thread_time() - start_cpu
+            with self.lock:
+                totals = self.phases.setdefault(name, [0.0, 0.0, 0])
+                totals[0] += wall
+                totals[1] += cpu
+                totals[2] += 1
+
+    def rule(self, name: str, seconds: float, hits: int) -> None:
+        if not self.enabled:
+            return
+        with self.lock:
+            totals = self.rules.setdefault(name, [0.0, 0, 0])
+            totals[0] += seconds
+            totals[1] += hits
+            totals[2] += 1
+
+    def file(self, path: str, seconds: float, lines: int) -> None:
+        """Keep the ``top_files`` slowest files"""
+        if not self.enabled:
+            return
+        entry = (seconds, str(path), lines)
+        with self.lock:
+            if len(self.files) < self.top_files:
+                heapq.heappush(self.files, entry)
+            else:
+                heapq.heappushpop(self.files, entry)
+
+    def report(self) -> Dict:
+        wall = time.perf_counter() - self.started
+        return {
+            'tool': self.tool,
+            'wall_s': round(wall, 4),
+            'cpu_s': round(time.process_time() - self.started_cpu, 4),
+            'phases': {name: {'wall_s': round(w, 4), 'cpu_s': round(c, 4), 'calls': n}
+                       for name, (w, c, n) in self.phases.items()},
+            'rules': {name: {'seconds': round(s, 4), 'hits': hits, 'calls': n}
+                      for name, (s, hits, n) in sorted(self.rules.items(), key=lambda item: -item[1][0])},
+            'slowest_files': [{'file': path, 'seconds': round(s, 4), 'lines': lines}
+                              for s, path, lines in sorted(self.files, reverse=True)]
+        }
+
+    def write(self, path: str) -> Dict:
+        """Write the JSON profile and return it"""
+        profile = self.report()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(profile, f, indent=2)
+            f.write('\n')
+        return profile
+
+    @staticmethod
+    def print_summary(profile: Dict, top: int = 10, file=sys.stdout) -> None:
+        print(f"\nProfile ({profile['tool']}): wall {profile['wall_s']:.3f}s, cpu {profile['cpu_s']:.3f}s",
+              file=file)
+        print(f"  {'phase':<16} {'wall s':>9} {'cpu s':>9} {'calls':>8}", file=file)
+        for name, phase in profile['phases'].items():
+            print(f"  {name:<16} {phase['wall_s']:>9.3f} {phase['cpu_s']:>9.3f} {phase['calls']:>8}", file=file)
+        if profile['rules']:
+            print(f"\n  {'rule':<28} {'seconds':>9} {'hits':>8} {'calls':>9}", file=file)
+            for name, rule in list(profile['rules'].items())[:top]:
+                print(f"  {name:<28} {rule['seconds']:>9.4f} {rule['hits']:>8} {rule['calls']:>9}", file=file)
+        if profile['slowest_files']:
+            print(f"\n  Slowest files:", file=file)
+            for entry in profile['slowest_files'][:top]:
+                print(f"  {entry['seconds']:>9.4f}s {entry['lines']:>7} lines  {entry['file']}", file=file)
+
+
+def finish(profiler: Profiler, path: str, top: int = 10, file=sys.stdout) -> None:
+    """Write the profile to ``path`` and print its summary"""
+    profile = profiler.write(path)
+    Profiler.print_summary(profile, top, file)
+    print(f"Profile saved to: {path}", file=file)
+
+
+class ProfiledRuleEngine(RuleEngine):
+    """RuleEngine that charges each rule's search time and hits to a profiler"""
+
+    def __init__(self, rules: Dict[str, Dict], profiler: Profiler, **kwargs):
+        super().__init__(rules, **kwargs)
+        self.profiler = profiler
+
+    def match_line(self, line: str) -> List[str]:
+        fired = []
+        clock = time.perf_counter
+        for name, pattern in self.compiled:
+            start = clock()
+            hit = pattern.search(line) is not None
+            self.profiler.rule(name, clock() - start, hit)
+            if hit:
+                fired.append(name)
+        return fired
+
+    def candidate_lines(self, content: str) -> Iterator[int]:
+        lines = super().candidate_lines(content)
+        while True:
+            start = time.perf_counter()
+            index = next(lines, None)
+            self.profiler.rule(PREFILTER, time.perf_counter() - start, index is not None)
+            if index is None:
+                return
+            yield index
+
+
+def rule_engine(rules: Dict[str, Dict], profiler: Profiler) -> RuleEngine:
+    """A plain RuleEngine, or a profiled one when profiling is on"""
+    return ProfiledRuleEngine(rules, profiler) if profiler.enabled else RuleEngine(rules)
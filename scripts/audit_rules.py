@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Audit Rules for BARQ Platform
+Rule tables shared by backend_audit and placeholder_sweep, and a scan engine
+that compiles them once and finds candidate lines in a single pass per file
+"""
+
+import hashlib
+import json
+import re
+from typing import Dict, Iterator, List, Tuple
+
+NOT_IMPLEMENTED = r'(NotImplementedException|throw new NotImplementedException|NotImplemented)'
+TASK_FROM_RESULT = r'Task\.FromResult\('
+
+BACKEND_RULES = {
+    'NotImplemented': {
+        'regex': NOT_IMPLEMENTED,
+        'literals': ['notimplemented'],
+        'severity': 'High',
+        'description': 'NotImplemented exception or placeholder'
+    },
+    'TODO': {
+        'regex': r'(TODO|FIXME|HACK|XXX)',
+        'literals': ['todo', 'fixme', 'hack', 'xxx'],
+        'severity': 'Medium',
+        'description': 'TODO/FIXME comment'
+    },
+    'Mock': {
+        'regex': r'(Mock\w+|\.Mock|MockService|FakeService)',
+        'literals': ['mock', 'fakeservice'],
+        'severity': 'High',
+        'description': 'Mock or fake service in production code'
+    },
+    'HttpClient': {
+        'regex': r'new HttpClient\(\)',
+        'literals': ['new httpclient()'],
+        'severity': 'Medium',
+        'description': 'Direct HttpClient instantiation (should use IHttpClientFactory)'
+    },
+    'FromSqlRaw': {
+        'regex': r'FromSqlRaw\(',
+        'literals': ['fromsqlraw('],
+        'severity': 'Medium',
+        'description': 'Raw SQL query (potential SQL injection risk)'
+    },
+    'TenantGap': {
+        # No line regex: found by csharp_analyzer.TenantGapAnalyzer over whole statements
+        'severity': 'High',
+        'description': 'Query without tenant filtering'
+    },
+    'TaskFromResult': {
+        'regex': TASK_FROM_RESULT,
+        'literals': ['task.fromresult('],
+        'severity': 'Medium',
+        'description': 'Task.FromResult placeholder implementation'
+    },
+    'EmptyMethod': {
+        'regex': r'{\s*return\s*[^;]*;\s*}',
+        'literals': ['return'],
+        'severity': 'Medium',
+        'description': 'Potentially empty method implementation'
+    },
+    'Placeholder': {
+        'regex': r'(placeholder|stub|dummy|temp)',
+        'literals': ['placeholder', 'stub', 'dummy', 'temp'],
+        'severity': 'Medium',
+        'description': 'Placeholder text in code'
+    }
+}
+
+# Rules without a regex are found by csharp_analyzer.PerformanceAnalyzer
+PERFORMANCE_RULES = {
+    'AwaitInLoop': {
+        'severity': 'High',
+        'category': 'Performance',
+        'description': 'Awaited query inside a loop (N+1 round trips)'
+    },
+    'SyncOverAsync': {
+        'severity': 'High',
+        'category': 'Performance',
+        'description': 'Blocking on a task with .Result, .Wait() or GetAwaiter().GetResult()'
+    },
+    'EarlyMaterialization': {
+        'severity': 'Medium',
+        'category': 'Performance',
+        'description': 'ToList()/AsEnumerable() before Where/Select loads the whole set into memory'
+    },
+    'UnboundedQuery': {
+        'severity': 'Medium',
+        'category': 'Performance',
+        'description': 'Query materialized without Take or paging'
+    },
+    'MissingAsNoTracking': {
+        'severity': 'Low',
+        'category': 'Performance',
+        'description': 'Read-only query without AsNoTracking'
+    },
+    'PerRequestAllocation': {
+        # Shared-by-design types created per call; static initializers are fine. A bare
+        # new HttpClient() is left to the HttpClient rule above so it is not reported twice
+        'regex': r'^(?!.*\bstatic\b).*new\s+(HttpClient\((?!\s*\))|HttpClientHandler\b|SocketsHttpHandler\b|JsonSerializerOptions\b)',
+        'literals': ['httpclient(', 'httpclienthandler', 'socketshttphandler', 'jsonserializeroptions'],
+        'severity': 'Medium',
+        'category': 'Performance',
+        'description': 'Per-call allocation of a type meant to be created once and shared '
+                       '(new HttpClient() is reported as HttpClient)'
+    }
+}
+
+BACKEND_RULES.update(PERFORMANCE_RULES)
+
+PLACEHOLDER_RULES = {
+    'NotImplemented': {
+        'regex': NOT_IMPLEMENTED,
+        'literals': ['notimplemented'],
+        'severity': 'High'
+    },
+    'TODO': {
+        'regex': r'(TODO|FIXME|HACK|XXX|BUG)',
+        'literals': ['todo', 'fixme', 'hack', 'xxx', 'bug'],
+        'severity': 'Medium'
+    },
+    'Mock': {
+        'regex': r'(Mock\w+|\.Mock|MockService|FakeService|DummyService|TestService)',
+        'literals': ['mock', 'fakeservice', 'dummyservice', 'testservice'],
+        'severity': 'High'
+    },
+    'Placeholder': {
+        'regex': r'(placeholder|stub|dummy|temp|temporary|sample)',
+        'literals': ['placeholder', 'stub', 'dummy', 'temp', 'sample'],
+        'severity': 'Medium'
+    },
+    'TaskFromResult': {
+        'regex': TASK_FROM_RESULT,
+        'literals': ['task.fromresult('],
+        'severity': 'Medium'
+    },
+    'EmptyImplementation': {
+        'regex': r'(return\s+null;|return\s+default;|return\s+new\s+\w+\(\);)',
+        'literals': ['return'],
+        'severity': 'Medium'
+    },
+    'ConsoleLog': {
+        'regex': r'console\.(log|warn|error|debug)',
+        'literals': ['console.'],
+        'severity': 'Low'
+    },
+    'DebugCode': {
+        'regex': r'(System\.Diagnostics\.Debug|Console\.WriteLine|console\.log)',
+        'literals': ['system.diagnostics.debug', 'console.writeline', 'console.log'],
+        'severity': 'Low'
+    }
+}
+
+
+class RuleEngine:
+    """Matches a rule table against file contents.
+
+    Each rule may list ``literals``: lower-case substrings, one of which
+    every match of the rule contains. The literals of all rules are joined
+    into one case-sensitive alternation searched once over the case-folded
+    file, and only the lines it hits are checked against the full rules.
+    Rules without literals are checked on every line. The result equals
+    running every rule on every line, in rule order. Rules without a
+    ``regex`` are left to other analyzers.
+    """
+
+    def __init__(self, rules: Dict[str, Dict], flags: int = re.IGNORECASE):
+        self.rules = rules
+        line_rules = {name: rule for name, rule in rules.items() if 'regex' in rule}
+        self.compiled = [(name, re.compile(rule['regex'], flags)) for name, rule in line_rules.items()]
+        literals = {literal.casefold() for rule in line_rules.values() for literal in rule.get('literals', [])}
+        self.unanchored = any(not rule.get('literals') for rule in line_rules.values())
+        self.prefilter = re.compile('|'.join(re.escape(literal) for literal in sorted(literals, key=len, reverse=True)))
+        self.fingerprint = hashlib.sha1(json.dumps(rules, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def match_line(self, line: str) -> List[str]:
+        """Names of the rules matching a single line"""
+        return [name for name, pattern in self.compiled if pattern.search(line)]
+
+    def candidate_lines(self, content: str) -> Iterator[int]:
+        """Zero-based indexes of the lines containing any rule literal"""
+        # Case folding may change line lengths but never the number of newlines
+        folded = content.casefold()
+        search = self.prefilter.search
+        index = 0
+        cursor = 0
+        position = 0
+        while True:
+            match = search(folded, position)
+            if match is None:
+                return
+            index += folded.count('\n', cursor, match.start())
+            cursor = match.start()
+            yield index
+            position = folded.find('\n', cursor) + 1
+            if position == 0:
+                return
+
+    def scan(self, content: str) -> Iterator[Tuple[int, str, List[str]]]:
+        """Yield (line number, line, fired rule names) for each line with a match"""
+        lines = content.split('\n')
+        indexes = range(len(lines)) if self.unanchored else self.candidate_lines(content)
+        for index in indexes:
+            line = lines[index]
+            fired = self.match_line(line)
+            if fired:
+                yield index + 1, line, fired
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Source Tree Walker for BARQ Platform audits
+One os.scandir traversal that prunes excluded and .gitignore'd directories
+before descending and yields source files by extension
+"""
+
+import multiprocessing
+import os
+import re
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_EXCLUDES = ('node_modules', 'bin', 'obj', '.git', 'dist', 'build')
+
+
+def _translate(pattern: str) -> str:
+    """Regex for a gitignore glob: '*' and '?' stop at '/', '**' crosses it"""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith('**/', i):
+            parts.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            parts.append('.*')
+            i += 2
+            continue
+        if char == '*':
+            parts.append('[^/]*')
+        elif char == '?':
+            parts.append('[^/]')
+        elif char == '[':
+            end = pattern.find(']', i + 1)
+            if end < 0:
+                parts.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                parts.append(f'[{body}]')
+                i = end
+        elif char == '\\' and i + 1 < len(pattern):
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return ''.join(parts)
+
+
+class IgnoreRules:
+    """Patterns from one .gitignore file, matched relative to its directory"""
+
+    def __init__(self, lines: Iterable[str], base: str = ''):
+        self.base = base
+        self.patterns: List[Tuple[re.Pattern, bool, bool]] = []
+        for line in lines:
+            line = line.rstrip('\n').rstrip()
+            if not line or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            # A slash anywhere but the end anchors the pattern to this directory
+            anchored = '/' in line
+            line = line.lstrip('/')
+            prefix = '' if anchored else '(?:.*/)?'
+            self.patterns.append((re.compile(f'^{prefix}{_translate(line)}$'), negate, dir_only))
+
+    @classmethod
+    def from_file(cls, path: str, base: str = '') -> Optional['IgnoreRules']:
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                rules = cls(f, base)
+        except OSError:
+            return None
+        return rules if rules.patterns else None
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """True if ignored, False if re-included by a '!' pattern, None if no pattern applies"""
+        if self.base:
+            if not rel_path.startswith(self.base + '/'):
+                return None
+            rel_path = rel_path[len(self.base) + 1:]
+        result = None
+        for pattern, negate, dir_only in self.patterns:
+            if dir_only and not is_dir:
+                continue
+            if pattern.match(rel_path):
+                result = not negate
+        return result
+
+
+def _is_ignored(rules: List[IgnoreRules], rel_path: str, is_dir: bool) -> bool:
+    ignored = False
+    for rule in rules:
+        result = rule.match(rel_path, is_dir)
+        if result is not None:
+            ignored = result
+    return ignored
+
+
+def _ancestor_ignores(root: str) -> Tuple[str, List[IgnoreRules]]:
+    """The enclosing repository root and the .gitignore files between it and ``root``"""
+    root = os.path.abspath(root)
+    top = root
+    while not os.path.exists(os.path.join(top, '.git')):
+        parent = os.path.dirname(top)
+        if parent == top:
+            return root, []
+        top = parent
+    rules = []
+    directory = top
+    relative = os.path.relpath(root, top)
+    parts = [] if relative == '.' else relative.split(os.sep)
+    for depth in range(len(parts)):
+        rule = IgnoreRules.from_file(os.path.join(directory, '.gitignore'), '/'.join(parts[:depth]))
+        if rule:
+            rules.append(rule)
+        directory = os.path.join(directory, parts[depth])
+    return top, rules
+
+
+def walk_files(root: str, extensions: Optional[Iterable[str]] = None,
+               excludes: Iterable[str] = DEFAULT_EXCLUDES, gitignore: bool = True,
+               prune: Optional[Callable[[str], bool]] = None) -> Iterator[Tuple[str, Path]]:
+    """Yield (extension, path) for files under ``root``, depth-first in name order.
+
+    Directories named in ``excludes`` (case-insensitive), rejected by
+    ``prune`` or ignored by a .gitignore are never entered. ``extensions``
+    are matched without the dot; None yields every file.
+    """
+    wanted = {ext.lower().lstrip('.') for ext in extensions} if extensions is not None else None
+    excluded = {name.lower() for name in excludes}
+    top, inherited = _ancestor_ignores(root) if gitignore else (os.path.abspath(root), [])
+    relative = os.path.relpath(os.path.abspath(root), top).replace(os.sep, '/')
+
+    # Paths keep the caller's form of ``root``; ignore rules see them relative to the repository
+    stack = [(root, '' if relative == '.' else relative, inherited)]
+    while stack:
+        directory, rel_dir, rules = stack.pop()
+        if gitignore:
+            own = IgnoreRules.from_file(os.path.join(directory, '.gitignore'), rel_dir)
+            if own:
+                rules = rules + [own]
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+
+        subdirectories = []
+        for entry in entries:
+            rel_path = f'{rel_dir}/{entry.name}' if rel_dir else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name.lower() in excluded or (prune and prune(entry.name)):
+                    continue
+                if rules and _is_ignored(rules, rel_path, True):
+                    continue
+                subdirectories.append((entry.path, rel_path))
+            elif entry.is_file():
+                ext = entry.name.rpartition('.')[2].lower() if '.' in entry.name else ''
+                if wanted is not None and ext not in wanted:
+                    continue
+                if rules and _is_ignored(rules, rel_path, False):
+                    continue
+                yield ext, Path(entry.path)
+        # Push in reverse so subdirectories are visited in name order
+        for path, rel_path in reversed(subdirectories):
+            stack.append((path, rel_path, rules))
+
+
+class SourceTree:
+    """File listings and decoded contents shared by audits running in one process.
+
+    Each declared root (or, failing that, each requested root) is walked
+    once for every extension; listings for a root below it are filtered
+    from that walk, with ``prune`` applied to the directories under the
+    requested root, so they equal a fresh ``walk_files`` call. With
+    ``shared=False`` nothing is kept and every call goes to disk.
+
+    Forked scan workers inherit the decoded files; their disk reads and
+    memory hits are counted in shared memory, so ``disk_reads`` and
+    ``memory_reads`` cover the whole run.
+    """
+
+    def __init__(self, roots: Iterable[str] = (), shared: bool = True):
+        self.shared = shared
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.walks: Dict[str, List[Tuple[str, str]]] = {}
+        self.contents: Dict[str, str] = {}
+        self._disk_reads = multiprocessing.Value('q', 0) if shared else None
+        self._memory_reads = multiprocessing.Value('q', 0) if shared else None
+
+    def __getstate__(self) -> Dict:
+        # Spawned (not forked) workers read from disk rather than receiving every cached file
+        state = dict(self.__dict__)
+        state['contents'] = {}
+        return state
+
+    @property
+    def disk_reads(self) -> int:
+        return self._disk_reads.value if self.shared else 0
+
+    @property
+    def memory_reads(self) -> int:
+        return self._memory_reads.value if self.shared else 0
+
+    @staticmethod
+    def _count(counter) -> None:
+        with counter.get_lock():
+            counter.value += 1
+
+    def preload(self, paths: Iterable[Path]) -> None:
+        """Decode ``paths`` now, so forked workers inherit them instead of reading them
+        privately; unreadable files are left for the scan to report"""
+        if not self.shared:
+            return
+        for path in paths:
+            try:
+                self.read(path)
+            except (OSError, UnicodeDecodeError):
+                pass
+
+    def release(self) -> None:
+        """Drop the decoded files once no later audit will read them"""
+        self.contents.clear()
+
+    def _walk(self, top: str) -> List[Tuple[str, str]]:
+        if top not in self.walks:
+            self.walks[top] = [(ext, os.path.relpath(path, top).replace(os.sep, '/'))
+                               for ext, path in walk_files(top)]
+        return self.walks[top]
+
+    def files(self, root: str, extensions: Optional[Iterable[str]] = None,
+              prune: Optional[Callable[[str], bool]] = None) -> Iterator[Tuple[str, Path]]:
+        """Same (extension, path) sequence as ``walk_files(root, extensions, prune=prune)``"""
+        if not self.shared:
+            yield from walk_files(root, extensions, prune=prune)
+            return
+        wanted = {ext.lower().lstrip('.') for ext in extensions} if extensions is not None else None
+        target = os.path.abspath(root)
+        top = next((r for r in self.roots if target == r or target.startswith(r + os.sep)), target)
+        prefix = '' if top == target else os.path.relpath(target, top).replace(os.sep, '/') + '/'
+        for ext, rel_path in self._walk(top):
+            if not rel_path.startswith(prefix) or (wanted is not None and ext not in wanted):
+                continue
+            rel_path = rel_path[len(prefix):]
+            if prune and any(prune(name) for name in rel_path.split('/')[:-1]):
+                continue
+            yield ext, Path(root) / rel_path
+
+    def read(self, path: Path) -> str:
+        """Decoded UTF-8 contents; read errors propagate and are not cached"""
+        if not self.shared:
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read()
+        key = os.path.abspath(path)
+        content = self.contents.get(key)
+        if content is None:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = self.contents[key] = f.read()
+            self._count(self._disk_reads)
+        else:
+            self._count(self._memory_reads)
+        return content
@@ -2,163 +2,326 @@
 """
 Backend Static Code Audit Script for BARQ Platform
 Scans for NotImplemented, TODO, mocks, HttpClient, FromSqlRaw, tenant gaps
+and EF Core / async performance anti-patterns
 """
 
 import os
-import re
-import csv
 import argparse
 import sys
+import time
+from collections import Counter
+from functools import partial
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
+from audit_rules import BACKEND_RULES
+from audit_walk import SourceTree
+from csharp_analyzer import EntityModel, PerformanceAnalyzer, TenantGapAnalyzer, tokenize
+import csharp_analyzer
+from audit_cache import ScanCache, code_fingerprint, scan_with_cache
+from audit_diff import ChangeSet, read_report, merge_findings, diff_findings, write_delta, print_delta
+from report_writer import FORMATS, ReportWriter
+from audit_profile import Profiler, finish, rule_engine
+
+FIELDNAMES = ['file', 'line', 'severity', 'type', 'description', 'code']
+
+def audit_file(file_path: Path, src_dir: Path, engine, tenant_gaps: TenantGapAnalyzer,
+               performance: PerformanceAnalyzer, source: SourceTree, profiler: Profiler) -> List[Dict]:
+    """Scan a single file for issues.
+
+    A module-level function, so parallel scans ship only the engine, the
+    analyzers and the source tree to each worker, not the whole auditor.
+    """
+    issues = []
+    start = time.perf_counter()
+    content = ''
+    
+    try:
+        with profiler.phase('read'):
+            content = source.read(file_path)
+            
+        with profiler.phase('match'):
+            for line_num, line, fired in engine.scan(content):
+                for pattern_name in fired:
+                    pattern_info = engine.rules[pattern_name]
+                    issues.append({
+                        'file': str(file_path.relative_to(src_dir)),
+                        'line': line_num,
+                        'severity': pattern_info['severity'],
+                        'type': pattern_name,
+                        'description': pattern_info['description'],
+                        'code': line.strip()
+                    })
+        
+        with profiler.phase('analyze'):
+            tokens = _timed(profiler, 'tokenize', tokenize, content)
+            findings = [(line_num, 'TenantGap')
+                        for line_num in _timed(profiler, 'TenantGapAnalyzer', tenant_gaps.analyze, tokens)]
+            findings.extend(_timed(profiler, 'PerformanceAnalyzer', performance.analyze, tokens))
+        if findings:
+            lines = content.split('\n')
+            for line_num, pattern_name in findings:
+                pattern_info = engine.rules[pattern_name]
+                issues.append({
+                    'file': str(file_path.relative_to(src_dir)),
+                    'line': line_num,
+                    'severity': pattern_info['severity'],
+                    'type': pattern_name,
+                    'description': pattern_info['description'],
+                    'code': lines[line_num - 1].strip()
+                })
+                    
+    except Exception as e:
+        issues.append({
+            'file': str(file_path.relative_to(src_dir)),
+            'line': 0,
+            'severity': 'Low',
+            'type': 'ScanError',
+            'description': f'Failed to scan file: {str(e)}',
+            'code': ''
+        })
+        
+    profiler.file(file_path, time.perf_counter() - start, content.count('\n') + 1)
+    return issues
+
+def _timed(profiler: Profiler, name: str, analyze, argument):
+    """Run one analyzer, charging its time and result count to the profiler"""
+    if not profiler.enabled:
+        return analyze(argument)
+    start = time.perf_counter()
+    result = analyze(argument)
+    profiler.rule(name, time.perf_counter() - start, 0 if name == 'tokenize' else len(result))
+    return result
+
+def entity_cache_path(cache_file: str) -> str:
+    """Per-file entity facts live next to the findings cache: x.json.gz -> x.entities.json.gz"""
+    base, gz = (cache_file[:-3], '.gz') if cache_file.endswith('.gz') else (cache_file, '')
+    root, ext = os.path.splitext(base)
+    return f'{root}.entities{ext or ".json"}{gz}'
 
 class BackendAuditor:
-    def __init__(self, src_dir: str):
+    def __init__(self, src_dir: str, jobs: int = 1, cache_file: Optional[str] = None,
+                 report: Optional[ReportWriter] = None, profiler: Optional[Profiler] = None,
+                 source: Optional[SourceTree] = None):
         self.src_dir = Path(src_dir)
+        self.source = source or SourceTree(shared=False)
+        self.jobs = jobs
         self.issues = []
-        
-    def scan_file(self, file_path: Path) -> List[Dict]:
-        """Scan a single file for issues"""
-        issues = []
-        
+        self.report = report
+        self.streamed = Counter()
+        self.scanned_files = 0
+        self.dependents: List[Path] = []
+        self.profiler = profiler or Profiler('backend_audit', enabled=False)
+        self.engine = rule_engine(BACKEND_RULES, self.profiler)
+        # Tenant gaps depend on entities declared anywhere in the tree. The model is filled in
+        # only once a file has to be analyzed or a cached result has to be checked against it
+        self.model = EntityModel()
+        self.tenant_gaps = TenantGapAnalyzer(self.model)
+        self.performance = PerformanceAnalyzer(self.model)
+        code = code_fingerprint(__file__, csharp_analyzer.__file__)
+        self.cache = None
+        self.model_cache = None
+        if cache_file:
+            # Cached findings record the entities they looked up (see references/state), so
+            # an entity edit re-scans only the files that query it
+            self.cache = ScanCache(cache_file, f'backend_audit:{self.engine.fingerprint}:{code}', inputs=self)
+            self.model_cache = ScanCache(entity_cache_path(cache_file), f'entity_model:{code}')
+    
+    def load_model(self) -> None:
+        """Fill the entity model from every C# file, reusing cached per-file facts"""
+        if self.model.loaded:
+            return
+        with self.profiler.phase('model'):
+            self.model.load((path for _, path in self.source.files(self.src_dir, ['cs'])), self.source.read,
+                            self.model_cache)
+    
+    def prepare(self, paths: List[Path]) -> None:
+        """Before scanning: fill the model and, for worker processes, the shared file cache"""
+        self.load_model()
+        if self.jobs != 1:
+            self.source.preload(paths)
+    
+    def _read(self, path: Path) -> Optional[str]:
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                lines = content.split('\n')
-                
-            patterns = {
-                'NotImplemented': {
-                    'regex': r'(NotImplementedException|throw new NotImplementedException|NotImplemented)',
-                    'severity': 'High',
-                    'description': 'NotImplemented exception or placeholder'
-                },
-                'TODO': {
-                    'regex': r'(TODO|FIXME|HACK|XXX)',
-                    'severity': 'Medium',
-                    'description': 'TODO/FIXME comment'
-                },
-                'Mock': {
-                    'regex': r'(Mock\w+|\.Mock|MockService|FakeService)',
-                    'severity': 'High',
-                    'description': 'Mock or fake service in production code'
-                },
-                'HttpClient': {
-                    'regex': r'new HttpClient\(\)',
-                    'severity': 'Medium',
-                    'description': 'Direct HttpClient instantiation (should use IHttpClientFactory)'
-                },
-                'FromSqlRaw': {
-                    'regex': r'FromSqlRaw\(',
-                    'severity': 'Medium',
-                    'description': 'Raw SQL query (potential SQL injection risk)'
-                },
-                'TenantGap': {
-                    'regex': r'\.Where\([^)]*(?<!TenantId\s*==\s*[^)]*)\s*==\s*[^)]*\)(?!.*TenantId)',
-                    'severity': 'High',
-                    'description': 'Query without tenant filtering'
-                },
-                'TaskFromResult': {
-                    'regex': r'Task\.FromResult\(',
-                    'severity': 'Medium',
-                    'description': 'Task.FromResult placeholder implementation'
-                },
-                'EmptyMethod': {
-                    'regex': r'{\s*return\s*[^;]*;\s*}',
-                    'severity': 'Medium',
-                    'description': 'Potentially empty method implementation'
-                },
-                'Placeholder': {
-                    'regex': r'(placeholder|stub|dummy|temp)',
-                    'severity': 'Medium',
-                    'description': 'Placeholder text in code'
-                }
-            }
-            
-            for line_num, line in enumerate(lines, 1):
-                for pattern_name, pattern_info in patterns.items():
-                    if re.search(pattern_info['regex'], line, re.IGNORECASE):
-                        issues.append({
-                            'file': str(file_path.relative_to(self.src_dir)),
-                            'line': line_num,
-                            'severity': pattern_info['severity'],
-                            'type': pattern_name,
-                            'description': pattern_info['description'],
-                            'code': line.strip()
-                        })
-                        
-        except Exception as e:
-            issues.append({
-                'file': str(file_path.relative_to(self.src_dir)),
-                'line': 0,
-                'severity': 'Low',
-                'type': 'ScanError',
-                'description': f'Failed to scan file: {str(e)}',
-                'code': ''
-            })
-            
-        return issues
+            return self.source.read(path)
+        except (OSError, UnicodeDecodeError):
+            return None
     
-    def scan_directory(self) -> None:
-        """Scan all C# files in the directory"""
-        cs_files = list(self.src_dir.rglob('*.cs'))
+    def model_dependents(self, changes: ChangeSet, paths: List[Path]) -> List[Path]:
+        """Unchanged ``paths`` whose tenant analysis differs between the merge base's entity
+        model and this tree's: dropping a query filter or adding a TenantId opens gaps in
+        files the change never touched"""
+        src_dir = self.src_dir.resolve()
+        edited = {path for path in changes.changed | changes.deleted
+                  if path.suffix == '.cs' and src_dir in path.parents}
+        
+        def facts(source: Optional[str]) -> Optional[Dict]:
+            return EntityModel.facts(source) if source is not None else None
+        before = {path: facts(changes.base_content(path)) for path in edited}
+        if all(before[path] == facts(self._read(path)) for path in edited):
+            return []
         
-        for file_path in cs_files:
-            if '/test' in str(file_path).lower() or 'test' in file_path.name.lower():
+        self.load_model()
+        with self.profiler.phase('model'):
+            model_paths = [path for _, path in self.source.files(self.src_dir, ['cs'])]
+            base_model = EntityModel().load([path for path in model_paths if path.resolve() not in edited],
+                                            self.source.read, self.model_cache)
+            for base_facts in before.values():
+                if base_facts is not None:
+                    base_model.add_facts(base_facts)
+            base_model.resolve()
+        
+        dependents = []
+        for path in paths:
+            if path.resolve() in edited:
                 continue
-                
-            file_issues = self.scan_file(file_path)
-            self.issues.extend(file_issues)
+            content = self._read(path)
+            references = EntityModel.references(content) if content is not None else None
+            if references and any(references.values()) \
+                    and self.model.state(references) != base_model.state(references):
+                dependents.append(path)
+        return dependents
+    
+    def references(self, path: Path) -> Dict[str, List[str]]:
+        return EntityModel.references(self.source.read(path))
+    
+    def state(self, references: Dict[str, List[str]]) -> List[List]:
+        if not any(references.values()):
+            return []
+        self.load_model()
+        return self.model.state(references)
+        
+    def scan_directory(self, changes: Optional[ChangeSet] = None) -> None:
+        """Scan all C# files in the directory, or only those in ``changes``"""
+        # Test directories are pruned before descending; test files are still filtered by name
+        cs_files = self.source.files(self.src_dir, ['cs'], prune=lambda name: name.lower().startswith('test'))
+        
+        with self.profiler.phase('walk'):
+            paths = [file_path for _, file_path in cs_files
+                     if not ('/test' in str(file_path).lower() or 'test' in file_path.name.lower())]
+        if changes is not None:
+            selected = set(changes.select(paths))
+            self.dependents = self.model_dependents(changes, paths)
+            wanted = selected.union(self.dependents)
+            paths = [path for path in paths if path in wanted]
+        self.scanned_files = len(paths)
+        
+        scan = partial(audit_file, src_dir=self.src_dir, engine=self.engine, tenant_gaps=self.tenant_gaps,
+                       performance=self.performance, source=self.source, profiler=self.profiler)
+        for file_issues in scan_with_cache(scan, paths, self.jobs, self.cache, self.prepare):
+            self.add_issues(file_issues)
+        if self.cache is not None:
+            with self.profiler.phase('write'):
+                self.cache.save(prune=changes is None)
+                if self.model.loaded:
+                    self.model_cache.save()
+    
+    def add_issues(self, issues: List[Dict]) -> None:
+        """Hand findings to the streaming report if there is one, else keep them"""
+        if self.report is None:
+            self.issues.extend(issues)
+            return
+        for issue in issues:
+            self.streamed[issue['severity']] += 1
+        self.report.add_many(issues)
     
     def generate_report(self, output_file: str) -> None:
         """Generate CSV report"""
-        with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['file', 'line', 'severity', 'type', 'description', 'code']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            writer.writeheader()
-            order = {'High':0,'Medium':1,'Low':2}
-            for issue in sorted(self.issues, key=lambda x: (order.get(x['severity'],3), x['file'], x['line'])):
-                writer.writerow(issue)
+        with ReportWriter(output_file, FIELDNAMES, 'csv') as report:
+            report.add_many(self.issues)
     
     def get_summary(self) -> Dict[str, int]:
         """Get summary statistics"""
-        summary = {'High': 0, 'Medium': 0, 'Low': 0}
+        summary = {'High': self.streamed['High'], 'Medium': self.streamed['Medium'], 'Low': self.streamed['Low']}
         for issue in self.issues:
             summary[issue['severity']] += 1
         return summary
 
-def main():
+def main(argv: Optional[List[str]] = None, source: Optional[SourceTree] = None):
     parser = argparse.ArgumentParser(description='Backend Static Code Audit')
     parser.add_argument('--src', required=True, help='Source directory to scan')
-    parser.add_argument('--out', required=True, help='Output CSV file')
+    parser.add_argument('--out', required=True, help='Output report (.csv, .jsonl or .sarif, .gz for gzip)')
+    parser.add_argument('--format', choices=FORMATS, help='Report format (default: from the --out extension)')
+    parser.add_argument('--order', choices=['severity', 'scan'], default='severity',
+                       help='Sort by severity/file/line, or write findings as soon as they are found')
     parser.add_argument('--fail-on', choices=['High', 'Medium', 'Low'], 
                        help='Fail if issues of this severity or higher are found')
+    parser.add_argument('--changed-since', metavar='REF',
+                       help='Scan only files changed since REF and merge with --baseline-report')
+    parser.add_argument('--baseline-report', help='Full audit CSV for the base branch (used with --changed-since)')
+    parser.add_argument('--delta-out', help='CSV of new and fixed findings (used with --changed-since)')
+    parser.add_argument('--cache', help='Incremental scan cache file (JSON, .gz for gzip)')
+    parser.add_argument('--jobs', type=int, default=1,
+                       help='Scan files in this many processes (0 = one per CPU)')
+    parser.add_argument('--profile', metavar='FILE',
+                       help='Write a JSON profile of phase, rule and per-file costs (scans serially)')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     if not os.path.exists(args.src):
         print(f"Error: Source directory {args.src} does not exist")
         sys.exit(1)
     
-    auditor = BackendAuditor(args.src)
-    auditor.scan_directory()
-    auditor.generate_report(args.out)
+    changes = None
+    if args.changed_since:
+        if not args.baseline_report or not os.path.exists(args.baseline_report):
+            print(f"Error: --changed-since needs an existing --baseline-report")
+            sys.exit(1)
+        try:
+            changes = ChangeSet(args.changed_since)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+    
+    profiler = Profiler('backend_audit', enabled=bool(args.profile))
+    if args.profile and args.jobs != 1:
+        # Worker processes would keep their timings to themselves
+        print(f"Note: --profile scans in a single process")
+        args.jobs = 1
+    
+    report = ReportWriter(args.out, FIELDNAMES, args.format, args.order, 'backend_audit', BACKEND_RULES)
+    # Full scans stream findings straight into the report; PR scans merge with the baseline first
+    auditor = BackendAuditor(args.src, args.jobs, args.cache, report if changes is None else None, profiler, source)
+    auditor.scan_directory(changes)
+    
+    if changes is not None:
+        baseline = read_report(args.baseline_report)
+        touched = changes.touched(auditor.src_dir)
+        # Files re-scanned because the entity model changed under them replace their baseline rows too
+        touched.update(path.relative_to(auditor.src_dir).as_posix() for path in auditor.dependents)
+        if auditor.dependents:
+            print(f"Entity model changed: also re-scanned {len(auditor.dependents)} files that query affected entities")
+        new, fixed = diff_findings(baseline, auditor.issues, touched)
+        auditor.issues = merge_findings(baseline, auditor.issues, touched)
+        report.add_many(auditor.issues)
+    with profiler.phase('write'):
+        report.close()
     
     summary = auditor.get_summary()
     print(f"Backend Audit Complete:")
     print(f"  High: {summary['High']}")
     print(f"  Medium: {summary['Medium']}")
     print(f"  Low: {summary['Low']}")
-    print(f"  Total: {len(auditor.issues)}")
+    print(f"  Total: {sum(summary.values())}")
+    if auditor.cache is not None:
+        print(f"  Cache: {auditor.cache.hits} unchanged, {auditor.cache.misses} scanned")
     print(f"Report saved to: {args.out}")
+    if changes is not None:
+        print_delta(args.changed_since, auditor.scanned_files, new, fixed)
+        if args.delta_out:
+            write_delta(args.delta_out, new, fixed, FIELDNAMES)
+            print(f"Delta saved to: {args.delta_out}")
+    if args.profile:
+        finish(profiler, args.profile)
     
     if args.fail_on:
         severity_levels = {'High': 3, 'Medium': 2, 'Low': 1}
         fail_level = severity_levels[args.fail_on]
         
-        for issue in auditor.issues:
-            if severity_levels[issue['severity']] >= fail_level:
-                print(f"FAIL: Found {issue['severity']} severity issue")
+        # Outside PR mode every finding counts as new for the --fail-on gate
+        new_counts = Counter(issue['severity'] for issue in new) if changes is not None else summary
+        for severity in ('High', 'Medium', 'Low'):
+            if severity_levels[severity] >= fail_level and new_counts[severity]:
+                print(f"FAIL: Found {'new ' if changes is not None else ''}{severity} severity issue")
                 sys.exit(1)
     
     sys.exit(0)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Unified Audit Runner for BARQ Platform
+Runs any subset of controller_routes, api_probe, placeholder_sweep,
+backend_audit and hotspot_report in one process, sharing one directory walk and one decoded
+file cache; each tool keeps its own arguments and outputs
+"""
+
+import importlib
+import os
+import sys
+import time
+from typing import List, Optional, Tuple
+
+from audit_walk import SourceTree
+
+# Tool name -> module; modules are imported only when selected, so requests loads only for probing
+TOOLS = {
+    'routes': 'controller_routes',
+    'probe': 'api_probe',
+    'placeholders': 'placeholder_sweep',
+    'backend': 'backend_audit',
+    'hotspots': 'hotspot_report',
+}
+# Tools whose main() accepts the shared SourceTree
+SOURCE_TOOLS = ('routes', 'placeholders', 'backend', 'hotspots')
+SEPARATOR = '--'
+DEFAULT_ROOTS = ('Backend', 'Frontend')
+
+USAGE = f"""usage: barq_audit.py [--root DIR]... TOOL [ARGS...] [{SEPARATOR} TOOL [ARGS...]]...
+
+Tools run in the given order with their usual command-line arguments:
+  routes        controller_routes.py
+  probe         api_probe.py
+  placeholders  placeholder_sweep.py
+  backend       backend_audit.py
+  hotspots      hotspot_report.py
+
+--root DIR declares a directory walked once for every tool that scans
+below it (default: {', '.join(DEFAULT_ROOTS)} where present).
+Every tool runs even if an earlier one fails; the exit status is the
+first non-zero one.
+
+example:
+  barq_audit.py routes Backend/src/BARQ.API/Controllers --out controller_routes.json \\
+    {SEPARATOR} placeholders Backend Frontend audit/audit_placeholders.csv \\
+    {SEPARATOR} backend --src Backend --out audit/audit_backend.csv --fail-on High"""
+
+
+def parse_command_line(argv: List[str]) -> Tuple[List[str], List[Tuple[str, List[str]]]]:
+    """Split argv into the declared roots and (tool, arguments) segments"""
+    roots = []
+    index = 0
+    while index < len(argv) and argv[index] == '--root':
+        if index + 1 >= len(argv):
+            raise ValueError("--root needs a directory")
+        roots.append(argv[index + 1])
+        index += 2
+
+    segments = []
+    current: Optional[List[str]] = None
+    for arg in argv[index:]:
+        if arg == SEPARATOR:
+            current = None
+        elif current is None:
+            if arg not in TOOLS:
+                raise ValueError(f"unknown tool '{arg}' (expected one of: {', '.join(TOOLS)})")
+            current = []
+            segments.append((arg, current))
+        else:
+            current.append(arg)
+    if not segments:
+        raise ValueError("no tool selected")
+    return roots, segments
+
+
+def run_tool(tool: str, args: List[str], source: SourceTree) -> int:
+    """Run one tool's main() in this process and return its exit status"""
+    module = importlib.import_module(TOOLS[tool])
+    try:
+        if tool in SOURCE_TOOLS:
+            module.main(args, source)
+        else:
+            module.main(args)
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        return e.code if isinstance(e.code, int) else 1
+    return 0
+
+
+def main():
+    argv = sys.argv[1:]
+    if not argv or argv[0] in ('-h', '--help'):
+        print(USAGE)
+        sys.exit(0 if argv else 1)
+    try:
+        roots, segments = parse_command_line(argv)
+    except ValueError as e:
+        print(f"Error: {e}\n\n{USAGE}")
+        sys.exit(1)
+
+    source = SourceTree(roots or [root for root in DEFAULT_ROOTS if os.path.isdir(root)])
+    status = 0
+    timings = []
+    for position, (tool, args) in enumerate(segments):
+        print(f"\n=== {tool}: {TOOLS[tool]}.py {' '.join(args)} ===", flush=True)
+        start = time.perf_counter()
+        code = run_tool(tool, args, source)
+        timings.append((tool, time.perf_counter() - start, code))
+        sys.stdout.flush()
+        if code and not status:
+            status = code
+        if not any(later in SOURCE_TOOLS for later, _ in segments[position + 1:]):
+            # Later tools (the probe) would only carry the decoded tree around
+            source.release()
+
+    print(f"\nAudit runner summary ({source.disk_reads} files read from disk, "
+          f"{source.memory_reads} reads served from memory):")
+    for tool, seconds, code in timings:
+        print(f"  {tool:<14} {seconds:>8.2f}s  {'ok' if code == 0 else f'exit {code}'}")
+    sys.exit(status)
+
+
+if __name__ == '__main__':
+    main()
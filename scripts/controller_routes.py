@@ -1,99 +1,434 @@
 #!/usr/bin/env python3
 """
 API Route Extractor for BARQ Platform
-Lists all controller routes from ASP.NET Core controllers
+Lists all controller routes from ASP.NET Core controllers, with route
+parameters, their types and constraints, from a per-file cached index
 """
 
 import os
-import re
 import json
 import sys
+import argparse
+import time
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+from audit_walk import SourceTree
+import csharp_analyzer
+from audit_cache import ScanCache, code_fingerprint
+from audit_profile import Profiler, finish
+from csharp_analyzer import Token, tokenize, skip_group
+
+INDEX_VERSION = 2
+HTTP_ATTRIBUTES = {
+    'HttpGet': 'GET', 'HttpPost': 'POST', 'HttpPut': 'PUT', 'HttpDelete': 'DELETE',
+    'HttpPatch': 'PATCH', 'HttpHead': 'HEAD', 'HttpOptions': 'OPTIONS'
+}
+BINDING_SOURCES = {
+    'FromRoute': 'route', 'FromQuery': 'query', 'FromBody': 'body', 'FromForm': 'form',
+    'FromHeader': 'header', 'FromServices': 'services'
+}
+# Types [ApiController] binds from the query string when no source is given
+SIMPLE_TYPES = {
+    'string', 'bool', 'byte', 'sbyte', 'char', 'short', 'ushort', 'int', 'uint', 'long', 'ulong',
+    'float', 'double', 'decimal', 'Guid', 'DateTime', 'DateTimeOffset', 'DateOnly', 'TimeOnly', 'TimeSpan', 'Uri'
+}
+MODIFIERS = {'public', 'private', 'protected', 'internal', 'static', 'virtual', 'override', 'async',
+             'sealed', 'abstract', 'new', 'extern', 'unsafe', 'partial', 'readonly'}
+
+
+def _literal(text: str) -> Optional[str]:
+    """Value of a C# string literal token, or None for anything else"""
+    if text.startswith('@"'):
+        return text[2:-1].replace('""', '"')
+    if text.startswith('"') and not text.startswith('"""'):
+        return bytes(text[1:-1], 'utf-8').decode('unicode_escape') if '\\' in text else text[1:-1]
+    return None
+
+
+def parse_template_parameters(template: str) -> List[Dict]:
+    """Parameters of a route template: {id:guid}, {slug?}, {page:int=1}, {*path}"""
+    parameters = []
+    position = 0
+    while True:
+        start = template.find('{', position)
+        if start == -1:
+            return parameters
+        if template.startswith('{{', start):
+            position = start + 2
+            continue
+        end = template.find('}', start)
+        if end == -1:
+            return parameters
+        body = template[start + 1:end]
+        position = end + 1
+        catch_all = body.startswith('*')
+        body = body.lstrip('*')
+        default = None
+        if '=' in body:
+            body, default = body.split('=', 1)
+        optional = body.endswith('?')
+        body = body.rstrip('?')
+        name, *constraints = body.split(':')
+        parameters.append({'name': name, 'constraints': constraints, 'optional': optional,
+                           'default': default, 'catch_all': catch_all})
+
+
+def combine_templates(prefix: Optional[str], template: Optional[str]) -> str:
+    """Join a controller and an action template the way attribute routing does"""
+    if template and template.startswith(('/', '~/')):
+        route = template.lstrip('~')
+    elif prefix and template:
+        route = f"/{prefix.rstrip('/')}/{template}"
+    else:
+        route = f"/{prefix or template or ''}"
+    while '//' in route:
+        route = route.replace('//', '/')
+    return route.rstrip('/') or '/'
+
+
+class AttributeScanner:
+    """Single pass over a controller's tokens collecting class and action attributes"""
+
+    def __init__(self, tokens: List[Token]):
+        self.tokens = tokens
+
+    def attribute_list(self, index: int) -> Tuple[List[Dict], int]:
+        """Attributes of the ``[...]`` section at ``index`` and the index after it"""
+        tokens = self.tokens
+        end = skip_group(tokens, index, '[', ']')
+        attributes = []
+        position = index + 1
+        while position < end - 1:
+            if tokens[position][0] != 'ident':
+                position += 1
+                continue
+            name = tokens[position][1]
+            position += 1
+            while position < end - 1 and tokens[position][1] == '.' and tokens[position + 1][0] == 'ident':
+                name = tokens[position + 1][1]
+                position += 2
+            if name.endswith('Attribute'):
+                name = name[:-len('Attribute')]
+            attribute = {'name': name, 'args': [], 'named': {}, 'line': tokens[position - 1][2]}
+            if position < end - 1 and tokens[position][1] == '(':
+                close = skip_group(tokens, position, '(', ')')
+                self._arguments(position + 1, close - 1, attribute)
+                position = close
+            attributes.append(attribute)
+            if position < end - 1 and tokens[position][1] == ',':
+                position += 1
+        return attributes, end
+
+    def _arguments(self, start: int, end: int, attribute: Dict) -> None:
+        tokens = self.tokens
+        position = start
+        while position < end:
+            # Name = value or positional value; values of interest are string literals
+            if position + 2 < end and tokens[position][0] == 'ident' and tokens[position + 1][1] == '=':
+                attribute['named'][tokens[position][1]] = _literal(tokens[position + 2][1])
+                position += 3
+            else:
+                if tokens[position][0] == 'string':
+                    attribute['args'].append(_literal(tokens[position][1]))
+                elif tokens[position][1] != ',':
+                    attribute['args'].append(None)
+                    while position + 1 < end and tokens[position + 1][1] != ',':
+                        position += 1
+                position += 1
+
+    def parameters(self, start: int, end: int) -> List[Dict]:
+        """Method parameters in tokens[start:end] with their binding attributes"""
+        tokens = self.tokens
+        parameters = []
+        position = start
+        while position < end:
+            attributes = []
+            while position < end and tokens[position][1] == '[':
+                found, position = self.attribute_list(position)
+                attributes.extend(found)
+            piece_start = position
+            depth = 0
+            while position < end and not (tokens[position][1] == ',' and depth == 0):
+                text = tokens[position][1]
+                if text in ('(', '<', '['):
+                    depth += 1
+                elif text in (')', '>', ']'):
+                    depth -= 1
+                position += 1
+            piece = tokens[piece_start:position]
+            position += 1
+            default = None
+            for offset, token in enumerate(piece):
+                if token[1] == '=' and offset > 0:
+                    default = ' '.join(text for _, text, _ in piece[offset + 1:])
+                    piece = piece[:offset]
+                    break
+            piece = [token for token in piece if token[1] not in ('ref', 'out', 'in', 'params', 'this')]
+            if len(piece) < 2:
+                continue
+            parameters.append({
+                'name': piece[-1][1].lstrip('@'),
+                'type': ''.join(text if text != ',' else ', ' for _, text, _ in piece[:-1]),
+                'attributes': attributes,
+                'default': default
+            })
+        return parameters
+
+    def scan(self) -> List[Dict]:
+        """Controller classes with their attributes and the attributed methods inside them"""
+        tokens = self.tokens
+        length = len(tokens)
+        classes: List[Dict] = []
+        stack: List[Optional[Dict]] = []
+        pending: List[Dict] = []
+        index = 0
+        while index < length:
+            kind, text, line = tokens[index]
+            if text == '[' and (index == 0 or tokens[index - 1][1] in (';', '{', '}', ']')):
+                found, index = self.attribute_list(index)
+                pending.extend(found)
+                continue
+            if text == '{':
+                stack.append(None)
+            elif text == '}':
+                if stack:
+                    stack.pop()
+                pending = []
+            elif text == ';':
+                pending = []
+            elif kind == 'ident' and text == 'class' and index + 1 < length:
+                index = self._class(index, pending, classes, stack)
+                pending = []
+                continue
+            elif text == '(' and pending and stack and isinstance(stack[-1], dict):
+                index = self._method(index, pending, stack[-1])
+                pending = []
+                continue
+            index += 1
+        return classes
+
+    def _class(self, index: int, attributes: List[Dict], classes: List[Dict], stack: List) -> int:
+        tokens = self.tokens
+        name = tokens[index + 1][1]
+        modifiers = set()
+        position = index - 1
+        while position >= 0 and tokens[position][1] in MODIFIERS:
+            modifiers.add(tokens[position][1])
+            position -= 1
+        index += 2
+        while index < len(tokens) and tokens[index][1] not in ('{', ';'):
+            index += 1
+        if index < len(tokens) and tokens[index][1] == '{':
+            controller = {'name': name, 'attributes': attributes, 'abstract': 'abstract' in modifiers,
+                          'line': tokens[index][2], 'actions': []}
+            classes.append(controller)
+            stack.append(controller)
+            index += 1
+        return index
+
+    def _method(self, index: int, attributes: List[Dict], controller: Dict) -> int:
+        tokens = self.tokens
+        position = index - 1
+        if position >= 0 and tokens[position][1] == '>':
+            # Generic method: walk back over its type parameters
+            depth = 0
+            while position >= 0:
+                depth += {'>': 1, '<': -1}.get(tokens[position][1], 0)
+                position -= 1
+                if depth == 0:
+                    break
+        name_index = position
+        modifiers = set()
+        position = name_index - 1
+        while position >= 0 and tokens[position][1] not in (';', '{', '}', ']'):
+            if tokens[position][1] in MODIFIERS:
+                modifiers.add(tokens[position][1])
+            position -= 1
+        close = skip_group(tokens, index, '(', ')')
+        if tokens[name_index][0] == 'ident' and 'public' in modifiers and 'static' not in modifiers:
+            controller['actions'].append({
+                'name': tokens[name_index][1],
+                'attributes': attributes,
+                'parameters': self.parameters(index + 1, close - 1),
+                'line': tokens[name_index][2]
+            })
+        return close
+
 
 class RouteExtractor:
-    def __init__(self, controllers_dir: str):
+    def __init__(self, controllers_dir: str, cache_file: Optional[str] = None,
+                 profiler: Optional[Profiler] = None, source: Optional[SourceTree] = None):
         self.controllers_dir = Path(controllers_dir)
+        self.source = source or SourceTree(shared=False)
         self.routes = []
-        
+        self.errors = 0
+        self.profiler = profiler or Profiler('controller_routes', enabled=False)
+        code = code_fingerprint(__file__, csharp_analyzer.__file__)
+        self.cache = ScanCache(cache_file, f'controller_routes:{INDEX_VERSION}:{code}') if cache_file else None
+
     def extract_routes_from_file(self, file_path: Path) -> List[Dict]:
         """Extract routes from a single controller file"""
         routes = []
-        
+        start = time.perf_counter()
+        content = ''
+
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            controller_match = re.search(r'class\s+(\w+)Controller', content)
-            if not controller_match:
-                return routes
-                
-            controller_name = controller_match.group(1)
-            
-            route_prefix = ""
-            route_attr_match = re.search(r'\[Route\("([^"]+)"\)\]', content)
-            if route_attr_match:
-                route_prefix = route_attr_match.group(1)
-            else:
-                route_prefix = f"api/{controller_name.lower()}"
-            
-            action_pattern = r'\[(HttpGet|HttpPost|HttpPut|HttpDelete|HttpPatch)(?:\("([^"]+)"\))?\]\s*(?:\[.*?\]\s*)*public\s+(?:async\s+)?(?:Task<?[^>]*>?\s+)?(\w+)\s*\('
-            
-            for match in re.finditer(action_pattern, content, re.MULTILINE | re.DOTALL):
-                http_method = match.group(1).replace('Http', '').upper()
-                route_template = match.group(2) or ""
-                action_name = match.group(3)
-                
-                if route_template:
-                    if route_template.startswith('/'):
-                        full_route = route_template
-                    else:
-                        full_route = f"/{route_prefix}/{route_template}"
-                else:
-                    full_route = f"/{route_prefix}/{action_name.lower()}"
-                
-                full_route = full_route.replace('//', '/').replace('[controller]', controller_name.lower())
-                
-                routes.append({
-                    'controller': controller_name,
-                    'action': action_name,
-                    'method': http_method,
-                    'route': full_route,
-                    'file': str(file_path.relative_to(self.controllers_dir.parent))
-                })
-                
+            with self.profiler.phase('read'):
+                content = self.source.read(file_path)
+
+            relative_file = str(file_path.relative_to(self.controllers_dir.parent))
+            with self.profiler.phase('match'):
+                for controller in AttributeScanner(tokenize(content)).scan():
+                    if controller['name'].endswith('Controller') and not controller['abstract']:
+                        routes.extend(self._controller_routes(controller, relative_file))
+
         except Exception as e:
+            self.errors += 1
             print(f"Error processing {file_path}: {e}", file=sys.stderr)
-            
+
+        self.profiler.file(file_path, time.perf_counter() - start, content.count('\n') + 1)
+        return routes
+
+    @staticmethod
+    def _controller_routes(controller: Dict, relative_file: str) -> List[Dict]:
+        controller_name = controller['name'][:-len('Controller')]
+        class_attributes = controller['attributes']
+        area = next((a['args'][0] for a in class_attributes if a['name'] == 'Area' and a['args']), None)
+        prefixes = [a['args'][0] for a in class_attributes if a['name'] == 'Route' and a['args'] and a['args'][0]]
+        if not prefixes:
+            # No attribute route on the class: fall back to the conventional api/{controller} prefix
+            prefixes = [f"api/{controller_name.lower()}"]
+
+        routes = []
+        for action in controller['actions']:
+            names = {a['name'] for a in action['attributes']}
+            if 'NonAction' in names:
+                continue
+            verbs = [(HTTP_ATTRIBUTES[a['name']], a['args'][0] if a['args'] else None, a['named'].get('Name'))
+                     for a in action['attributes'] if a['name'] in HTTP_ATTRIBUTES]
+            for attribute in action['attributes']:
+                if attribute['name'] == 'AcceptVerbs':
+                    verbs.extend((verb.upper(), attribute['named'].get('Route'), attribute['named'].get('Name'))
+                                 for verb in attribute['args'] if verb)
+            action_routes = [a['args'][0] if a['args'] else '' for a in action['attributes'] if a['name'] == 'Route']
+            if not verbs:
+                if not action_routes:
+                    continue
+                # Attribute-routed without a verb: matches any method; probes use GET
+                verbs = [('GET', None, None)]
+
+            for http_method, verb_template, route_name in verbs:
+                templates = [verb_template] if verb_template is not None else (action_routes or [None])
+                for template in templates:
+                    for prefix in ([None] if template and template.startswith(('/', '~/')) else prefixes):
+                        route = combine_templates(prefix, template)
+                        route = route.replace('[controller]', controller_name.lower())
+                        route = route.replace('[action]', action['name'].lower())
+                        route = route.replace('[area]', (area or '').lower())
+                        routes.append({
+                            'controller': controller_name,
+                            'action': action['name'],
+                            'method': http_method,
+                            'route': route,
+                            'file': relative_file,
+                            'line': action['line'],
+                            'area': area,
+                            'name': route_name,
+                            'parameters': RouteExtractor._parameters(route, action['parameters'])
+                        })
         return routes
-    
+
+    @staticmethod
+    def _parameters(route: str, method_parameters: List[Dict]) -> List[Dict]:
+        """Route template parameters joined with the action's parameters by name"""
+        by_name = {p['name'].lower(): p for p in method_parameters}
+        parameters = []
+        seen = set()
+        for template_parameter in parse_template_parameters(route):
+            method_parameter = by_name.get(template_parameter['name'].lower())
+            parameters.append({
+                'name': template_parameter['name'],
+                'type': method_parameter['type'] if method_parameter else None,
+                'source': 'route',
+                'constraints': template_parameter['constraints'],
+                'optional': (template_parameter['optional'] or template_parameter['catch_all']
+                             or template_parameter['default'] is not None),
+                'default': template_parameter['default']
+            })
+            seen.add(template_parameter['name'].lower())
+        for method_parameter in method_parameters:
+            if method_parameter['name'].lower() in seen or method_parameter['type'] == 'CancellationToken':
+                continue
+            source = next((BINDING_SOURCES[a['name']] for a in method_parameter['attributes']
+                           if a['name'] in BINDING_SOURCES), None)
+            base_type = method_parameter['type'].rstrip('?')
+            if source is None:
+                if base_type in ('IFormFile', 'IFormFileCollection'):
+                    source = 'form'
+                else:
+                    source = 'query' if base_type in SIMPLE_TYPES else 'body'
+            if source == 'services':
+                continue
+            parameters.append({
+                'name': method_parameter['name'],
+                'type': method_parameter['type'],
+                'source': source,
+                'constraints': [],
+                'optional': method_parameter['default'] is not None or method_parameter['type'].endswith('?'),
+                'default': method_parameter['default']
+            })
+        return parameters
+
     def extract_all_routes(self) -> None:
         """Extract routes from all controller files"""
-        controller_files = list(self.controllers_dir.rglob('*Controller.cs'))
-        
+        with self.profiler.phase('walk'):
+            controller_files = [path for _, path in self.source.files(self.controllers_dir, ['cs'])
+                                if path.name.endswith('Controller.cs')]
+
         for file_path in controller_files:
-            file_routes = self.extract_routes_from_file(file_path)
+            file_routes = self.cache.lookup(file_path) if self.cache is not None else None
+            if file_routes is None:
+                errors = self.errors
+                file_routes = self.extract_routes_from_file(file_path)
+                # Files that failed to parse are retried next run rather than cached as empty
+                if self.cache is not None and self.errors == errors:
+                    self.cache.store(file_path, file_routes)
             self.routes.extend(file_routes)
-    
+        if self.cache is not None:
+            with self.profiler.phase('write'):
+                self.cache.save()
+
     def get_routes_json(self) -> str:
         """Get routes as JSON string"""
         return json.dumps(self.routes, indent=2)
 
-def main():
-    if len(sys.argv) != 2:
-        print("Usage: python3 controller_routes.py <controllers_directory>")
-        sys.exit(1)
-    
-    controllers_dir = sys.argv[1]
-    
+def main(argv: Optional[List[str]] = None, source: Optional[SourceTree] = None):
+    parser = argparse.ArgumentParser(description='API Route Extractor')
+    parser.add_argument('controllers_dir', help='Directory with the API controllers')
+    parser.add_argument('--out', help='Write the routes JSON here instead of stdout')
+    parser.add_argument('--cache', help='Per-file route index cache (JSON, .gz for gzip)')
+    parser.add_argument('--profile', metavar='FILE', help='Write a JSON profile of phase and per-file costs')
+    args = parser.parse_args(argv)
+
+    controllers_dir = args.controllers_dir
+
     if not os.path.exists(controllers_dir):
         print(f"Error: Controllers directory {controllers_dir} does not exist")
         sys.exit(1)
-    
-    extractor = RouteExtractor(controllers_dir)
+
+    profiler = Profiler('controller_routes', enabled=bool(args.profile))
+    extractor = RouteExtractor(controllers_dir, args.cache, profiler, source)
     extractor.extract_all_routes()
-    
-    print(extractor.get_routes_json())
+
+    if args.out:
+        with profiler.phase('write'), open(args.out, 'w', encoding='utf-8') as f:
+            f.write(extractor.get_routes_json() + '\n')
+        print(f"{len(extractor.routes)} routes saved to: {args.out}", file=sys.stderr)
+    else:
+        print(extractor.get_routes_json())
+    if args.profile:
+        # stdout may carry the routes JSON
+        finish(profiler, args.profile, file=sys.stderr)
 
 if __name__ == '__main__':
     main()
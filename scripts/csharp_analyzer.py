@@ -0,0 +1,685 @@
+#!/usr/bin/env python3
+"""
+C# Analyzer for BARQ Platform audits
+A linear C# tokenizer and an entity model built from the source tree, used to
+find LINQ queries on tenant entities that never filter by TenantId
+"""
+
+import re
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# (kind, text, line); kind is one of ident, number, string, char, punct
+Token = Tuple[str, str, int]
+
+# Every alternative is a plain character class or a lazy scan to a fixed
+# terminator, so matching is linear in the input with no backtracking blow-up
+TOKEN = re.compile(r'''
+    (?P<space>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<directive>(?<![^\n])[ \t]*\#[^\n]*)
+  | (?P<raw>\$*"{3,})
+  | (?P<interpolated>\$@?"|@\$")
+  | (?P<verbatim>@"(?:[^"]|"")*"?)
+  | (?P<string>"(?:[^"\\\n]|\\.)*"?)
+  | (?P<char>'(?:[^'\\\n]|\\.)*'?)
+  | (?P<ident>@?[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<number>[0-9][A-Za-z0-9_.]*)
+  | (?P<punct>\?\?=|\?\.|\?\?|=>|==|!=|<=|>=|&&|\|\||\+\+|--|[-+*/%&|^]=|::|.)
+''', re.VERBOSE | re.DOTALL)
+
+SKIPPED = ('space', 'comment', 'directive')
+
+# Receivers treated as a DbContext when a DbSet property is read from them
+CONTEXT_RECEIVER = re.compile(r'_?(db|\w*context)', re.IGNORECASE)
+# Text-level superset of the context member reads and Set<T>() roots the analyzers resolve
+CONTEXT_MEMBER = re.compile(r'(?<![\w@])(?:_?db|\w*context)\s*\??\.\s*@?([A-Za-z_]\w*)', re.IGNORECASE)
+SET_CALL = re.compile(r'\bSet\s*<\s*@?([A-Za-z_][\w.]*)')
+
+LOOP_KEYWORDS = {'for', 'foreach', 'while', 'do'}
+TYPE_KEYWORDS = {'class', 'struct', 'interface', 'record', 'namespace', 'enum'}
+# Calls that load query results into memory
+MATERIALIZERS = {'ToList', 'ToListAsync', 'ToArray', 'ToArrayAsync', 'ToDictionary', 'ToDictionaryAsync',
+                 'ToHashSet', 'ToHashSetAsync', 'AsEnumerable', 'AsAsyncEnumerable'}
+SINGLE_RESULTS = {'First', 'FirstOrDefault', 'Single', 'SingleOrDefault', 'Last', 'LastOrDefault',
+                  'FirstAsync', 'FirstOrDefaultAsync', 'SingleAsync', 'SingleOrDefaultAsync',
+                  'LastAsync', 'LastOrDefaultAsync'}
+# Operators that are cheap in SQL but run in memory after an early materialization
+IN_MEMORY_AFTER = {'Where', 'Select', 'SelectMany', 'OrderBy', 'OrderByDescending', 'GroupBy'}
+BOUNDS = {'Take', 'Skip', 'TakeLast', 'ToPagedList', 'ToPagedListAsync'}
+UNTRACKED = {'AsNoTracking', 'AsNoTrackingWithIdentityResolution', 'Select', 'SelectMany', 'GroupBy'}
+WRITES = {'SaveChanges', 'SaveChangesAsync', 'Add', 'AddAsync', 'AddRange', 'AddRangeAsync', 'Update',
+          'UpdateRange', 'Remove', 'RemoveRange', 'Attach', 'Entry', 'ExecuteUpdate', 'ExecuteUpdateAsync',
+          'ExecuteDelete', 'ExecuteDeleteAsync'}
+
+# Calls that keep a value an IQueryable over the same entity
+QUERY_OPERATORS = {
+    'Where', 'Include', 'ThenInclude', 'AsQueryable', 'AsNoTracking', 'AsNoTrackingWithIdentityResolution',
+    'AsTracking', 'AsSplitQuery', 'AsSingleQuery', 'IgnoreQueryFilters', 'IgnoreAutoIncludes', 'TagWith',
+    'OrderBy', 'OrderByDescending', 'ThenBy', 'ThenByDescending', 'Skip', 'Take', 'Distinct'
+}
+
+
+def _skip_interpolated(source: str, start: int, verbatim: bool) -> int:
+    """End offset of an interpolated string whose opening quote ends at ``start``"""
+    position = start
+    length = len(source)
+    depth = 0
+    while position < length:
+        char = source[position]
+        if depth == 0:
+            if char == '"':
+                if verbatim and source.startswith('""', position):
+                    position += 2
+                    continue
+                return position + 1
+            if char == '\\' and not verbatim:
+                position += 2
+                continue
+            if char == '{':
+                if source.startswith('{{', position):
+                    position += 2
+                    continue
+                depth = 1
+            elif char == '\n' and not verbatim:
+                return position
+            position += 1
+            continue
+        # Inside an interpolation hole: nested strings and braces
+        if char == '"':
+            match = TOKEN.match(source, position)
+            position = match.end()
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+        position += 1
+    return position
+
+
+def tokenize(source: str) -> List[Token]:
+    """Tokens of a C# source with comments, whitespace and directives dropped"""
+    tokens = []
+    position = 0
+    line = 1
+    length = len(source)
+    match_token = TOKEN.match
+    while position < length:
+        match = match_token(source, position)
+        kind = match.lastgroup
+        end = match.end()
+        if kind == 'raw':
+            # Raw string literal: closed by the same run of quotes that opened it
+            quotes = match.group().lstrip('$')
+            close = source.find(quotes, end)
+            end = length if close == -1 else close + len(quotes)
+            kind = 'string'
+        elif kind == 'interpolated':
+            end = _skip_interpolated(source, end, '@' in match.group())
+            kind = 'string'
+        elif kind == 'verbatim':
+            kind = 'string'
+        if kind not in SKIPPED:
+            tokens.append((kind, source[position:end], line))
+        line += source.count('\n', position, end)
+        position = end
+    return tokens
+
+
+def skip_group(tokens: List[Token], index: int, open_text: str, close_text: str) -> int:
+    """Index just past the group opened at ``index``.
+
+    An unbalanced group stops at the '}' closing the block it started in, and
+    '<'/'[' groups also at a ';' outside braces ('(' groups may hold the ';'
+    of a for header); the index returned then points at that token.
+    """
+    depth = 0
+    braces = 0
+    length = len(tokens)
+    while index < length:
+        text = tokens[index][1]
+        if text == open_text:
+            depth += 1
+        elif text == close_text:
+            depth -= 1
+            if depth == 0:
+                return index + 1
+        elif text == '{':
+            braces += 1
+        elif text == '}':
+            if braces == 0:
+                return index
+            braces -= 1
+        elif text == ';' and braces == 0 and open_text != '(':
+            return index
+        index += 1
+    return index
+
+
+def _generic_end(tokens: List[Token], index: int) -> Optional[int]:
+    """Index past a '<...>' type argument list at ``index``, or None if it is not one"""
+    depth = 0
+    for position in range(index, min(len(tokens), index + 64)):
+        kind, text, _ = tokens[position]
+        if text == '<':
+            depth += 1
+        elif text == '>':
+            depth -= 1
+            if depth == 0:
+                return position + 1
+        elif text == '>>':
+            depth -= 2
+            if depth <= 0:
+                return position + 1
+        elif kind != 'ident' and text not in (',', '.', '?', '[', ']', '::'):
+            return None
+    return None
+
+
+def _type_name(tokens: List[Token], start: int, end: int) -> Optional[str]:
+    """Simple name of a possibly qualified type spanning tokens[start:end]"""
+    name = None
+    for kind, text, _ in tokens[start:end]:
+        if text == '<':
+            break
+        if kind == 'ident':
+            name = text.lstrip('@')
+    return name
+
+
+class EntityModel:
+    """Which classes carry a TenantId, which are covered by a global tenant
+    query filter, and which DbSet properties expose them.
+
+    Each file contributes independent facts, so ``load`` can take them from
+    a per-file cache and only tokenize files that changed. A model starts
+    empty; ``loaded`` tells whether it has been filled yet.
+    """
+
+    def __init__(self):
+        self.bases: Dict[str, Set[str]] = {}
+        self.has_tenant_id: Set[str] = set()
+        self.filtered_roots: Set[str] = set()
+        self.db_sets: Dict[str, str] = {}
+        self.tenant: Set[str] = set()
+        self.filtered: Set[str] = set()
+        self.loaded = False
+
+    @classmethod
+    def from_directory(cls, src_dir: Path, paths: Optional[Iterable[Path]] = None,
+                       read: Optional[Callable[[Path], str]] = None, cache=None) -> 'EntityModel':
+        return cls().load(paths if paths is not None else Path(src_dir).rglob('*.cs'), read, cache)
+
+    def load(self, paths: Iterable[Path], read: Optional[Callable[[Path], str]] = None, cache=None) -> 'EntityModel':
+        """Add every file's facts and resolve; ``cache`` is a ScanCache of per-file facts"""
+        for path in paths:
+            facts = cache.lookup(path) if cache is not None else None
+            if facts is None:
+                try:
+                    facts = [self.facts(read(path) if read is not None else Path(path).read_text(encoding='utf-8'))]
+                except (OSError, UnicodeDecodeError):
+                    continue
+                if cache is not None:
+                    cache.store(path, facts)
+            self.add_facts(facts[0])
+        self.resolve()
+        self.loaded = True
+        return self
+
+    @classmethod
+    def facts(cls, source: str) -> Dict:
+        """The entity facts one source file declares, as plain JSON data"""
+        part = cls()
+        part.add_source(source)
+        return {'bases': {name: sorted(bases) for name, bases in part.bases.items()},
+                'tenant_ids': sorted(part.has_tenant_id), 'filtered_roots': sorted(part.filtered_roots),
+                'db_sets': part.db_sets}
+
+    def add_facts(self, facts: Dict) -> None:
+        for name, bases in facts['bases'].items():
+            self.bases.setdefault(name, set()).update(bases)
+        self.has_tenant_id.update(facts['tenant_ids'])
+        self.filtered_roots.update(facts['filtered_roots'])
+        self.db_sets.update(facts['db_sets'])
+
+    def add_source(self, source: str) -> None:
+        tokens = tokenize(source)
+        constraints: Dict[str, str] = {}
+        classes: List[Tuple[str, int]] = []
+        depth = 0
+        length = len(tokens)
+        index = 0
+        while index < length:
+            kind, text, _ = tokens[index]
+            if text == '{':
+                depth += 1
+            elif text == '}':
+                depth -= 1
+                while classes and classes[-1][1] > depth:
+                    classes.pop()
+            elif kind == 'ident' and text in ('class', 'interface', 'record', 'struct') and index + 1 < length \
+                    and tokens[index + 1][0] == 'ident':
+                index = self._class_header(tokens, index + 1, classes, depth)
+                continue
+            elif kind == 'ident' and text == 'TenantId' and classes and index + 1 < length \
+                    and tokens[index + 1][1] in ('{', '=>') and tokens[index - 1][1] not in ('.', '?.'):
+                self.has_tenant_id.add(classes[-1][0])
+            elif kind == 'ident' and text == 'where' and index + 3 < length and tokens[index + 2][1] == ':' \
+                    and tokens[index + 1][0] == 'ident' and tokens[index + 3][0] == 'ident':
+                constraints[tokens[index + 1][1]] = _type_name(tokens, index + 3, index + 4)
+            elif kind == 'ident' and text == 'DbSet' and index + 1 < length and tokens[index + 1][1] == '<':
+                end = _generic_end(tokens, index + 1)
+                if end is not None and end < length and tokens[end][0] == 'ident':
+                    self.db_sets[tokens[end][1]] = _type_name(tokens, index + 2, end - 1)
+                    index = end + 1
+                    continue
+            elif kind == 'ident' and text == 'HasQueryFilter':
+                self._query_filter(tokens, index, constraints)
+            index += 1
+
+    def _class_header(self, tokens: List[Token], index: int, classes: List[Tuple[str, int]], depth: int) -> int:
+        name = tokens[index][1]
+        self.bases.setdefault(name, set())
+        index += 1
+        length = len(tokens)
+        if index < length and tokens[index][1] == '<':
+            index = _generic_end(tokens, index) or index + 1
+        if index < length and tokens[index][1] == '(':
+            index = skip_group(tokens, index, '(', ')')
+        if index < length and tokens[index][1] == ':':
+            index += 1
+            start = index
+            while index < length and tokens[index][1] not in ('{', ';') and tokens[index][1] != 'where':
+                if tokens[index][1] == '<':
+                    index = _generic_end(tokens, index) or index + 1
+                    continue
+                if tokens[index][1] == ',':
+                    self.bases[name].add(_type_name(tokens, start, index))
+                    start = index + 1
+                elif tokens[index][1] == '(':
+                    index = skip_group(tokens, index, '(', ')')
+                    continue
+                index += 1
+            base = _type_name(tokens, start, index)
+            if base:
+                self.bases[name].add(base)
+        while index < length and tokens[index][1] not in ('{', ';'):
+            index += 1
+        if index < length and tokens[index][1] == '{':
+            classes.append((name, depth + 1))
+        return index
+
+    def _query_filter(self, tokens: List[Token], index: int, constraints: Dict[str, str]) -> None:
+        """Record Entity<X>().HasQueryFilter(... TenantId ...) statements"""
+        if index + 1 >= len(tokens) or tokens[index + 1][1] != '(':
+            return
+        end = skip_group(tokens, index + 1, '(', ')')
+        if not any(text == 'TenantId' for _, text, _ in tokens[index + 1:end]):
+            return
+        # Walk back through the builder chain to the Entity<X> call
+        position = index - 1
+        while position > 0 and tokens[position][1] not in (';', '{', '}'):
+            if tokens[position][1] == 'Entity' and tokens[position + 1][1] == '<':
+                generic_end = _generic_end(tokens, position + 1)
+                if generic_end is not None:
+                    entity = _type_name(tokens, position + 2, generic_end - 1)
+                    self.filtered_roots.add(constraints.get(entity, entity))
+                return
+            position -= 1
+
+    def resolve(self) -> None:
+        """Close tenant and filtered sets over the inheritance graph"""
+        memo: Dict[str, Tuple[bool, bool]] = {}
+
+        def visit(name: str, trail: Set[str]) -> Tuple[bool, bool]:
+            if name in memo:
+                return memo[name]
+            tenant = name in self.has_tenant_id
+            filtered = name in self.filtered_roots
+            for base in self.bases.get(name, ()):
+                if base in trail:
+                    continue
+                base_tenant, base_filtered = visit(base, trail | {name})
+                tenant = tenant or base_tenant
+                filtered = filtered or base_filtered
+            memo[name] = (tenant, filtered)
+            return memo[name]
+
+        for name in list(self.bases) + list(self.filtered_roots):
+            tenant, filtered = visit(name, set())
+            if tenant:
+                self.tenant.add(name)
+            if filtered:
+                self.filtered.add(name)
+
+    @staticmethod
+    def references(source: str) -> Dict[str, List[str]]:
+        """DbSet properties and Set<T>() types a file may query: every model
+        lookup its analysis can make, over-approximated from the raw text"""
+        return {'sets': sorted(set(CONTEXT_MEMBER.findall(source))),
+                'types': sorted({name.rsplit('.', 1)[-1] for name in SET_CALL.findall(source)})}
+
+    def state(self, references: Dict[str, List[str]]) -> List[List]:
+        """What the model says about ``references``; findings stay valid while this is unchanged"""
+        entities = [[name, self.db_sets.get(name)] for name in references['sets']]
+        entities += [[name, name] for name in references['types']]
+        return [[name, entity, entity in self.tenant, entity in self.filtered] for name, entity in entities]
+
+
+class QueryVariable:
+    """A local holding an unmaterialized query over a tenant entity"""
+
+    def __init__(self, depth: int, filtered: bool):
+        self.depth = depth
+        self.filtered = filtered
+        self.pending: List[int] = []
+
+
+class QueryAnalyzer:
+    """Shared token walking for analyzers of EF Core query chains"""
+
+    def __init__(self, model: EntityModel):
+        self.model = model
+
+    def _root(self, tokens: List[Token], index: int) -> Tuple[Optional[str], int]:
+        """(entity, index past the root) for a query root at ``index``, else (None, index)"""
+        kind, text, _ = tokens[index]
+        length = len(tokens)
+        if kind != 'ident' or index == 0 or tokens[index - 1][1] not in ('.', '?.'):
+            if text == 'Set' and index + 1 < length and tokens[index + 1][1] == '<':
+                end = _generic_end(tokens, index + 1)
+                if end is not None and end + 1 < length and tokens[end][1] == '(' and tokens[end + 1][1] == ')':
+                    return _type_name(tokens, index + 2, end - 1), end + 2
+            return None, index
+        if text in self.model.db_sets and CONTEXT_RECEIVER.fullmatch(tokens[index - 2][1]):
+            return self.model.db_sets[text], index + 1
+        if text == 'Set' and index + 1 < length and tokens[index + 1][1] == '<':
+            end = _generic_end(tokens, index + 1)
+            if end is not None and end + 1 < length and tokens[end][1] == '(' and tokens[end + 1][1] == ')':
+                return _type_name(tokens, index + 2, end - 1), end + 2
+        return None, index
+
+    @staticmethod
+    def _chain(tokens: List[Token], index: int) -> Tuple[List[Tuple[str, int, int, int]], int]:
+        """Calls ``(name, args start, args end, line)`` of the member chain at ``index`` and its end"""
+        calls = []
+        length = len(tokens)
+        while index + 1 < length and tokens[index][1] in ('.', '?.', '!') and tokens[index + 1][0] == 'ident':
+            if tokens[index][1] == '!':
+                index += 1
+                continue
+            name_index = index + 1
+            index = name_index + 1
+            if index < length and tokens[index][1] == '<':
+                index = _generic_end(tokens, index) or index
+            if index < length and tokens[index][1] == '(':
+                end = skip_group(tokens, index, '(', ')')
+                calls.append((tokens[name_index][1], index + 1, end - 1, tokens[name_index][2]))
+                index = end
+            else:
+                calls.append((tokens[name_index][1], index, index, tokens[name_index][2]))
+            if index < length and tokens[index][1] == '!':
+                index += 1
+        return calls, index
+
+    @staticmethod
+    def _expression_start(tokens: List[Token], index: int) -> int:
+        """Index of the first identifier of the dotted receiver ending at ``index``"""
+        position = index
+        while position >= 2 and tokens[position - 1][1] in ('.', '?.') and tokens[position - 2][0] == 'ident':
+            position -= 2
+        return position
+
+    @classmethod
+    def _assigned_name(cls, tokens: List[Token], index: int, awaited: bool = False) -> Optional[str]:
+        """Local assigned by ``name = receiver.root...`` (or ``name = await ...``) for the root at ``index``"""
+        position = cls._expression_start(tokens, index)
+        if awaited and position > 0 and tokens[position - 1][1] == 'await':
+            position -= 1
+        if position >= 2 and tokens[position - 1][1] == '=' and tokens[position - 2][0] == 'ident':
+            return tokens[position - 2][1]
+        return None
+
+
+class TenantGapAnalyzer(QueryAnalyzer):
+    """Finds .Where(...) queries on tenant entities that never filter by TenantId.
+
+    A query starts at a DbSet property or Set<T>() of a tenant entity and
+    runs through its whole call chain, across lines. Queries kept in local
+    variables are followed through reassignments until the variable goes
+    out of scope. Entities covered by a global tenant query filter are
+    skipped unless the chain calls IgnoreQueryFilters(). One pass over the
+    tokens per file.
+    """
+
+    def analyze(self, tokens: List[Token]) -> List[int]:
+        """Sorted line numbers of the offending Where calls"""
+        gaps: Set[int] = set()
+        variables: Dict[str, QueryVariable] = {}
+        depth = 0
+        length = len(tokens)
+        index = 0
+        while index < length:
+            kind, text, _ = tokens[index]
+            if text == '{':
+                depth += 1
+            elif text == '}':
+                depth -= 1
+                for name in [name for name, variable in variables.items() if variable.depth > depth]:
+                    variable = variables.pop(name)
+                    if not variable.filtered:
+                        gaps.update(variable.pending)
+            if kind != 'ident':
+                index += 1
+                continue
+
+            source_variable = None
+            entity, chain_start = self._root(tokens, index)
+            if entity is None:
+                if text not in variables or index + 1 >= length or tokens[index + 1][1] not in ('.', '?.') \
+                        or (index > 0 and tokens[index - 1][1] in ('.', '?.')):
+                    index += 1
+                    continue
+                source_variable = variables[text]
+                chain_start = index + 1
+            elif entity not in self.model.tenant:
+                index = chain_start
+                continue
+
+            calls, chain_end = self._chain(tokens, chain_start)
+            names = [call[0] for call in calls]
+            tenant_filtered = any(tokens[position][1] == 'TenantId'
+                                  for _, start, end, _ in calls for position in range(start, end))
+            if source_variable is not None:
+                filtered = source_variable.filtered or tenant_filtered
+            else:
+                globally = entity in self.model.filtered and 'IgnoreQueryFilters' not in names
+                filtered = globally or tenant_filtered
+            wheres = [line for name, _, _, line in calls if name == 'Where']
+
+            target = self._assigned_name(tokens, index)
+            is_query = all(name in QUERY_OPERATORS for name in names)
+            if target is not None and is_query and chain_end < length and tokens[chain_end][1] == ';':
+                # The query stays lazy: remember its Where calls until it is filtered or used
+                previous = variables.get(target)
+                if previous is not None and previous is not source_variable and not previous.filtered:
+                    gaps.update(previous.pending)
+                variable = QueryVariable(previous.depth if previous else depth, filtered)
+                if source_variable is not None:
+                    variable.pending = list(source_variable.pending)
+                variable.pending.extend(wheres)
+                variables[target] = variable
+            elif not filtered:
+                if source_variable is not None:
+                    gaps.update(source_variable.pending)
+                    source_variable.pending = []
+                gaps.update(wheres)
+            # Chains inside the call arguments are roots of their own
+            index += 1
+
+        for variable in variables.values():
+            if not variable.filtered:
+                gaps.update(variable.pending)
+        return sorted(gaps)
+
+    def scan(self, content: str) -> List[int]:
+        if 'Where' not in content:
+            return []
+        return self.analyze(tokenize(content))
+
+
+class MethodScope:
+    """Read-only query candidates of one member body, kept until its writes are known"""
+
+    def __init__(self):
+        self.writes = False
+        self.untracked: List[int] = []
+        # Locals holding tracked entities; setting a property on one counts as a write
+        self.loaded: Set[str] = set()
+
+
+class PerformanceAnalyzer(QueryAnalyzer):
+    """Finds EF Core and async hot-path problems in one pass over the tokens.
+
+    Reports ``(line, rule)`` for the rules of audit_rules.PERFORMANCE_RULES
+    that need more than a line: awaited queries inside loop bodies, early
+    ToList()/AsEnumerable(), blocking on tasks, materialized queries without
+    Take/Skip, and read-only queries without AsNoTracking in members that
+    never save. Queries are followed through local query variables as in
+    TenantGapAnalyzer.
+    """
+
+    def analyze(self, tokens: List[Token]) -> List[Tuple[int, str]]:
+        findings: List[Tuple[int, str]] = []
+        # Open blocks as (kind, method scope); kind is 'type', 'loop' or 'code'
+        blocks: List[Tuple[str, Optional[MethodScope]]] = []
+        variables: Dict[str, Tuple[int, List[str]]] = {}
+        pending_type = False
+        loop_header_end = -1
+        loop_statement_end = -1
+        open_loops = 0
+        length = len(tokens)
+        index = 0
+        while index < length:
+            kind, text, line = tokens[index]
+            scope = blocks[-1][1] if blocks else None
+            if text == '{':
+                if pending_type:
+                    blocks.append(('type', None))
+                elif index == loop_header_end:
+                    blocks.append(('loop', scope))
+                    open_loops += 1
+                elif not blocks or blocks[-1][0] == 'type':
+                    blocks.append(('code', MethodScope()))
+                else:
+                    blocks.append(('code', scope))
+                pending_type = False
+            elif text == '}':
+                if blocks:
+                    block_kind, block_scope = blocks.pop()
+                    if block_kind == 'loop':
+                        open_loops -= 1
+                    elif block_scope is not None and (not blocks or blocks[-1][0] == 'type'):
+                        if not block_scope.writes:
+                            findings.extend((untracked_line, 'MissingAsNoTracking')
+                                            for untracked_line in block_scope.untracked)
+                for name in [name for name, (depth, _) in variables.items() if depth > len(blocks)]:
+                    del variables[name]
+            elif text == '=' and scope is not None and index >= 3 and tokens[index - 2][1] in ('.', '?.') \
+                    and tokens[index - 3][1] in scope.loaded:
+                scope.writes = True
+            elif text == ';':
+                pending_type = False
+                if index >= loop_statement_end:
+                    loop_statement_end = -1
+            elif kind == 'ident' and text in TYPE_KEYWORDS:
+                pending_type = True
+            elif kind == 'ident' and text in LOOP_KEYWORDS and index + 1 < length:
+                header_end = index + 1
+                if text != 'do':
+                    if tokens[index + 1][1] != '(':
+                        index += 1
+                        continue
+                    header_end = skip_group(tokens, index + 1, '(', ')')
+                    if text == 'foreach' and scope is not None and header_end - 2 > index \
+                            and tokens[header_end - 3][1] == 'in' and tokens[header_end - 2][1] in scope.loaded:
+                        # foreach (var item in loaded) -> item is tracked too
+                        scope.loaded.add(tokens[header_end - 4][1])
+                if header_end < length and tokens[header_end][1] == '{':
+                    loop_header_end = header_end
+                elif text != 'do':
+                    # Single-statement body: runs to the next ';' outside parentheses
+                    end = header_end
+                    depth = 0
+                    while end < length and not (tokens[end][1] == ';' and depth == 0):
+                        depth += {'(': 1, ')': -1}.get(tokens[end][1], 0)
+                        end += 1
+                    loop_statement_end = max(loop_statement_end, end)
+            elif text in ('.', '?.') and index + 1 < length and tokens[index + 1][0] == 'ident':
+                member = tokens[index + 1][1]
+                if member in WRITES and scope is not None:
+                    scope.writes = True
+                if self._blocks_on_task(tokens, index, member):
+                    findings.append((tokens[index + 1][2], 'SyncOverAsync'))
+            if kind == 'ident':
+                self._query(tokens, index, variables, len(blocks), scope,
+                            open_loops > 0 or index < loop_statement_end, findings)
+            index += 1
+        return sorted(findings)
+
+    @staticmethod
+    def _blocks_on_task(tokens: List[Token], index: int, member: str) -> bool:
+        """``task.Result``, ``task.Wait()`` or ``GetAwaiter().GetResult()`` at the '.' at ``index``"""
+        after = tokens[index + 2][1] if index + 2 < len(tokens) else ''
+        if member == 'GetResult':
+            return after == '(' and index >= 3 and tokens[index - 3][1] == 'GetAwaiter'
+        if member not in ('Result', 'Wait') or (member == 'Result') == (after == '('):
+            return False
+        if member == 'Result' and after in ('=', '??='):
+            return False
+        receiver_kind, receiver, _ = tokens[index - 1]
+        return receiver == ')' or (receiver_kind == 'ident' and receiver.lower().endswith('task'))
+
+    def _query(self, tokens: List[Token], index: int, variables: Dict[str, Tuple[int, List[str]]], depth: int,
+               scope: Optional[MethodScope], in_loop: bool, findings: List[Tuple[int, str]]) -> None:
+        line = tokens[index][2]
+        entity, chain_start = self._root(tokens, index)
+        prior: List[str] = []
+        if entity is None:
+            text = tokens[index][1]
+            if text not in variables or index + 1 >= len(tokens) or tokens[index + 1][1] not in ('.', '?.') \
+                    or tokens[index - 1][1] in ('.', '?.'):
+                return
+            prior = variables[text][1]
+            chain_start = index + 1
+        calls, chain_end = self._chain(tokens, chain_start)
+        names = [call[0] for call in calls]
+
+        target = self._assigned_name(tokens, index)
+        if target is not None and all(name in QUERY_OPERATORS for name in names) \
+                and chain_end < len(tokens) and tokens[chain_end][1] == ';':
+            previous = variables.get(target)
+            variables[target] = (previous[0] if previous else depth, prior + names)
+            return
+
+        start = self._expression_start(tokens, index)
+        if in_loop and start > 0 and tokens[start - 1][1] == 'await':
+            findings.append((line, 'AwaitInLoop'))
+        for position, (name, _, _, call_line) in enumerate(calls):
+            if name in ('ToList', 'ToArray', 'AsEnumerable') and IN_MEMORY_AFTER & set(names[position + 1:]):
+                findings.append((call_line, 'EarlyMaterialization'))
+                break
+        applied = list(prior)
+        for name in names:
+            if name in MATERIALIZERS and not BOUNDS & set(applied):
+                findings.append((line, 'UnboundedQuery'))
+            if (name in MATERIALIZERS or name in SINGLE_RESULTS) and scope is not None \
+                    and not UNTRACKED & set(applied):
+                scope.untracked.append(line)
+                loaded = self._assigned_name(tokens, index, awaited=True)
+                if loaded is not None:
+                    scope.loaded.add(loaded)
+            if name in MATERIALIZERS or name in SINGLE_RESULTS:
+                break
+            applied.append(name)
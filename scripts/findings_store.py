@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Findings Store for BARQ Platform audits
+SQLite history of audit runs with findings deduplicated by fingerprint,
+an importer for existing audit CSVs and indexed count/top-file/trend queries
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from audit_diff import finding_fingerprint
+
+DEFAULT_DB = 'audit/findings.db'
+SEVERITIES = ('High', 'Medium', 'Low')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    tool TEXT NOT NULL,
+    source TEXT,
+    source_sha1 TEXT,
+    ordinal INTEGER NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS findings (
+    fingerprint TEXT PRIMARY KEY,
+    file TEXT NOT NULL,
+    type TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    description TEXT,
+    code TEXT
+);
+CREATE TABLE IF NOT EXISTS occurrences (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    fingerprint TEXT NOT NULL REFERENCES findings(fingerprint),
+    line INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_findings_severity ON findings(severity);
+CREATE INDEX IF NOT EXISTS idx_findings_type ON findings(type);
+CREATE INDEX IF NOT EXISTS idx_findings_file ON findings(file);
+CREATE INDEX IF NOT EXISTS idx_occurrences_run ON occurrences(run_id, fingerprint);
+CREATE INDEX IF NOT EXISTS idx_occurrences_fingerprint ON occurrences(fingerprint);
+CREATE INDEX IF NOT EXISTS idx_runs_ordinal ON runs(tool, ordinal);
+"""
+
+
+def natural_key(name: str) -> Tuple:
+    """Sort 'progress2' before 'progress10'; a bare 'progress' comes first"""
+    return tuple(int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name))
+
+
+def _sha1(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def guess_tool(name: str, fieldnames: List[str]) -> str:
+    if 'placeholder' in name:
+        return 'placeholder_sweep'
+    if 'frontend' in name:
+        return 'frontend_audit'
+    return 'backend_audit' if 'description' in fieldnames else 'placeholder_sweep'
+
+
+class FindingsStore:
+    """Runs, deduplicated findings and per-run occurrences in one SQLite file"""
+
+    def __init__(self, path: str = DEFAULT_DB):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute('PRAGMA foreign_keys = ON')
+        self.db.execute('PRAGMA journal_mode = WAL')
+        self.db.execute('PRAGMA synchronous = NORMAL')
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def record_run(self, name: str, tool: str, issues: Iterable[Dict], source: Optional[str] = None,
+                   source_sha1: Optional[str] = None) -> int:
+        """Store one run, replacing any earlier run of the same name"""
+        with self.db:
+            existing = self.db.execute('SELECT ordinal FROM runs WHERE name = ?', (name,)).fetchone()
+            self.db.execute('DELETE FROM runs WHERE name = ?', (name,))
+            if existing:
+                ordinal = existing[0]
+            else:
+                ordinal = self.db.execute('SELECT COALESCE(MAX(ordinal), 0) + 1 FROM runs WHERE tool = ?',
+                                          (tool,)).fetchone()[0]
+            run_id = self.db.execute(
+                'INSERT INTO runs (name, tool, source, source_sha1, ordinal, recorded_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (name, tool, source, source_sha1, ordinal, time.time())).lastrowid
+
+            findings = []
+            occurrences = []
+            for issue in issues:
+                fingerprint = finding_fingerprint(issue)
+                findings.append((fingerprint, issue['file'], issue['type'], issue['severity'],
+                                 issue.get('description', ''), issue.get('code', '')))
+                line = str(issue.get('line') or '0')
+                occurrences.append((run_id, fingerprint, int(line) if line.isdigit() else 0))
+            self.db.executemany('INSERT OR IGNORE INTO findings VALUES (?, ?, ?, ?, ?, ?)', findings)
+            self.db.executemany('INSERT INTO occurrences VALUES (?, ?, ?)', occurrences)
+        return run_id
+
+    def import_csv(self, path: str, tool: Optional[str] = None) -> Optional[int]:
+        """Import an audit CSV as a run named after the file; unchanged files are skipped"""
+        name = Path(path).stem
+        sha1 = _sha1(path)
+        row = self.db.execute('SELECT source_sha1 FROM runs WHERE name = ?', (name,)).fetchone()
+        if row and row[0] == sha1:
+            return None
+        with open(path, 'r', newline='', encoding='utf-8', errors='replace') as f:
+            reader = csv.DictReader(f)
+            # Truncated or hand-edited snapshots can hold partial rows
+            rows = (row for row in reader if row.get('file') and row.get('type') and row.get('severity'))
+            return self.record_run(name, tool or guess_tool(name, reader.fieldnames or []), rows,
+                                   source=path, source_sha1=sha1)
+
+    def resolve_run(self, run: Optional[str], tool: str) -> Optional[int]:
+        """Run id by name, or the latest run of ``tool`` when ``run`` is None"""
+        if run:
+            row = self.db.execute('SELECT id FROM runs WHERE name = ?', (run,)).fetchone()
+        else:
+            row = self.db.execute('SELECT id FROM runs WHERE tool = ? ORDER BY ordinal DESC LIMIT 1',
+                                  (tool,)).fetchone()
+        return row[0] if row else None
+
+    def runs(self) -> List[Tuple]:
+        return self.db.execute(
+            'SELECT r.name, r.tool, r.ordinal, COUNT(o.fingerprint) FROM runs r '
+            'LEFT JOIN occurrences o ON o.run_id = r.id GROUP BY r.id ORDER BY r.tool, r.ordinal').fetchall()
+
+    def counts(self, run_id: int, by: str = 'severity', severity: Optional[str] = None) -> List[Tuple]:
+        """Occurrence counts in one run grouped by severity, type or file"""
+        column = {'severity': 'f.severity', 'type': 'f.type', 'file': 'f.file'}[by]
+        where, params = self._filters(run_id, severity)
+        return self.db.execute(
+            f'SELECT {column}, COUNT(*) FROM occurrences o JOIN findings f USING (fingerprint) '
+            f'WHERE {where} GROUP BY {column} ORDER BY COUNT(*) DESC, {column}', params).fetchall()
+
+    def top_files(self, run_id: int, severity: Optional[str] = None, limit: int = 10) -> List[Tuple]:
+        """Files with the most findings in a run, with their High count"""
+        where, params = self._filters(run_id, severity)
+        return self.db.execute(
+            "SELECT f.file, COUNT(*), SUM(f.severity = 'High') FROM occurrences o JOIN findings f USING (fingerprint) "
+            f'WHERE {where} GROUP BY f.file ORDER BY COUNT(*) DESC, f.file LIMIT ?', params + [limit]).fetchall()
+
+    def trend(self, tool: str, severity: Optional[str] = None, finding_type: Optional[str] = None) -> List[Tuple]:
+        """Per-run finding counts for ``tool`` in run order"""
+        joins = ''
+        params: List = []
+        conditions = []
+        if severity or finding_type:
+            joins = 'JOIN findings f ON f.fingerprint = o.fingerprint'
+            if severity:
+                conditions.append('f.severity = ?')
+                params.append(severity)
+            if finding_type:
+                conditions.append('f.type = ?')
+                params.append(finding_type)
+        extra = ''.join(f' AND {condition}' for condition in conditions)
+        return self.db.execute(
+            f'SELECT r.name, (SELECT COUNT(*) FROM occurrences o {joins} WHERE o.run_id = r.id{extra}) '
+            'FROM runs r WHERE r.tool = ? ORDER BY r.ordinal', params + [tool]).fetchall()
+
+    @staticmethod
+    def _filters(run_id: int, severity: Optional[str]) -> Tuple[str, List]:
+        where = 'o.run_id = ?'
+        params: List = [run_id]
+        if severity:
+            where += ' AND f.severity = ?'
+            params.append(severity)
+        return where, params
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Audit Findings Store')
+    parser.add_argument('--db', default=DEFAULT_DB, help='SQLite database file')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    importer = commands.add_parser('import', help='Import audit CSVs as runs (named after the file)')
+    importer.add_argument('csv_files', nargs='+', help='Audit CSV files')
+    importer.add_argument('--tool', help='Tool name for every file (guessed from the name/header otherwise)')
+
+    commands.add_parser('runs', help='List stored runs')
+
+    counts = commands.add_parser('counts', help='Finding counts for one run')
+    counts.add_argument('--run', help='Run name (default: latest run of --tool)')
+    counts.add_argument('--tool', default='backend_audit', help='Tool whose latest run is used')
+    counts.add_argument('--by', choices=['severity', 'type', 'file'], default='severity')
+    counts.add_argument('--severity', choices=SEVERITIES)
+
+    top = commands.add_parser('top-files', help='Files with the most findings in one run')
+    top.add_argument('--run', help='Run name (default: latest run of --tool)')
+    top.add_argument('--tool', default='backend_audit', help='Tool whose latest run is used')
+    top.add_argument('--severity', choices=SEVERITIES)
+    top.add_argument('--limit', type=int, default=10)
+
+    trend = commands.add_parser('trend', help='Finding counts across runs')
+    trend.add_argument('--tool', default='backend_audit')
+    trend.add_argument('--severity', choices=SEVERITIES)
+    trend.add_argument('--type', dest='finding_type', help='Finding type, e.g. TenantGap')
+
+    args = parser.parse_args()
+    csv.field_size_limit(sys.maxsize)
+    store = FindingsStore(args.db)
+
+    if args.command == 'import':
+        started = time.perf_counter()
+        imported = skipped = 0
+        for path in sorted(args.csv_files, key=lambda p: natural_key(Path(p).stem)):
+            if store.import_csv(path, args.tool) is None:
+                skipped += 1
+            else:
+                imported += 1
+        print(f"Imported {imported} runs ({skipped} unchanged) into {args.db} "
+              f"in {time.perf_counter() - started:.2f}s")
+    elif args.command == 'runs':
+        for name, tool, ordinal, findings in store.runs():
+            print(f"  {ordinal:>4}  {tool:<18} {name:<40} {findings:>7}")
+    elif args.command == 'trend':
+        for name, count in store.trend(args.tool, args.severity, args.finding_type):
+            print(f"  {name:<40} {count:>7}")
+    else:
+        run_id = store.resolve_run(args.run, args.tool)
+        if run_id is None:
+            print(f"Error: no run found for {args.run or args.tool}")
+            sys.exit(1)
+        if args.command == 'counts':
+            for key, count in store.counts(run_id, args.by, args.severity):
+                print(f"  {key:<60} {count:>7}")
+        else:
+            for file, count, high in store.top_files(run_id, args.severity, args.limit):
+                print(f"  {file:<80} {count:>5} ({high} High)")
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Hot-spot Report for BARQ Platform
+Joins probe latency per route with static findings along each endpoint's
+code path (controller action and the service methods it calls) and ranks
+endpoints by p95 latency x request weight
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from audit_rules import PERFORMANCE_RULES
+from audit_walk import SourceTree
+from csharp_analyzer import Token, tokenize, skip_group
+from load_generator import build_mix, load_weights, route_key
+
+FIELDNAMES = ['rank', 'method', 'route', 'controller', 'action', 'p95_ms', 'weight', 'score',
+              'high', 'medium', 'low', 'performance', 'code_path', 'top_findings']
+SEVERITY_ORDER = {'High': 0, 'Medium': 1, 'Low': 2}
+TYPE_KEYWORDS = ('class', 'interface', 'record', 'struct')
+
+
+class Member:
+    """A method body: its line range and the calls it makes"""
+
+    def __init__(self, name: str, start: int):
+        self.name = name
+        self.start = start
+        self.end = start
+        # (field or None for this class, method name)
+        self.calls: Set[Tuple[Optional[str], str]] = set()
+
+
+class ClassInfo:
+    def __init__(self, name: str, file: str, bases: List[str]):
+        self.name = name
+        self.file = file
+        self.bases = bases
+        self.fields: Dict[str, str] = {}
+        self.members: Dict[str, List[Member]] = {}
+
+
+class CodeIndex:
+    """Classes under a source root with field types, member line ranges and calls.
+
+    Files are listed and read through ``source``, so under barq_audit the
+    tree the other tools already walked and decoded is reused.
+    """
+
+    def __init__(self, src_dir: str, source: Optional[SourceTree] = None):
+        self.src_dir = Path(src_dir)
+        self.source = source or SourceTree(shared=False)
+        self.classes: Dict[str, List[ClassInfo]] = {}
+        self.implementations: Dict[str, List[ClassInfo]] = {}
+        for _, path in self.source.files(str(self.src_dir), ['cs']):
+            try:
+                tokens = tokenize(self.source.read(path))
+            except (OSError, UnicodeDecodeError):
+                continue
+            self._index(tokens, path.relative_to(self.src_dir).as_posix())
+        for infos in self.classes.values():
+            for info in infos:
+                for base in info.bases:
+                    self.implementations.setdefault(base, []).append(info)
+
+    def _index(self, tokens: List[Token], file: str) -> None:
+        # Open blocks: a ClassInfo, a Member, or None for any other block
+        stack: List[object] = []
+        length = len(tokens)
+        index = 0
+        while index < length:
+            kind, text, line = tokens[index]
+            owner = stack[-1] if stack else None
+            member = next((item for item in reversed(stack) if isinstance(item, Member)), None)
+            if text == '[' and isinstance(owner, ClassInfo):
+                # Attributes on members
+                index = skip_group(tokens, index, '[', ']')
+                continue
+            elif text == '{':
+                stack.append(None)
+            elif text == '}':
+                popped = stack.pop() if stack else None
+                if isinstance(popped, Member):
+                    popped.end = line
+            elif kind == 'ident' and text in TYPE_KEYWORDS and index + 1 < length and tokens[index + 1][0] == 'ident' \
+                    and member is None:
+                index = self._class(tokens, index, file, stack)
+                continue
+            elif isinstance(owner, ClassInfo) and kind == 'ident' and index + 1 < length \
+                    and tokens[index + 1][1] == '(' and tokens[index - 1][1] not in ('.', 'new'):
+                index = self._member(tokens, index, owner, stack)
+                continue
+            elif isinstance(owner, ClassInfo) and text in (';', '=') and tokens[index - 1][0] == 'ident' \
+                    and tokens[index - 2][0] == 'ident':
+                owner.fields[tokens[index - 1][1]] = tokens[index - 2][1]
+            elif member is not None and kind == 'ident' and index + 1 < length:
+                self._call(tokens, index, member)
+            index += 1
+
+    @staticmethod
+    def _call(tokens: List[Token], index: int, member: Member) -> None:
+        """Record ``field.Method(`` and ``Method(`` calls"""
+        if tokens[index + 1][1] in ('.', '?.') and tokens[index - 1][1] not in ('.', '?.'):
+            if index + 3 < len(tokens) and tokens[index + 2][0] == 'ident' and tokens[index + 3][1] == '(':
+                member.calls.add((tokens[index][1], tokens[index + 2][1]))
+        elif tokens[index + 1][1] == '(' and tokens[index - 1][1] not in ('.', '?.', 'new'):
+            member.calls.add((None, tokens[index][1]))
+
+    def _class(self, tokens: List[Token], index: int, file: str, stack: List[object]) -> int:
+        name = tokens[index + 1][1]
+        bases = []
+        index += 2
+        expect_base = False
+        depth = 0
+        while index < len(tokens) and tokens[index][1] not in ('{', ';'):
+            text = tokens[index][1]
+            if text == '<':
+                depth += 1
+            elif text == '>':
+                depth -= 1
+            elif text == 'where' and depth == 0:
+                expect_base = False
+            elif depth == 0 and text in (':', ','):
+                expect_base = True
+            elif expect_base and depth == 0 and tokens[index][0] == 'ident':
+                # Keep the last part of a qualified name
+                if index + 1 < len(tokens) and tokens[index + 1][1] == '.':
+                    index += 1
+                    continue
+                bases.append(text)
+                expect_base = False
+            index += 1
+        info = ClassInfo(name, file, bases)
+        self.classes.setdefault(name, []).append(info)
+        if index < len(tokens) and tokens[index][1] == '{':
+            stack.append(info)
+            index += 1
+        return index
+
+    def _member(self, tokens: List[Token], index: int, owner: ClassInfo, stack: List[object]) -> int:
+        member = Member(tokens[index][1], tokens[index][2])
+        position = skip_group(tokens, index + 1, '(', ')')
+        # Skip constraints and base constructor calls up to the body
+        while position < len(tokens) and tokens[position][1] not in ('{', '=>', ';'):
+            if tokens[position][1] == '(':
+                position = skip_group(tokens, position, '(', ')')
+                continue
+            position += 1
+        if position >= len(tokens) or tokens[position][1] == ';':
+            return position
+        owner.members.setdefault(member.name, []).append(member)
+        if tokens[position][1] == '{':
+            stack.append(member)
+            return position + 1
+        # Expression body: runs to the ';' outside any brackets
+        depth = 0
+        position += 1
+        while position < len(tokens) and not (tokens[position][1] == ';' and depth == 0):
+            text = tokens[position][1]
+            if text in ('(', '{', '['):
+                depth += 1
+            elif text in (')', '}', ']'):
+                depth -= 1
+            elif tokens[position][0] == 'ident' and position + 1 < len(tokens):
+                self._call(tokens, position, member)
+            position += 1
+        member.end = tokens[min(position, len(tokens) - 1)][2]
+        return position
+
+    def find_class(self, name: str, file_hint: Optional[str] = None) -> Optional[ClassInfo]:
+        infos = self.classes.get(name, [])
+        if file_hint:
+            hinted = [info for info in infos if info.file.endswith(file_hint) or file_hint.endswith(info.file)]
+            infos = hinted or infos
+        return infos[0] if infos else None
+
+    def code_path(self, info: ClassInfo, method: str, line: Optional[int] = None,
+                  depth: int = 2) -> List[Tuple[ClassInfo, Member]]:
+        """The action's member plus the members it reaches through injected fields, ``depth`` calls deep"""
+        members = info.members.get(method, [])
+        if line is not None and len(members) > 1:
+            members = sorted(members, key=lambda m: abs(m.start - line))[:1]
+        path = [(info, member) for member in members[:1] or members]
+        seen = {(info.file, member.start) for _, member in path}
+        frontier = list(path)
+        for _ in range(depth):
+            following = []
+            for owner, member in frontier:
+                for field, called in sorted(member.calls, key=lambda call: (call[0] or '', call[1])):
+                    if field is None:
+                        targets = [owner]
+                    else:
+                        field_type = owner.fields.get(field)
+                        if field_type is None:
+                            continue
+                        targets = self.implementations.get(field_type, []) + self.classes.get(field_type, [])
+                    for target in targets:
+                        for candidate in target.members.get(called, []):
+                            key = (target.file, candidate.start)
+                            if key not in seen:
+                                seen.add(key)
+                                following.append((target, candidate))
+            path.extend(following)
+            frontier = following
+        return path
+
+
+def read_latency(path: str) -> Dict[str, Dict]:
+    """Worst p95 (or single latency) per 'METHOD route' from an api_probe or replay CSV"""
+    latency: Dict[str, Dict] = {}
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if not row.get('method') or not row.get('route'):
+                continue
+            value = row.get('p95_ms') or row.get('latency_ms')
+            if not value or row.get('error') == 'CircuitOpen':
+                continue
+            key = route_key(row)
+            entry = latency.setdefault(key, {'method': row['method'].upper(), 'route': row['route'],
+                                             'controller': row.get('controller', ''),
+                                             'action': row.get('action', ''), 'p95_ms': 0.0, 'requests': 0})
+            entry['p95_ms'] = max(entry['p95_ms'], float(value))
+            entry['requests'] += int(row.get('requests') or 0)
+    return latency
+
+
+class FindingIndex:
+    """Audit findings keyed by the source file they belong to"""
+
+    def __init__(self, path: str):
+        self.by_name: Dict[str, List[Dict]] = {}
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                if not row.get('file'):
+                    continue
+                row['file'] = row['file'].replace('\\', '/')
+                row['line'] = int(row.get('line') or 0)
+                self.by_name.setdefault(row['file'].rsplit('/', 1)[-1], []).append(row)
+
+    def within(self, file: str, start: int, end: int) -> List[Dict]:
+        """Findings in ``file`` (matched by path suffix, as reports use different roots) between the lines"""
+        return [row for row in self.by_name.get(file.rsplit('/', 1)[-1], [])
+                if (row['file'].endswith(file) or file.endswith(row['file'])) and start <= row['line'] <= end]
+
+
+def finding_rank(row: Dict) -> tuple:
+    return row['type'] not in PERFORMANCE_RULES, SEVERITY_ORDER.get(row['severity'], 3), row['file'], row['line']
+
+
+def build_hotspots(latency: Dict[str, Dict], routes: List[Dict], weights: Dict, index: CodeIndex,
+                   findings: FindingIndex, depth: int = 2) -> List[Dict]:
+    by_key = {route_key(route_info): route_info for route_info in routes}
+    hotspots = []
+    for key, entry in latency.items():
+        route_info = by_key.get(key, {})
+        controller = route_info.get('controller') or entry['controller']
+        action = route_info.get('action') or entry['action']
+        mix = build_mix([{'controller': controller, 'method': entry['method'], 'route': entry['route']}], weights)
+        if weights:
+            weight = mix[0][1] if mix else 0.0
+        else:
+            # A replay report's request counts are the observed traffic mix
+            weight = float(entry['requests'] or 1)
+        if weight <= 0:
+            continue
+
+        path = []
+        info = index.find_class(f"{controller}Controller", route_info.get('file'))
+        if info is not None and action:
+            path = index.code_path(info, action, route_info.get('line'), depth)
+        rows = []
+        for owner, member in path:
+            rows.extend(findings.within(owner.file, member.start, member.end))
+        rows.sort(key=finding_rank)
+        severities = Counter(row['severity'] for row in rows)
+        hotspots.append({
+            'method': entry['method'], 'route': entry['route'], 'controller': controller, 'action': action,
+            'p95_ms': round(entry['p95_ms'], 1), 'weight': weight,
+            'score': round(entry['p95_ms'] * weight, 1),
+            'high': severities['High'], 'medium': severities['Medium'], 'low': severities['Low'],
+            'performance': sum(1 for row in rows if row['type'] in PERFORMANCE_RULES),
+            'code_path': ' -> '.join(f"{owner.name}.{member.name}" for owner, member in path),
+            'top_findings': '; '.join(f"{row['severity']} {row['type']} {row['file']}:{row['line']}" for row in rows[:5]),
+            'findings': rows
+        })
+    hotspots.sort(key=lambda h: (-h['score'], -h['high'], h['route'], h['method']))
+    for rank, hotspot in enumerate(hotspots, 1):
+        hotspot['rank'] = rank
+    return hotspots
+
+
+def main(argv: Optional[List[str]] = None, source: Optional[SourceTree] = None):
+    parser = argparse.ArgumentParser(description='Latency x Findings Hot-spot Report')
+    parser.add_argument('--api', default='audit/audit_api.csv', help='api_probe or probe_replay latency CSV')
+    parser.add_argument('--findings', default='audit/audit_backend.csv', help='backend_audit findings CSV')
+    parser.add_argument('--routes', default='controller_routes.json', help='controller_routes.py output')
+    parser.add_argument('--src', default='Backend/src', help='Backend source root')
+    parser.add_argument('--weights', help='Weights JSON as used by load_generator (default: replay request '
+                                          'counts if present, else 1 per route)')
+    parser.add_argument('--depth', type=int, default=2, help='Service calls followed from each action')
+    parser.add_argument('--out', default='audit/hotspots.csv', help='Output CSV file')
+    parser.add_argument('--top', type=int, default=10, help='Endpoints shown in the summary')
+    args = parser.parse_args(argv)
+
+    for path in (args.api, args.findings, args.src):
+        if not os.path.exists(path):
+            print(f"Error: {path} does not exist")
+            sys.exit(1)
+
+    routes = []
+    if os.path.exists(args.routes):
+        with open(args.routes, 'r', encoding='utf-8') as f:
+            routes = json.load(f)
+    else:
+        print(f"Warning: {args.routes} not found, controller files are found by name")
+
+    index = CodeIndex(args.src, source)
+    hotspots = build_hotspots(read_latency(args.api), routes, load_weights(args.weights), index,
+                              FindingIndex(args.findings), args.depth)
+
+    directory = os.path.dirname(args.out)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.out, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(hotspots)
+
+    print(f"Hot spots ({len(hotspots)} endpoints, score = p95 x weight):")
+    for hotspot in hotspots[:args.top]:
+        print(f"\n{hotspot['rank']:>3}. {hotspot['method']} {hotspot['route']}  p95={hotspot['p95_ms']}ms "
+              f"x {hotspot['weight']:g} = {hotspot['score']:g}")
+        if hotspot['code_path']:
+            print(f"     path: {hotspot['code_path']}")
+        for row in hotspot['findings'][:5]:
+            print(f"     {row['severity']:<6} {row['type']:<20} {row['file']}:{row['line']}  {row['code'][:80]}")
+    print(f"\nReport saved to: {args.out}")
+
+
+if __name__ == '__main__':
+    main()
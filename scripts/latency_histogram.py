@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Latency Histogram for BARQ Platform probes
+HDR-style log-linear buckets that are compact, mergeable and serialisable
+"""
+
+import math
+from typing import Dict, Iterable, Optional, Tuple
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class LatencyHistogram:
+    """Records latencies in microsecond buckets with bounded relative error.
+
+    Values below ``sub_bucket_count`` microseconds are stored exactly; above
+    that every power-of-two range is split into ``sub_bucket_count / 2``
+    linear buckets, so the relative error stays under 10^-significant_digits.
+    Counts are kept sparse, so an idle histogram costs a few bytes.
+
+    Censored samples (requests that timed out) are recorded at the timeout;
+    their real latency is at least that, so percentiles that reach them are
+    only lower bounds.
+    """
+
+    def __init__(self, significant_digits: int = 2):
+        if not 1 <= significant_digits <= 4:
+            raise ValueError('significant_digits must be between 1 and 4')
+        self.significant_digits = significant_digits
+        self.sub_bucket_bits = math.ceil(math.log2(2 * 10 ** significant_digits))
+        self.sub_bucket_half = 1 << (self.sub_bucket_bits - 1)
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.sum_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us: Optional[int] = None
+        self.censored = 0
+        self.censored_min_us: Optional[int] = None
+
+    def _index(self, value_us: int) -> int:
+        bucket = max(0, value_us.bit_length() - self.sub_bucket_bits)
+        return bucket * self.sub_bucket_half + (value_us >> bucket)
+
+    def _highest_equivalent(self, index: int) -> int:
+        bucket = max(0, (index >> (self.sub_bucket_bits - 1)) - 1)
+        sub_bucket = index - bucket * self.sub_bucket_half
+        return (sub_bucket << bucket) + (1 << bucket) - 1
+
+    def record(self, latency_ms: float, count: int = 1, censored: bool = False) -> None:
+        """Record a latency given in milliseconds; ``censored`` marks a timeout"""
+        value_us = max(0, int(round(latency_ms * 1000)))
+        if censored:
+            self.censored += count
+            self.censored_min_us = value_us if self.censored_min_us is None else min(self.censored_min_us, value_us)
+        index = self._index(value_us)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total += count
+        self.sum_us += value_us * count
+        self.min_us = value_us if self.min_us is None else min(self.min_us, value_us)
+        self.max_us = value_us if self.max_us is None else max(self.max_us, value_us)
+
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        """Add another histogram's counts into this one"""
+        if other.significant_digits != self.significant_digits:
+            raise ValueError('Cannot merge histograms with different precision')
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        self.sum_us += other.sum_us
+        if other.min_us is not None:
+            self.min_us = other.min_us if self.min_us is None else min(self.min_us, other.min_us)
+            self.max_us = other.max_us if self.max_us is None else max(self.max_us, other.max_us)
+        if other.censored:
+            self.censored += other.censored
+            self.censored_min_us = other.censored_min_us if self.censored_min_us is None \
+                else min(self.censored_min_us, other.censored_min_us)
+        return self
+
+    def _rank_bucket(self, percentile: float) -> int:
+        """Bucket index holding the sample at ``percentile``"""
+        rank = max(1, math.ceil(self.total * percentile / 100.0))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return index
+        return self._index(self.max_us)
+
+    def percentile(self, percentile: float) -> float:
+        """Latency in ms at or below which ``percentile`` percent of samples fall"""
+        if not self.total:
+            return 0.0
+        value_us = min(self._highest_equivalent(self._rank_bucket(percentile)), self.max_us)
+        return round(value_us / 1000.0, 2)
+
+    def is_lower_bound(self, percentile: float) -> bool:
+        """Whether the percentile may land on a timed-out sample, so the real value is at least this"""
+        if not self.censored or not self.total:
+            return False
+        return self._rank_bucket(percentile) >= self._index(self.censored_min_us)
+
+    def percentile_interval(self, percentile: float, z: float = 1.96) -> Tuple[float, float]:
+        """Distribution-free confidence interval for a percentile.
+
+        Uses the binomial order-statistic ranks n*q +/- z*sqrt(n*q*(1-q)), so
+        small sample counts give wide intervals and single samples collapse to
+        the observed value.
+        """
+        if not self.total:
+            return 0.0, 0.0
+        q = percentile / 100.0
+        spread = z * math.sqrt(self.total * q * (1 - q))
+        low = max(0.0, (self.total * q - spread) / self.total * 100)
+        high = min(100.0, (self.total * q + spread) / self.total * 100)
+        return self.percentile(low), self.percentile(high)
+
+    @property
+    def mean(self) -> float:
+        return round(self.sum_us / self.total / 1000.0, 2) if self.total else 0.0
+
+    @property
+    def max(self) -> float:
+        return round(self.max_us / 1000.0, 2) if self.max_us is not None else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        """Percentile summary keyed like the probe CSV columns"""
+        summary = {'samples': self.total}
+        for percentile in PERCENTILES:
+            summary[f'p{percentile}_ms'] = self.percentile(percentile)
+        summary['max_ms'] = self.max
+        summary['timeouts'] = self.censored
+        summary['lower_bound'] = ','.join(f'p{p}' for p in PERCENTILES if self.is_lower_bound(p))
+        return summary
+
+    def to_dict(self) -> Dict:
+        """Compact JSON-friendly representation"""
+        return {
+            'significant_digits': self.significant_digits,
+            'total': self.total,
+            'sum_us': self.sum_us,
+            'min_us': self.min_us,
+            'max_us': self.max_us,
+            'counts': sorted(self.counts.items()),
+            'censored': self.censored,
+            'censored_min_us': self.censored_min_us
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'LatencyHistogram':
+        histogram = cls(data.get('significant_digits', 2))
+        histogram.counts = {int(index): int(count) for index, count in data.get('counts', [])}
+        histogram.total = data.get('total', sum(histogram.counts.values()))
+        histogram.sum_us = data.get('sum_us', 0)
+        histogram.min_us = data.get('min_us')
+        histogram.max_us = data.get('max_us')
+        histogram.censored = data.get('censored', 0)
+        histogram.censored_min_us = data.get('censored_min_us')
+        return histogram
+
+    @classmethod
+    def merged(cls, histograms: Iterable['LatencyHistogram'], significant_digits: int = 2) -> 'LatencyHistogram':
+        """Merge any number of histograms into a new one"""
+        result = cls(significant_digits)
+        for histogram in histograms:
+            result.merge(histogram)
+        return result
+
+
+def record_result(histogram: LatencyHistogram, result: Dict) -> None:
+    """Record a probe result: responses at their latency, timeouts at the timeout
+    as a lower bound; connection errors carry no latency and are skipped"""
+    if result['status_code'] != 0:
+        histogram.record(result['latency_ms'])
+    elif result.get('error') == 'Timeout':
+        histogram.record(result['latency_ms'], censored=True)
+
+
+def format_percentile(summary: Dict, percentile: int) -> str:
+    """'p95' value for printing, prefixed with '>=' when it is a lower bound"""
+    bound = f'p{percentile}' in summary.get('lower_bound', '').split(',')
+    return f"{'>=' if bound else ''}{summary[f'p{percentile}_ms']}"
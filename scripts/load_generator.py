@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Open-loop Load Generator for BARQ Platform
+Drives a constant arrival rate over a weighted route mix using ApiProber
+"""
+
+import bisect
+import csv
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
+
+from latency_histogram import LatencyHistogram, PERCENTILES
+
+
+def route_key(route_info: Dict) -> str:
+    """Key used for per-route weights and results, e.g. 'GET /api/files/{fileId}'"""
+    return f"{route_info['method'].upper()} {route_info['route']}"
+
+
+def load_weights(weights_file: Optional[str]) -> Dict:
+    """Load a weights file: {"default": 1, "controllers": {...}, "routes": {"GET /api/x": 5}}"""
+    if not weights_file:
+        return {}
+    with open(weights_file, 'r') as f:
+        return json.load(f)
+
+
+def build_mix(routes: List[Dict], weights: Dict) -> List[tuple]:
+    """Resolve each route's weight; a route weight overrides its controller's weight"""
+    default = weights.get('default', 1)
+    controllers = weights.get('controllers', {})
+    route_weights = weights.get('routes', {})
+
+    mix = []
+    for route_info in routes:
+        weight = route_weights.get(route_key(route_info),
+                                   controllers.get(route_info['controller'], default))
+        if weight > 0:
+            mix.append((route_info, float(weight)))
+    return mix
+
+
+def _new_route(route_info: Dict) -> Dict:
+    return {
+        'controller': route_info['controller'],
+        'method': route_info['method'].upper(),
+        'route': route_info['route'],
+        'requests': 0,
+        'errors': 0,
+        'histogram': LatencyHistogram()
+    }
+
+
+def _new_window() -> Dict:
+    return {'requests': 0, 'errors': 0, 'histogram': LatencyHistogram()}
+
+
+class _Delta:
+    """Per-route and per-interval counts recorded since the last drain"""
+
+    def __init__(self):
+        self.routes: Dict[str, Dict] = {}
+        self.intervals: Dict[int, Dict] = {}
+        self.service = LatencyHistogram()
+
+
+class LoadStep:
+    """Latency and throughput accounting for one target rate"""
+
+    def __init__(self, rate: float, interval: float, index: int = 0):
+        self.rate = rate
+        self.index = index
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.sent = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+        self.service = LatencyHistogram()
+        self.routes: Dict[str, Dict] = {}
+        self.intervals: Dict[int, Dict] = {}
+        self.pending = _Delta()
+        self.started = 0.0
+        self.elapsed = 0.0
+
+    def record(self, route_info: Dict, offset: float, latency_ms: float, result: Dict) -> None:
+        failed = result['status_code'] == 0 or result['status_code'] >= 500
+        bucket = int(offset // self.interval)
+        with self.lock:
+            for state in (self, self.pending):
+                route = state.routes.setdefault(route_key(route_info), _new_route(route_info))
+                window = state.intervals.setdefault(bucket, _new_window())
+                for counts in (route, window):
+                    counts['requests'] += 1
+                    counts['errors'] += failed
+                    counts['histogram'].record(latency_ms)
+                state.service.record(result['latency_ms'])
+            self.errors += failed
+            self.latency.record(latency_ms)
+
+    def drain(self) -> Dict:
+        """Serialise and reset everything recorded since the previous drain"""
+        with self.lock:
+            pending, self.pending = self.pending, _Delta()
+        return {
+            'routes': {key: dict(route, histogram=route['histogram'].to_dict())
+                       for key, route in pending.routes.items()},
+            'intervals': {str(bucket): dict(window, histogram=window['histogram'].to_dict())
+                          for bucket, window in pending.intervals.items()},
+            'service': pending.service.to_dict()
+        }
+
+    def merge(self, delta: Dict) -> None:
+        """Fold a drained delta (possibly from another process) into this step"""
+        with self.lock:
+            for key, route in delta['routes'].items():
+                histogram = LatencyHistogram.from_dict(route['histogram'])
+                target = self.routes.setdefault(key, _new_route(route))
+                target['requests'] += route['requests']
+                target['errors'] += route['errors']
+                target['histogram'].merge(histogram)
+            for bucket, window in delta['intervals'].items():
+                histogram = LatencyHistogram.from_dict(window['histogram'])
+                target = self.intervals.setdefault(int(bucket), _new_window())
+                target['requests'] += window['requests']
+                target['errors'] += window['errors']
+                target['histogram'].merge(histogram)
+                self.errors += window['errors']
+                self.latency.merge(histogram)
+            self.service.merge(LatencyHistogram.from_dict(delta['service']))
+
+    @property
+    def completed(self) -> int:
+        return self.latency.total
+
+    def summary(self) -> Dict:
+        summary = {
+            'target_rps': self.rate,
+            'sent': self.sent,
+            'completed': self.completed,
+            'errors': self.errors,
+            'error_rate': round(self.errors / max(1, self.completed), 4),
+            'achieved_rps': round(self.completed / self.elapsed, 2) if self.elapsed else 0.0
+        }
+        summary.update(self.latency.summary())
+        summary['service_p99_ms'] = self.service.percentile(99)
+        return summary
+
+
+class LoadGenerator:
+    """Open-loop load generator.
+
+    Sends are scheduled on a fixed timeline derived from the target rate, so a
+    slow response never delays the next send. Latency is measured from the
+    intended send time, which charges queueing delay to the server instead of
+    silently dropping it (coordinated omission).
+    """
+
+    def __init__(self, prober, routes: List[Dict], weights: Optional[Dict] = None,
+                 max_in_flight: int = 200, arrival: str = 'constant',
+                 seed: Optional[int] = None, interval: float = 1.0):
+        self.prober = prober
+        self.mix = build_mix(routes, weights or {})
+        if not self.mix:
+            raise ValueError('Route mix is empty (all weights are zero)')
+        self.cumulative = []
+        total = 0.0
+        for _, weight in self.mix:
+            total += weight
+            self.cumulative.append(total)
+        self.max_in_flight = max_in_flight
+        self.arrival = arrival
+        self.random = random.Random(seed)
+        self.interval = interval
+        self.steps: List[LoadStep] = []
+        self.current: Optional[LoadStep] = None
+
+    def pick_route(self) -> Dict:
+        point = self.random.random() * self.cumulative[-1]
+        return self.mix[bisect.bisect_right(self.cumulative, point)][0]
+
+    def _send(self, step: LoadStep, route_info: Dict, intended: float) -> None:
+        result = self.prober.probe_route(route_info)
+        latency_ms = (time.perf_counter() - intended) * 1000
+        step.record(route_info, intended - step.started, latency_ms, result)
+
+    def run(self, rate: float, duration: float) -> LoadStep:
+        """Run one constant-rate step for ``duration`` seconds"""
+        step = LoadStep(rate, self.interval, index=len(self.steps))
+        self.current = step
+        period = 1.0 / rate
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            step.started = time.perf_counter()
+            end = step.started + duration
+            intended = step.started
+            while intended < end:
+                delay = intended - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self._send, step, self.pick_route(), intended)
+                step.sent += 1
+                if self.arrival == 'poisson':
+                    intended += self.random.expovariate(rate)
+                else:
+                    intended += period
+        step.elapsed = time.perf_counter() - step.started
+
+        self.steps.append(step)
+        return step
+
+    def run_steps(self, rates: List[float], duration: float,
+                  slo_p99_ms: Optional[float] = None, max_error_rate: float = 0.01) -> Optional[float]:
+        """Run increasing rate steps; return the first rate that breaks the SLO"""
+        for rate in rates:
+            print(f"Load step: {rate} req/s for {duration}s...")
+            step = self.run(rate, duration)
+            summary = step.summary()
+            print(f"  sent={summary['sent']} achieved={summary['achieved_rps']} req/s "
+                  f"p50={summary['p50_ms']}ms p99={summary['p99_ms']}ms "
+                  f"errors={summary['error_rate']:.2%}")
+
+            if breaks_slo(step, slo_p99_ms, max_error_rate):
+                return rate
+        return None
+
+    def generate_report(self, output_file: str) -> None:
+        """Per-step, per-route CSV report"""
+        write_load_report(self.steps, output_file)
+
+    def generate_timeseries(self, output_file: str) -> None:
+        """Per-interval CSV time series across all steps"""
+        write_timeseries(self.steps, output_file)
+
+
+def breaks_slo(step: LoadStep, slo_p99_ms: Optional[float] = None, max_error_rate: float = 0.01) -> bool:
+    """Whether a step exceeded the error budget or the p99 SLO"""
+    summary = step.summary()
+    return summary['error_rate'] > max_error_rate or bool(slo_p99_ms and summary['p99_ms'] > slo_p99_ms)
+
+
+def print_load_summary(steps: List[LoadStep], slo_p99_ms: Optional[float] = None,
+                       max_error_rate: float = 0.01) -> None:
+    """Print one line per step and the first rate that broke the SLO"""
+    print(f"\nLoad Summary:")
+    for step in steps:
+        summary = step.summary()
+        print(f"  {summary['target_rps']:>8} req/s -> {summary['achieved_rps']} req/s, "
+              f"p50={summary['p50_ms']}ms p95={summary['p95_ms']}ms p99={summary['p99_ms']}ms "
+              f"max={summary['max_ms']}ms errors={summary['errors']}")
+    for step in steps:
+        if breaks_slo(step, slo_p99_ms, max_error_rate):
+            print(f"  SLO broken at {step.rate} req/s")
+            break
+
+
+def write_load_report(steps: List[LoadStep], output_file: str) -> None:
+    """Write per-step, per-route latency percentiles"""
+    with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+        fieldnames = ['target_rps', 'controller', 'method', 'route', 'requests', 'errors'] + \
+            [f'p{p}_ms' for p in PERCENTILES] + ['max_ms']
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore')
+
+        writer.writeheader()
+        for step in steps:
+            for key in sorted(step.routes):
+                route = step.routes[key]
+                row = dict(route, target_rps=step.rate)
+                row.update(route['histogram'].summary())
+                writer.writerow(row)
+
+
+def write_timeseries(steps: List[LoadStep], output_file: str) -> None:
+    """Write per-interval latency percentiles for every step"""
+    with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+        fieldnames = ['target_rps', 'second', 'requests', 'errors'] + \
+            [f'p{p}_ms' for p in PERCENTILES] + ['max_ms']
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore')
+
+        writer.writeheader()
+        for step in steps:
+            for bucket in sorted(step.intervals):
+                window = step.intervals[bucket]
+                row = {'target_rps': step.rate, 'second': round(bucket * step.interval, 3),
+                       'requests': window['requests'], 'errors': window['errors']}
+                row.update(window['histogram'].summary())
+                writer.writerow(row)
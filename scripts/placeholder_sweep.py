@@ -5,153 +5,202 @@ Sweeps Backend + Frontend for NotImplemented/TODO/MOCK patterns
 """
 
 import os
-import re
-import csv
 import sys
+import argparse
+import time
+from collections import Counter
 from pathlib import Path
-from typing import List, Dict
+from functools import partial
+from typing import List, Dict, Optional
+from audit_rules import PLACEHOLDER_RULES
+from audit_walk import SourceTree
+from audit_cache import ScanCache, code_fingerprint, scan_with_cache
+from audit_diff import ChangeSet, read_report, merge_findings, diff_findings, write_delta, print_delta
+from report_writer import FORMATS, ReportWriter
+from audit_profile import Profiler, finish, rule_engine
+
+FIELDNAMES = ['file', 'line', 'severity', 'type', 'code']
+
+def sweep_file(file_path: Path, base_dir: Path, engine, source: SourceTree, profiler: Profiler) -> List[Dict]:
+    """Scan a single file for placeholder patterns.
+
+    A module-level function, so parallel scans ship only the engine and
+    the source tree to each worker, not the sweeper and its findings.
+    """
+    issues = []
+    start = time.perf_counter()
+    content = ''
+    
+    try:
+        with profiler.phase('read'):
+            content = source.read(file_path)
+            
+        with profiler.phase('match'):
+            for line_num, line, fired in engine.scan(content):
+                for pattern_name in fired:
+                    pattern_info = engine.rules[pattern_name]
+                    issues.append({
+                        'file': str(file_path.relative_to(base_dir)),
+                        'line': line_num,
+                        'severity': pattern_info['severity'],
+                        'type': pattern_name,
+                        'code': line.strip()
+                    })
+                    
+    except Exception as e:
+        issues.append({
+            'file': str(file_path.relative_to(base_dir)),
+            'line': 0,
+            'severity': 'Low',
+            'type': 'ScanError',
+            'code': f'Failed to scan: {str(e)}'
+        })
+        
+    profiler.file(file_path, time.perf_counter() - start, content.count('\n') + 1)
+    return issues
 
 class PlaceholderSweeper:
-    def __init__(self):
+    def __init__(self, jobs: int = 1, cache_file: Optional[str] = None, report: Optional[ReportWriter] = None,
+                 profiler: Optional[Profiler] = None, source: Optional[SourceTree] = None):
         self.issues = []
+        self.report = report
+        self.streamed = Counter()
+        self.jobs = jobs
+        self.scanned_files = 0
+        self.touched = set()
+        self.profiler = profiler or Profiler('placeholder_sweep', enabled=False)
+        self.source = source or SourceTree(shared=False)
+        self.engine = rule_engine(PLACEHOLDER_RULES, self.profiler)
+        fingerprint = f'placeholder_sweep:{self.engine.fingerprint}:{code_fingerprint(__file__)}'
+        self.cache = ScanCache(cache_file, fingerprint) if cache_file else None
         
-    def scan_file(self, file_path: Path, base_dir: Path) -> List[Dict]:
-        """Scan a single file for placeholder patterns"""
-        issues = []
-        
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                lines = content.split('\n')
-                
-            patterns = {
-                'NotImplemented': {
-                    'regex': r'(NotImplementedException|throw new NotImplementedException|NotImplemented)',
-                    'severity': 'High'
-                },
-                'TODO': {
-                    'regex': r'(TODO|FIXME|HACK|XXX|BUG)',
-                    'severity': 'Medium'
-                },
-                'Mock': {
-                    'regex': r'(Mock\w+|\.Mock|MockService|FakeService|DummyService|TestService)',
-                    'severity': 'High'
-                },
-                'Placeholder': {
-                    'regex': r'(placeholder|stub|dummy|temp|temporary|sample)',
-                    'severity': 'Medium'
-                },
-                'TaskFromResult': {
-                    'regex': r'Task\.FromResult\(',
-                    'severity': 'Medium'
-                },
-                'EmptyImplementation': {
-                    'regex': r'(return\s+null;|return\s+default;|return\s+new\s+\w+\(\);)',
-                    'severity': 'Medium'
-                },
-                'ConsoleLog': {
-                    'regex': r'console\.(log|warn|error|debug)',
-                    'severity': 'Low'
-                },
-                'DebugCode': {
-                    'regex': r'(System\.Diagnostics\.Debug|Console\.WriteLine|console\.log)',
-                    'severity': 'Low'
-                }
-            }
-            
-            for line_num, line in enumerate(lines, 1):
-                for pattern_name, pattern_info in patterns.items():
-                    if re.search(pattern_info['regex'], line, re.IGNORECASE):
-                        issues.append({
-                            'file': str(file_path.relative_to(base_dir)),
-                            'line': line_num,
-                            'severity': pattern_info['severity'],
-                            'type': pattern_name,
-                            'code': line.strip()
-                        })
-                        
-        except Exception as e:
-            issues.append({
-                'file': str(file_path.relative_to(base_dir)),
-                'line': 0,
-                'severity': 'Low',
-                'type': 'ScanError',
-                'code': f'Failed to scan: {str(e)}'
-            })
-            
-        return issues
-    
-    def scan_directory(self, directory: str, file_extensions: List[str]) -> None:
-        """Scan directory for files with specified extensions"""
+    def scan_directory(self, directory: str, file_extensions: List[str],
+                       changes: Optional[ChangeSet] = None) -> None:
+        """Scan directory for files with specified extensions, or only those in ``changes``"""
         base_dir = Path(directory)
         
-        for ext in file_extensions:
-            files = list(base_dir.rglob(f'*.{ext}'))
-            
-            for file_path in files:
-                parts = set(map(str.lower, file_path.parts))
-                if parts & {'node_modules','bin','obj','.git','dist','build'}:
-                    continue
-                    
-                file_issues = self.scan_file(file_path, base_dir)
-                self.issues.extend(file_issues)
+        with self.profiler.phase('walk'):
+            paths = [file_path for _, file_path in self.source.files(base_dir, file_extensions)]
+        if changes is not None:
+            paths = changes.select(paths)
+            self.touched |= changes.touched(base_dir)
+        self.scanned_files += len(paths)
+        
+        scan = partial(sweep_file, base_dir=base_dir, engine=self.engine, source=self.source, profiler=self.profiler)
+        # Workers inherit files decoded here, so a shared tree reads each file once
+        prepare = self.source.preload if self.jobs != 1 else None
+        for file_issues in scan_with_cache(scan, paths, self.jobs, self.cache, prepare):
+            self.add_issues(file_issues)
+    
+    def add_issues(self, issues: List[Dict]) -> None:
+        """Hand findings to the streaming report if there is one, else keep them"""
+        if self.report is None:
+            self.issues.extend(issues)
+            return
+        for issue in issues:
+            self.streamed[issue['severity']] += 1
+        self.report.add_many(issues)
     
     def generate_report(self, output_file: str) -> None:
         """Generate CSV report"""
-        with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['file', 'line', 'severity', 'type', 'code']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            writer.writeheader()
-            order = {'High':0,'Medium':1,'Low':2}
-            for issue in sorted(self.issues, key=lambda x: (order.get(x['severity'],3), x['file'], x['line'])):
-                writer.writerow(issue)
+        with ReportWriter(output_file, FIELDNAMES, 'csv') as report:
+            report.add_many(self.issues)
     
     def get_summary(self) -> Dict[str, int]:
         """Get summary statistics"""
-        summary = {'High': 0, 'Medium': 0, 'Low': 0}
+        summary = {'High': self.streamed['High'], 'Medium': self.streamed['Medium'], 'Low': self.streamed['Low']}
         for issue in self.issues:
             summary[issue['severity']] += 1
         return summary
 
-def main():
-    if len(sys.argv) < 3:
-        print("Usage: python3 placeholder_sweep.py <backend_dir> <frontend_dir> [output_file]")
-        sys.exit(1)
+def main(argv: Optional[List[str]] = None, source: Optional[SourceTree] = None):
+    parser = argparse.ArgumentParser(description='Placeholder Sweep')
+    parser.add_argument('backend_dir', help='Backend directory to scan')
+    parser.add_argument('frontend_dir', help='Frontend directory to scan')
+    parser.add_argument('output_file', nargs='?', default='audit/audit_placeholders.csv', help='Output report (.csv, .jsonl or .sarif, .gz for gzip)')
+    parser.add_argument('--format', choices=FORMATS, help='Report format (default: from the output file extension)')
+    parser.add_argument('--order', choices=['severity', 'scan'], default='severity',
+                        help='Sort by severity/file/line, or write findings as soon as they are found')
+    parser.add_argument('--changed-since', metavar='REF',
+                        help='Scan only files changed since REF and merge with --baseline-report')
+    parser.add_argument('--baseline-report', help='Full sweep CSV for the base branch (used with --changed-since)')
+    parser.add_argument('--delta-out', help='CSV of new and fixed findings (used with --changed-since)')
+    parser.add_argument('--cache', help='Incremental scan cache file (JSON, .gz for gzip)')
+    parser.add_argument('--jobs', type=int, default=1, help='Scan files in this many processes (0 = one per CPU)')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='Write a JSON profile of phase, rule and per-file costs (scans serially)')
+    
+    args = parser.parse_args(argv)
+    backend_dir = args.backend_dir
+    frontend_dir = args.frontend_dir
+    output_file = args.output_file
     
-    backend_dir = sys.argv[1]
-    frontend_dir = sys.argv[2]
-    output_file = sys.argv[3] if len(sys.argv) > 3 else 'audit/audit_placeholders.csv'
+    changes = None
+    if args.changed_since:
+        if not args.baseline_report or not os.path.exists(args.baseline_report):
+            print(f"Error: --changed-since needs an existing --baseline-report")
+            sys.exit(1)
+        try:
+            changes = ChangeSet(args.changed_since)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
     
-    sweeper = PlaceholderSweeper()
+    profiler = Profiler('placeholder_sweep', enabled=bool(args.profile))
+    if args.profile and args.jobs != 1:
+        # Worker processes would keep their timings to themselves
+        print(f"Note: --profile scans in a single process")
+        args.jobs = 1
+    
+    report = ReportWriter(output_file, FIELDNAMES, args.format, args.order, 'placeholder_sweep', PLACEHOLDER_RULES)
+    # Full sweeps stream findings straight into the report; PR sweeps merge with the baseline first
+    sweeper = PlaceholderSweeper(args.jobs, args.cache, report if changes is None else None, profiler, source)
     
     if os.path.exists(backend_dir):
         print(f"Scanning backend directory: {backend_dir}")
-        sweeper.scan_directory(backend_dir, ['cs'])
+        sweeper.scan_directory(backend_dir, ['cs'], changes)
     else:
         print(f"Warning: Backend directory {backend_dir} does not exist")
     
     if os.path.exists(frontend_dir):
         print(f"Scanning frontend directory: {frontend_dir}")
-        sweeper.scan_directory(frontend_dir, ['ts', 'tsx', 'js', 'jsx'])
+        sweeper.scan_directory(frontend_dir, ['ts', 'tsx', 'js', 'jsx'], changes)
     else:
         print(f"Warning: Frontend directory {frontend_dir} does not exist")
     
-    output_dir = os.path.dirname(output_file)
-    if output_dir and output_dir.strip() != '':
-        os.makedirs(output_dir, exist_ok=True)
-    sweeper.generate_report(output_file)
+    if sweeper.cache is not None:
+        with profiler.phase('write'):
+            sweeper.cache.save(prune=changes is None)
+    
+    if changes is not None:
+        baseline = read_report(args.baseline_report)
+        new, fixed = diff_findings(baseline, sweeper.issues, sweeper.touched)
+        sweeper.issues = merge_findings(baseline, sweeper.issues, sweeper.touched)
+        report.add_many(sweeper.issues)
+    with profiler.phase('write'):
+        report.close()
     
     summary = sweeper.get_summary()
     print(f"\nPlaceholder Sweep Complete:")
     print(f"  High: {summary['High']}")
     print(f"  Medium: {summary['Medium']}")
     print(f"  Low: {summary['Low']}")
-    print(f"  Total: {len(sweeper.issues)}")
+    print(f"  Total: {sum(summary.values())}")
+    if sweeper.cache is not None:
+        print(f"  Cache: {sweeper.cache.hits} unchanged, {sweeper.cache.misses} scanned")
     print(f"Report saved to: {output_file}")
+    if changes is not None:
+        print_delta(args.changed_since, sweeper.scanned_files, new, fixed)
+        if args.delta_out:
+            write_delta(args.delta_out, new, fixed, FIELDNAMES)
+            print(f"Delta saved to: {args.delta_out}")
+    if args.profile:
+        finish(profiler, args.profile)
     
-    if summary['High'] > 0:
-        print(f"FAIL: Found {summary['High']} high severity placeholder issues")
+    # Outside PR mode every finding counts as new for the High gate
+    new_high = len([issue for issue in new if issue['severity'] == 'High']) if changes is not None else summary['High']
+    if new_high > 0:
+        print(f"FAIL: Found {new_high} {'new ' if changes is not None else ''}high severity placeholder issues")
         sys.exit(1)
     
     sys.exit(0)
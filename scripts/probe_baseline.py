@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Latency Baseline Store for BARQ Platform probes
+Keeps recent per-route latency histograms and flags p95 / error-rate regressions
+"""
+
+import gzip
+import json
+import math
+import os
+import tempfile
+import time
+from typing import List, Dict, Optional
+
+from latency_histogram import LatencyHistogram, record_result
+from load_generator import route_key
+
+STORE_VERSION = 1
+
+
+def _open(path: str, mode: str, compressed: bool):
+    if compressed:
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def route_stats(results: List[Dict]) -> Dict[str, Dict]:
+    """Per-route sample count, error count and latency histogram from probe results"""
+    stats = {}
+    for result in results:
+        histogram = result.get('histogram')
+        if histogram is None:
+            histogram = LatencyHistogram()
+            record_result(histogram, result)
+        failed = int(result['status_code'] == 0 or result['status_code'] >= 500)
+        route = stats.setdefault(route_key(result), {'samples': 0, 'errors': 0, 'histogram': LatencyHistogram()})
+        route['samples'] += result.get('samples', 1)
+        route['errors'] += result.get('errors', failed)
+        route['histogram'].merge(histogram)
+    for route in stats.values():
+        route['histogram'] = route['histogram'].to_dict()
+    return stats
+
+
+class BaselineStore:
+    """JSON (optionally gzipped) file holding the last ``max_runs`` probe runs.
+
+    The baseline for a route is the merge of its histograms across stored
+    runs, so every saved run narrows the noise band of later comparisons.
+    """
+
+    def __init__(self, path: str, max_runs: int = 10):
+        self.path = path
+        self.max_runs = max_runs
+        self.runs: List[Dict] = []
+        if os.path.exists(path):
+            with _open(path, 'r', path.endswith('.gz')) as f:
+                data = json.load(f)
+            if data.get('version') == STORE_VERSION:
+                self.runs = data.get('runs', [])
+
+    def add_run(self, results: List[Dict], run_id: Optional[str] = None) -> None:
+        self.runs.append({
+            'id': run_id or time.strftime('%Y%m%dT%H%M%S'),
+            'timestamp': time.time(),
+            'routes': route_stats(results)
+        })
+        self.runs = self.runs[-self.max_runs:]
+
+    def save(self) -> None:
+        """Write atomically so an interrupted run never corrupts the store"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        os.close(fd)
+        with _open(tmp_path, 'w', self.path.endswith('.gz')) as f:
+            json.dump({'version': STORE_VERSION, 'runs': self.runs}, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def baseline(self) -> Dict[str, Dict]:
+        """Merged per-route statistics across all stored runs"""
+        merged = {}
+        for run in self.runs:
+            for key, stats in run['routes'].items():
+                route = merged.setdefault(key, {'samples': 0, 'errors': 0, 'histogram': LatencyHistogram()})
+                route['samples'] += stats['samples']
+                route['errors'] += stats['errors']
+                route['histogram'].merge(LatencyHistogram.from_dict(stats['histogram']))
+        return merged
+
+
+def _error_rate_regressed(base_errors: int, base_samples: int, errors: int, samples: int,
+                          threshold: float, min_samples: int, z: float = 1.645) -> bool:
+    """Error rate grew by more than ``threshold`` and, with enough samples, significantly so"""
+    base_rate = base_errors / max(1, base_samples)
+    rate = errors / max(1, samples)
+    if rate - base_rate <= threshold:
+        return False
+    if base_samples < min_samples or samples < min_samples:
+        return True
+    pooled = (base_errors + errors) / (base_samples + samples)
+    spread = math.sqrt(pooled * (1 - pooled) * (1 / base_samples + 1 / samples))
+    return spread == 0 or (rate - base_rate) / spread > z
+
+
+def compare(baseline: Dict[str, Dict], results: List[Dict], p95_threshold: float = 0.2,
+            min_delta_ms: float = 5.0, error_threshold: float = 0.05,
+            min_samples: int = 5) -> List[Dict]:
+    """Return one entry per route whose p95 or error rate regressed.
+
+    A p95 regression needs two things. The lower confidence bound of the
+    current p95 must exceed the upper bound of the baseline p95 by more than
+    ``p95_threshold`` (relative). The point estimates must also differ by at
+    least ``min_delta_ms``. Single-sample routes therefore degrade to a plain
+    threshold check.
+    """
+    regressions = []
+    for key, current in route_stats(results).items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        base_histogram = base['histogram']
+        histogram = LatencyHistogram.from_dict(current['histogram'])
+        base_p95 = base_histogram.percentile(95)
+        p95 = histogram.percentile(95)
+        reasons = []
+
+        if histogram.total and base_histogram.total:
+            _, base_high = base_histogram.percentile_interval(95)
+            low, _ = histogram.percentile_interval(95)
+            if low > base_high * (1 + p95_threshold) and p95 - base_p95 >= min_delta_ms:
+                reasons.append(f"p95 {base_p95}ms -> {p95}ms")
+
+        if _error_rate_regressed(base['errors'], base['samples'], current['errors'], current['samples'],
+                                 error_threshold, min_samples):
+            reasons.append(f"error rate {base['errors'] / max(1, base['samples']):.1%} -> "
+                           f"{current['errors'] / max(1, current['samples']):.1%}")
+
+        if reasons:
+            regressions.append({'route': key, 'baseline_p95_ms': base_p95, 'p95_ms': p95,
+                                'reason': '; '.join(reasons)})
+    return regressions
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Sharded Load Coordinator for BARQ Platform
+Splits an open-loop load run across worker processes (optionally on other
+hosts) and merges their streamed per-interval histograms into one report
+
+Local try-out against the stand-in server:
+    python3 scripts/probe_standin.py --port 5099 --distribution exponential --latency-ms 20 &
+    python3 scripts/probe_coordinator.py run http://127.0.0.1:5099 controller_routes.json \\
+        audit/load.csv --workers 4 --rate 200,400 --load-duration 10
+"""
+
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import sys
+import threading
+from typing import List, Dict, Optional
+
+from load_generator import (LoadGenerator, LoadStep, breaks_slo, build_mix, load_weights, print_load_summary,
+                            write_load_report, write_timeseries)
+
+WORKER_SCRIPT = os.path.abspath(__file__)
+
+
+def shard_jobs(routes: List[Dict], weights: Dict, rates: List[float], workers: int,
+               shard_by: str = 'rate') -> List[Dict]:
+    """Split the load into per-worker route lists and target rates.
+
+    ``rate`` gives every worker the full mix at rate/N. ``routes`` partitions
+    the weighted mix (heaviest routes first, onto the lightest shard) and
+    scales each shard's rate by its share of the total weight.
+    """
+    if shard_by == 'rate':
+        return [{'routes': routes, 'rates': [rate / workers for rate in rates]} for _ in range(workers)]
+
+    mix = sorted(build_mix(routes, weights), key=lambda item: -item[1])
+    shards = [{'routes': [], 'weight': 0.0} for _ in range(workers)]
+    for route_info, weight in mix:
+        shard = min(shards, key=lambda s: s['weight'])
+        shard['routes'].append(route_info)
+        shard['weight'] += weight
+
+    total = sum(shard['weight'] for shard in shards)
+    return [{'routes': shard['routes'], 'rates': [rate * shard['weight'] / total for rate in rates]}
+            for shard in shards if shard['routes']]
+
+
+class LoadCoordinator:
+    """Runs sharded workers and merges their interval histograms"""
+
+    def __init__(self, base_url: str, routes: List[Dict], weights: Optional[Dict] = None,
+                 workers: int = 2, shard_by: str = 'rate', hosts: Optional[List[str]] = None,
+                 remote_command: Optional[str] = None, timeout: int = 10, max_in_flight: int = 200,
+                 arrival: str = 'constant', seed: Optional[int] = None, interval: float = 1.0,
+                 fixtures: Optional[Dict] = None):
+        self.base_url = base_url
+        self.routes = routes
+        self.weights = weights or {}
+        self.workers = max(1, workers)
+        self.shard_by = shard_by
+        self.hosts = hosts or ['local']
+        self.remote_command = remote_command
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.arrival = arrival
+        self.seed = seed
+        self.interval = interval
+        self.fixtures = fixtures
+        self.steps: List[LoadStep] = []
+
+    def worker_command(self, index: int) -> List[str]:
+        host = self.hosts[index % len(self.hosts)]
+        if host == 'local':
+            return [sys.executable, WORKER_SCRIPT, 'worker']
+        if not self.remote_command:
+            raise ValueError(f'--remote-command is required for host {host}')
+        return shlex.split(self.remote_command.format(host=host)) + ['worker']
+
+    def run(self, rates: List[float], duration: float,
+            slo_p99_ms: Optional[float] = None) -> List[LoadStep]:
+        """Run the rate steps on all workers and merge the results.
+
+        Workers wait for the coordinator between steps; once a merged step
+        breaks the SLO, no further step is started and only the steps run
+        so far are returned.
+        """
+        self.steps = [LoadStep(rate, self.interval, index=i) for i, rate in enumerate(rates)]
+        jobs = shard_jobs(self.routes, self.weights, rates, self.workers, self.shard_by)
+        done = threading.Condition()
+        # Per worker: index of the last step it finished, and whether its output has ended
+        finished = [-1] * len(jobs)
+        exited = [False] * len(jobs)
+
+        def collect(index: int, proc: subprocess.Popen) -> None:
+            try:
+                for line in proc.stdout:
+                    message = json.loads(line)
+                    step = self.steps[message['step']]
+                    if message['type'] == 'interval':
+                        step.merge(message['delta'])
+                    elif message['type'] == 'step':
+                        with done:
+                            step.sent += message['sent']
+                            step.elapsed = max(step.elapsed, message['elapsed'])
+                            finished[index] = message['step']
+                            done.notify_all()
+            finally:
+                with done:
+                    exited[index] = True
+                    done.notify_all()
+
+        procs = []
+        readers = []
+        print(f"Starting {len(jobs)} workers ({self.shard_by} sharding)...")
+        for index, job in enumerate(jobs):
+            job.update({
+                'base_url': self.base_url,
+                'weights': self.weights,
+                'duration': duration,
+                'timeout': self.timeout,
+                'max_in_flight': self.max_in_flight,
+                'arrival': self.arrival,
+                'seed': None if self.seed is None else self.seed + index,
+                'interval': self.interval,
+                'fixtures': self.fixtures
+            })
+            proc = subprocess.Popen(self.worker_command(index), stdin=subprocess.PIPE,
+                                    stdout=subprocess.PIPE, text=True)
+            proc.stdin.write(json.dumps(job) + '\n')
+            proc.stdin.flush()
+            reader = threading.Thread(target=collect, args=(index, proc), daemon=True)
+            reader.start()
+            procs.append(proc)
+            readers.append(reader)
+
+        ran = len(self.steps)
+        for index, step in enumerate(self.steps):
+            with done:
+                done.wait_for(lambda: all(last >= index or gone for last, gone in zip(finished, exited)))
+            stop = breaks_slo(step, slo_p99_ms) and index + 1 < len(self.steps)
+            if stop:
+                ran = index + 1
+            for proc in procs:
+                try:
+                    if stop or index + 1 == len(self.steps):
+                        proc.stdin.close()
+                    else:
+                        proc.stdin.write('next\n')
+                        proc.stdin.flush()
+                except (BrokenPipeError, OSError):
+                    pass
+            if stop:
+                break
+
+        failures = []
+        for index, (proc, reader) in enumerate(zip(procs, readers)):
+            proc.wait()
+            reader.join()
+            if proc.returncode != 0:
+                failures.append(f'worker {index} exited with {proc.returncode}')
+        if failures:
+            raise RuntimeError('; '.join(failures))
+
+        self.steps = self.steps[:ran]
+        return self.steps
+
+
+def run_worker() -> None:
+    """Worker entry point: read a job from stdin, stream JSON lines to stdout.
+
+    After each step the worker waits for a 'next' line before starting the
+    following one; end of input stops it.
+    """
+    from api_probe import ApiProber
+    from probe_fixtures import ProbeFixtures
+
+    job = json.loads(sys.stdin.readline())
+    fixtures = ProbeFixtures(job['fixtures'], job['base_url'], job['timeout']) if job.get('fixtures') else None
+    prober = ApiProber(job['base_url'], job['timeout'], pool_size=job['max_in_flight'], fixtures=fixtures)
+    generator = LoadGenerator(prober, job['routes'], job['weights'], max_in_flight=job['max_in_flight'],
+                              arrival=job['arrival'], seed=job['seed'], interval=job['interval'])
+    lock = threading.RLock()
+    finished = threading.Event()
+
+    def emit(message: Dict) -> None:
+        with lock:
+            sys.stdout.write(json.dumps(message, separators=(',', ':')) + '\n')
+            sys.stdout.flush()
+
+    def flush(step: LoadStep) -> None:
+        # Drain and write under one lock so no interval lands after its step's 'step' message
+        with lock:
+            emit({'type': 'interval', 'step': step.index, 'delta': step.drain()})
+
+    def flush_intervals() -> None:
+        while not finished.wait(job['interval']):
+            step = generator.current
+            if step is not None:
+                flush(step)
+
+    flusher = threading.Thread(target=flush_intervals, daemon=True)
+    flusher.start()
+    for index, rate in enumerate(job['rates']):
+        if index and sys.stdin.readline().strip() != 'next':
+            break
+        step = generator.run(rate, job['duration'])
+        flush(step)
+        emit({'type': 'step', 'step': step.index, 'sent': step.sent, 'elapsed': step.elapsed})
+    finished.set()
+    flusher.join()
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'worker':
+        run_worker()
+        return
+
+    parser = argparse.ArgumentParser(description='Sharded load coordinator')
+    parser.add_argument('command', choices=['run'], help='Coordinator command')
+    parser.add_argument('base_url', help='Base URL of the API')
+    parser.add_argument('routes_file', help='JSON file containing routes')
+    parser.add_argument('output_file', help='Output CSV file')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='Number of worker processes')
+    parser.add_argument('--shard-by', choices=['rate', 'routes'], default='rate',
+                       help='Split the target rate or the route list across workers')
+    parser.add_argument('--hosts', help="Comma-separated worker hosts ('local' runs a local process)")
+    parser.add_argument('--remote-command',
+                       help="Command template for remote workers, e.g. 'ssh {host} python3 barq/scripts/probe_coordinator.py'")
+    parser.add_argument('--rate', required=True, help='Total target req/s, or comma-separated steps')
+    parser.add_argument('--load-duration', type=float, default=30, help='Seconds per load step')
+    parser.add_argument('--weights', help='JSON weights per controller/route for the load mix')
+    parser.add_argument('--arrival', choices=['constant', 'poisson'], default='constant',
+                       help='Inter-arrival distribution')
+    parser.add_argument('--max-in-flight', type=int, default=200, help='Concurrent requests cap per worker')
+    parser.add_argument('--timeout', type=int, default=10, help='Request timeout in seconds')
+    parser.add_argument('--slo-p99', type=float, help='p99 latency SLO in ms; load steps stop once it is broken')
+    parser.add_argument('--timeseries-out', help='Merged per-second time series CSV')
+    parser.add_argument('--seed', type=int, help='Base random seed (worker i uses seed + i)')
+    parser.add_argument('--fixtures', help='JSON fixtures shipped to every worker (parameters and auth)')
+
+    args = parser.parse_args()
+
+    try:
+        with open(args.routes_file, 'r') as f:
+            routes = json.load(f)
+    except Exception as e:
+        print(f"Error loading routes file: {e}")
+        sys.exit(1)
+
+    fixtures = None
+    if args.fixtures:
+        with open(args.fixtures, 'r') as f:
+            fixtures = json.load(f)
+
+    coordinator = LoadCoordinator(args.base_url, routes, load_weights(args.weights), workers=args.workers,
+                                  shard_by=args.shard_by, hosts=args.hosts.split(',') if args.hosts else None,
+                                  remote_command=args.remote_command, timeout=args.timeout,
+                                  max_in_flight=args.max_in_flight, arrival=args.arrival, seed=args.seed,
+                                  fixtures=fixtures)
+    rates = [float(rate) for rate in args.rate.split(',')]
+    try:
+        steps = coordinator.run(rates, args.load_duration, slo_p99_ms=args.slo_p99)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    write_load_report(steps, args.output_file)
+    if args.timeseries_out:
+        write_timeseries(steps, args.timeseries_out)
+
+    print_load_summary(steps, slo_p99_ms=args.slo_p99)
+    print(f"Report saved to: {args.output_file}")
+
+
+if __name__ == '__main__':
+    main()
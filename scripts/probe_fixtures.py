@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Probe Fixtures for BARQ Platform
+Fills route template parameters from configurable data sources and
+provides cached bearer tokens so probes reach the real handlers
+
+Example fixtures file:
+    {
+      "parameters": {
+        "fileId": {"request": "GET /api/files", "field": "data.items.0.id"},
+        "tenantId": "${BARQ_PROBE_TENANT_ID}",
+        "id": ["3f2c...", "9a41..."],
+        "userId": {"csv": "fixtures/users.csv", "column": "id"}
+      },
+      "routes": {
+        "GET /api/translations/{id}": {"id": "welcome.title"}
+      },
+      "auth": {
+        "login_path": "/api/auth/login",
+        "body": {"userName": "${BARQ_PROBE_USER}", "email": "${BARQ_PROBE_EMAIL}",
+                 "password": "${BARQ_PROBE_PASSWORD}"},
+        "token_field": "data.token",
+        "expires_field": "data.expiresAt"
+      }
+    }
+"""
+
+import csv
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from urllib.parse import quote, urljoin
+
+import requests
+
+PARAMETER_PATTERN = re.compile(r'\{\*?([A-Za-z_][A-Za-z0-9_]*)(?::[^}]*)?\??\}')
+ENV_PATTERN = re.compile(r'\$\{([A-Za-z_][A-Za-z0-9_]*)\}')
+DEFAULT_REFRESH_MARGIN = 60
+DEFAULT_TOKEN_LIFETIME = 15 * 60
+
+
+def expand_env(value):
+    """Substitute ${VAR} references, recursively through lists and dicts"""
+    if isinstance(value, str):
+        return ENV_PATTERN.sub(lambda m: os.environ.get(m.group(1), ''), value)
+    if isinstance(value, list):
+        return [expand_env(item) for item in value]
+    if isinstance(value, dict):
+        return {key: expand_env(item) for key, item in value.items()}
+    return value
+
+
+def pluck(data, field: str):
+    """Follow a dotted path such as 'data.items.0.id' through JSON data"""
+    for part in field.split('.'):
+        if isinstance(data, list):
+            data = data[int(part)] if part.isdigit() and int(part) < len(data) else None
+        elif isinstance(data, dict):
+            data = data.get(part, data.get(part[:1].upper() + part[1:]))
+        else:
+            return None
+        if data is None:
+            return None
+    return data
+
+
+def _parse_expiry(value) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        # Small numbers are lifetimes in seconds, large ones epoch timestamps
+        return time.time() + value if value < 10 ** 9 else float(value)
+    text = str(value).replace('Z', '+00:00')
+    # .NET emits seven fractional digits; fromisoformat accepts at most six
+    text = re.sub(r'(\.\d{6})\d+', r'\1', text)
+    parsed = datetime.fromisoformat(text)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class TokenProvider:
+    """Logs in once and shares the bearer token across every session.
+
+    The token is refreshed ``refresh_margin`` seconds before it expires, or
+    immediately after the API rejects it.
+    """
+
+    def __init__(self, base_url: str, config: Dict, timeout: int = 10):
+        self.base_url = base_url.rstrip('/')
+        self.login_path = config.get('login_path', '/api/auth/login')
+        self.body = config.get('body', {})
+        self.token_field = config.get('token_field', 'data.token')
+        self.expires_field = config.get('expires_field', 'data.expiresAt')
+        self.refresh_margin = config.get('refresh_margin_seconds', DEFAULT_REFRESH_MARGIN)
+        self.static_token = config.get('token')
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.token: Optional[str] = None
+        self.expires_at = 0.0
+        self.logins = 0
+
+    def _login(self) -> None:
+        url = urljoin(self.base_url + '/', self.login_path.lstrip('/'))
+        response = requests.post(url, json=self.body, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        token = pluck(data, self.token_field)
+        if not token:
+            raise RuntimeError(f"Login response has no '{self.token_field}' field")
+        self.token = token
+        expires_at = _parse_expiry(pluck(data, self.expires_field))
+        self.expires_at = expires_at or time.time() + DEFAULT_TOKEN_LIFETIME
+        self.logins += 1
+
+    def get_token(self) -> str:
+        if self.static_token:
+            return self.static_token
+        with self.lock:
+            if self.token is None or time.time() >= self.expires_at - self.refresh_margin:
+                self._login()
+            return self.token
+
+    def invalidate(self, token: str) -> None:
+        """Drop a token the API rejected, unless another thread already replaced it"""
+        with self.lock:
+            if self.token == token:
+                self.token = None
+
+    def headers(self) -> Dict[str, str]:
+        return {'Authorization': f'Bearer {self.get_token()}'}
+
+
+class ProbeFixtures:
+    """Resolves route template parameters and authentication for probes"""
+
+    def __init__(self, config: Dict, base_url: str, timeout: int = 10):
+        config = expand_env(config)
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.route_values: Dict[str, Dict] = config.get('routes', {})
+        self.auth = TokenProvider(base_url, config['auth'], timeout) if config.get('auth') else None
+        self.lock = threading.Lock()
+        self.sources: Dict[str, Dict] = config.get('parameters', {})
+        self.cycles: Dict[str, itertools.cycle] = {}
+
+    @classmethod
+    def from_file(cls, path: str, base_url: str, timeout: int = 10) -> 'ProbeFixtures':
+        with open(path, 'r') as f:
+            return cls(json.load(f), base_url, timeout)
+
+    def _load_values(self, source) -> List[str]:
+        """Materialise a parameter source into its list of candidate values"""
+        if isinstance(source, list):
+            return [str(value) for value in source]
+        if not isinstance(source, dict):
+            return [str(source)]
+        if 'csv' in source:
+            with open(source['csv'], 'r', newline='', encoding='utf-8') as f:
+                return [row[source['column']] for row in csv.DictReader(f) if row.get(source['column'])]
+        if 'request' in source:
+            method, path = source['request'].split(' ', 1)
+            headers = self.auth.headers() if self.auth else None
+            response = requests.request(method, urljoin(self.base_url + '/', path.lstrip('/')),
+                                        headers=headers, timeout=self.timeout)
+            response.raise_for_status()
+            value = pluck(response.json(), source['field'])
+            return [str(value)] if value is not None else []
+        return [str(source['value'])] if 'value' in source else []
+
+    def value_for(self, name: str) -> Optional[str]:
+        """Next value for a parameter, rotating through multi-valued sources"""
+        with self.lock:
+            if name not in self.cycles:
+                source = self.sources.get(name)
+                if source is None:
+                    # Route parameters are matched case-insensitively by ASP.NET
+                    source = next((s for key, s in self.sources.items() if key.lower() == name.lower()), None)
+                values = self._load_values(source) if source is not None else []
+                self.cycles[name] = itertools.cycle(values) if values else None
+            cycle = self.cycles[name]
+            return next(cycle) if cycle else None
+
+    def resolve(self, route_info: Dict) -> tuple:
+        """Return the concrete path for a route and the names it could not fill"""
+        overrides = self.route_values.get(f"{route_info['method'].upper()} {route_info['route']}", {})
+        missing = []
+
+        def substitute(match):
+            name = match.group(1)
+            value = overrides.get(name)
+            if value is None:
+                value = self.value_for(name)
+            if value is None:
+                missing.append(name)
+                return match.group(0)
+            return quote(str(value), safe='')
+
+        return PARAMETER_PATTERN.sub(substitute, route_info['route']), missing
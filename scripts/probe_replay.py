@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Traffic Replay for BARQ Platform probes
+Streams recorded requests from access logs or HAR files and replays them
+on their original timeline, reporting latency per route template
+"""
+
+import csv
+import gzip
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Iterator, List, Dict, Optional
+from urllib.parse import urlsplit
+
+from latency_histogram import PERCENTILES
+from load_generator import LoadStep
+
+# host ident user [10/Oct/2000:13:55:36 -0700] "GET /path HTTP/1.1" ...
+CLF_PATTERN = re.compile(r'^\S+ \S+ \S+ \[([^\]]+)\] "(\S+) (\S+)(?: [^"]*)?"')
+CLF_TIME_FORMAT = '%d/%b/%Y:%H:%M:%S %z'
+HAR_ENTRIES = re.compile(r'"entries"\s*:\s*\[')
+HAR_SEPARATOR = re.compile(r'[\s,]*')
+HAR_CHUNK_SIZE = 1024 * 1024
+REPLAYED_HEADERS = {'content-type', 'accept', 'accept-language'}
+
+
+def _open_text(path: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+
+def _timestamp(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+def _path_of(url: str) -> str:
+    parts = urlsplit(url)
+    return parts.path + (f'?{parts.query}' if parts.query else '')
+
+
+def read_access_log(path: str) -> Iterator[Dict]:
+    """Yield requests from a Common/Combined log, one line at a time"""
+    with _open_text(path) as f:
+        for line in f:
+            match = CLF_PATTERN.match(line)
+            if not match:
+                continue
+            yield {
+                'timestamp': datetime.strptime(match.group(1), CLF_TIME_FORMAT).timestamp(),
+                'method': match.group(2).upper(),
+                'path': match.group(3)
+            }
+
+
+def read_jsonl_log(path: str) -> Iterator[Dict]:
+    """Yield requests from a JSON-lines log with timestamp/method/path(or url)/body fields"""
+    with _open_text(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            yield {
+                'timestamp': _timestamp(record['timestamp']),
+                'method': record['method'].upper(),
+                'path': record.get('path') or _path_of(record['url']),
+                'body': record.get('body'),
+                'headers': record.get('headers')
+            }
+
+
+def read_har(path: str) -> Iterator[Dict]:
+    """Yield requests from a HAR file without loading the whole document.
+
+    The file is read in chunks; each element of ``log.entries`` is decoded
+    with ``raw_decode`` as soon as it is complete and then dropped.
+    """
+    decoder = json.JSONDecoder()
+    with _open_text(path) as f:
+        buffer = ''
+        while True:
+            match = HAR_ENTRIES.search(buffer)
+            if match:
+                buffer = buffer[match.end():]
+                break
+            chunk = f.read(HAR_CHUNK_SIZE)
+            if not chunk:
+                return
+            buffer = buffer[-64:] + chunk
+
+        position = 0
+        while True:
+            position = HAR_SEPARATOR.match(buffer, position).end()
+            if buffer.startswith(']', position):
+                return
+            try:
+                entry, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                chunk = f.read(HAR_CHUNK_SIZE)
+                if not chunk:
+                    return
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+
+            request = entry['request']
+            headers = {h['name']: h['value'] for h in request.get('headers', [])
+                       if h['name'].lower() in REPLAYED_HEADERS}
+            yield {
+                'timestamp': _timestamp(entry['startedDateTime']),
+                'method': request['method'].upper(),
+                'path': _path_of(request['url']),
+                'body': (request.get('postData') or {}).get('text'),
+                'headers': headers or None
+            }
+
+
+def read_recording(path: str, fmt: str = 'auto') -> Iterator[Dict]:
+    """Dispatch to the reader for ``fmt`` (guessed from the extension when 'auto')"""
+    if fmt == 'auto':
+        name = path[:-3] if path.endswith('.gz') else path
+        fmt = 'har' if name.endswith('.har') else 'jsonl' if name.endswith(('.jsonl', '.json')) else 'clf'
+    readers = {'har': read_har, 'jsonl': read_jsonl_log, 'clf': read_access_log}
+    return readers[fmt](path)
+
+
+class RouteMatcher:
+    """Maps concrete request paths back to RouteExtractor templates"""
+
+    def __init__(self, routes: List[Dict]):
+        self.by_method: Dict[str, List[tuple]] = {}
+        for route_info in routes:
+            segments = route_info['route'].strip('/').split('/')
+            parameters = sum(1 for segment in segments if segment.startswith('{'))
+            pattern = '/'.join(
+                ('.+' if segment.startswith('{*') else '[^/]+') if segment.startswith('{') else re.escape(segment)
+                for segment in segments
+            )
+            compiled = re.compile(f'^/?{pattern}/?$', re.IGNORECASE)
+            # Prefer templates with fewer parameters, then longer literal paths
+            rank = (parameters, -len(segments))
+            self.by_method.setdefault(route_info['method'].upper(), []).append((rank, compiled, route_info))
+        for candidates in self.by_method.values():
+            candidates.sort(key=lambda item: item[0])
+
+    def match(self, method: str, path: str) -> Optional[Dict]:
+        path = path.split('?', 1)[0]
+        for _, compiled, route_info in self.by_method.get(method.upper(), []):
+            if compiled.match(path):
+                return route_info
+        return None
+
+
+class TrafficReplayer:
+    """Replays a recording open-loop: each request is sent at its recorded
+    offset divided by ``speed`` regardless of earlier responses, and latency
+    is measured from that intended send time. ``speed`` 0 sends as fast as
+    ``max_in_flight`` allows.
+    """
+
+    def __init__(self, prober, routes: List[Dict], speed: float = 1.0, max_in_flight: int = 200):
+        self.prober = prober
+        self.matcher = RouteMatcher(routes)
+        self.speed = speed
+        self.max_in_flight = max_in_flight
+        self.step = LoadStep(rate=0, interval=1.0)
+        self.unmatched = 0
+
+    def _send(self, route_info: Dict, intended: float, slots: threading.Semaphore) -> None:
+        try:
+            result = self.prober.probe_route(route_info)
+            latency_ms = (time.perf_counter() - intended) * 1000
+            self.step.record(route_info, intended - self.step.started, latency_ms, result)
+        finally:
+            slots.release()
+
+    def replay(self, requests: Iterator[Dict], limit: Optional[int] = None) -> LoadStep:
+        slots = threading.Semaphore(self.max_in_flight)
+        first_timestamp = None
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            self.step.started = time.perf_counter()
+            for request in requests:
+                if limit is not None and self.step.sent >= limit:
+                    break
+                if first_timestamp is None:
+                    first_timestamp = request['timestamp']
+
+                template = self.matcher.match(request['method'], request['path'])
+                if template is None:
+                    self.unmatched += 1
+                    template = {'controller': 'Unmatched', 'action': '', 'route': '<unmatched>'}
+                body = request.get('body')
+                route_info = dict(template, method=request['method'], path=request['path'],
+                                  body=body.encode('utf-8') if body else None, headers=request.get('headers'))
+
+                intended = time.perf_counter()
+                if self.speed > 0:
+                    intended = self.step.started + (request['timestamp'] - first_timestamp) / self.speed
+                    delay = intended - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                slots.acquire()
+                pool.submit(self._send, route_info, intended, slots)
+                self.step.sent += 1
+        self.step.elapsed = time.perf_counter() - self.step.started
+        return self.step
+
+    def generate_report(self, output_file: str) -> None:
+        """Per-template latency CSV report"""
+        with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+            fieldnames = ['controller', 'method', 'route', 'requests', 'errors'] + \
+                [f'p{p}_ms' for p in PERCENTILES] + ['max_ms']
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore')
+
+            writer.writeheader()
+            for key in sorted(self.step.routes):
+                route = self.step.routes[key]
+                row = dict(route)
+                row.update(route['histogram'].summary())
+                writer.writerow(row)
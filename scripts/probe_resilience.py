@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Probe Resilience for BARQ Platform
+Adaptive per-route timeouts and per-controller circuit breakers, so a
+broken dependency costs a few failed requests instead of a full timeout
+on every route behind it
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+
+class LatencyEstimator:
+    """Smoothed latency and deviation, updated like TCP's RTO estimator (RFC 6298)"""
+
+    ALPHA = 0.125
+    BETA = 0.25
+
+    def __init__(self):
+        self.smoothed: Optional[float] = None
+        self.deviation = 0.0
+        self.observations = 0
+
+    def observe(self, latency_s: float) -> None:
+        if self.smoothed is None:
+            self.smoothed = latency_s
+            self.deviation = latency_s / 2
+        else:
+            self.deviation = (1 - self.BETA) * self.deviation + self.BETA * abs(self.smoothed - latency_s)
+            self.smoothed = (1 - self.ALPHA) * self.smoothed + self.ALPHA * latency_s
+        self.observations += 1
+
+
+class AdaptiveTimeouts:
+    """Derives per-route request timeouts from observed latency.
+
+    A route uses the configured maximum until it has ``min_observations``
+    samples of its own; other routes on the same controller say nothing
+    about a slow report endpoint. Each timeout doubles the route's current
+    value (capped at the maximum), and the next answered request recomputes
+    it from the estimator, as RFC 6298 backs off the retransmission timer.
+    """
+
+    def __init__(self, max_timeout: float, min_timeout: float = 0.5,
+                 multiplier: float = 4.0, min_observations: int = 3):
+        self.max_timeout = max_timeout
+        self.min_timeout = min(min_timeout, max_timeout)
+        self.multiplier = multiplier
+        self.min_observations = min_observations
+        self.lock = threading.Lock()
+        self.estimators: Dict[str, LatencyEstimator] = {}
+        self.backoff: Dict[str, int] = {}
+
+    @staticmethod
+    def _key(route_info: Dict) -> str:
+        return f"{route_info['method'].upper()} {route_info['route']}"
+
+    def observe(self, route_info: Dict, latency_s: float) -> None:
+        key = self._key(route_info)
+        with self.lock:
+            self.estimators.setdefault(key, LatencyEstimator()).observe(latency_s)
+            self.backoff.pop(key, None)
+
+    def timed_out(self, route_info: Dict) -> None:
+        """Double the route's timeout after a request to it expired"""
+        key = self._key(route_info)
+        with self.lock:
+            self.backoff[key] = self.backoff.get(key, 1) * 2
+
+    def timeout_for(self, route_info: Dict) -> float:
+        key = self._key(route_info)
+        with self.lock:
+            estimator = self.estimators.get(key)
+            if estimator is None or estimator.observations < self.min_observations:
+                return self.max_timeout
+            timeout = max(self.min_timeout, estimator.smoothed + self.multiplier * estimator.deviation)
+            timeout *= self.backoff.get(key, 1)
+        return round(min(self.max_timeout, timeout), 3)
+
+
+class CircuitBreaker:
+    """Per-controller breaker: opens after ``threshold`` consecutive failures.
+
+    While open, requests are short-circuited. After ``cooldown`` seconds one
+    trial request is let through (half-open); success closes the circuit,
+    failure re-opens it for another cooldown.
+    """
+
+    def __init__(self, threshold: int, cooldown: float = 30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.lock = threading.Lock()
+        self.failures: Dict[str, int] = {}
+        self.opened_at: Dict[str, float] = {}
+        self.trial_in_flight: Dict[str, bool] = {}
+        self.skipped: Dict[str, int] = {}
+
+    def allow(self, controller: str) -> bool:
+        with self.lock:
+            opened_at = self.opened_at.get(controller)
+            if opened_at is None:
+                return True
+            if time.monotonic() - opened_at >= self.cooldown and not self.trial_in_flight.get(controller):
+                self.trial_in_flight[controller] = True
+                return True
+            self.skipped[controller] = self.skipped.get(controller, 0) + 1
+            return False
+
+    def record(self, controller: str, failed: bool) -> None:
+        with self.lock:
+            self.trial_in_flight.pop(controller, None)
+            if not failed:
+                self.failures[controller] = 0
+                self.opened_at.pop(controller, None)
+                return
+            self.failures[controller] = self.failures.get(controller, 0) + 1
+            if self.failures[controller] >= self.threshold:
+                self.opened_at[controller] = time.monotonic()
+
+    def release(self, controller: str) -> None:
+        """End a request that says nothing about the controller's health"""
+        with self.lock:
+            self.trial_in_flight.pop(controller, None)
+
+    def is_open(self, controller: str) -> bool:
+        with self.lock:
+            return controller in self.opened_at
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Stand-in API Server for BARQ Platform probe tooling
+Answers every route with a configurable latency distribution, so probes,
+load runs and benchmarks can be exercised offline on a single machine
+"""
+
+import argparse
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Optional
+
+
+class LatencyModel:
+    """Samples synthetic server latency in milliseconds"""
+
+    def __init__(self, distribution: str = 'fixed', mean_ms: float = 5.0,
+                 jitter_ms: float = 0.0, seed: Optional[int] = None):
+        self.distribution = distribution
+        self.mean_ms = mean_ms
+        self.jitter_ms = jitter_ms
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def sample(self) -> float:
+        with self.lock:
+            if self.distribution == 'exponential':
+                value = self.random.expovariate(1.0 / self.mean_ms) if self.mean_ms else 0.0
+            elif self.distribution == 'normal':
+                value = self.random.gauss(self.mean_ms, self.jitter_ms)
+            elif self.distribution == 'lognormal':
+                sigma = self.jitter_ms / self.mean_ms if self.mean_ms else 0.0
+                value = self.mean_ms * self.random.lognormvariate(0, sigma)
+            elif self.distribution == 'uniform':
+                value = self.random.uniform(self.mean_ms - self.jitter_ms, self.mean_ms + self.jitter_ms)
+            else:
+                value = self.mean_ms
+        return max(0.0, value)
+
+
+class StandinServer:
+    """Threaded HTTP server answering any method and path.
+
+    Usable as a context manager that serves from a background thread:
+
+        with StandinServer(LatencyModel('exponential', 20)) as server:
+            prober = ApiProber(server.base_url)
+    """
+
+    def __init__(self, latency: Optional[LatencyModel] = None, host: str = '127.0.0.1',
+                 port: int = 0, body_bytes: int = 64, error_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.latency = latency or LatencyModel()
+        self.body = b'x' * body_bytes
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes; with Nagle on, keep-alive
+            # clients wait out a delayed ACK (~40ms) on every response
+            disable_nagle_algorithm = True
+
+            def handle_any(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                with server.lock:
+                    server.requests += 1
+                    failed = server.error_rate and server.random.random() < server.error_rate
+                time.sleep(server.latency.sample() / 1000.0)
+
+                status = 500 if failed else 200
+                body = server.body if self.command != 'HEAD' else b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/plain')
+                self.send_header('Content-Length', str(len(server.body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = do_HEAD = do_OPTIONS = handle_any
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'StandinServer':
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> 'StandinServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stand-in API server for probe testing')
+    parser.add_argument('--host', default='127.0.0.1', help='Bind address')
+    parser.add_argument('--port', type=int, default=5080, help='Listen port')
+    parser.add_argument('--distribution', choices=['fixed', 'exponential', 'normal', 'lognormal', 'uniform'],
+                       default='fixed', help='Latency distribution')
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='Mean latency in ms')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Spread for normal/lognormal/uniform')
+    parser.add_argument('--body-bytes', type=int, default=64, help='Response body size')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 500')
+    parser.add_argument('--seed', type=int, help='Random seed')
+
+    args = parser.parse_args()
+
+    server = StandinServer(LatencyModel(args.distribution, args.latency_ms, args.jitter_ms, args.seed),
+                           host=args.host, port=args.port, body_bytes=args.body_bytes,
+                           error_rate=args.error_rate, seed=args.seed)
+    print(f"Stand-in API listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Per-phase Request Timing for BARQ Platform probes
+Instruments urllib3 connections so each request records DNS, connect and TLS time
+"""
+
+import socket
+import threading
+import time
+from typing import Dict, Optional
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+
+PHASES = ('dns_ms', 'connect_ms', 'tls_ms', 'ttfb_ms', 'transfer_ms')
+
+_local = threading.local()
+
+
+def begin_request() -> Dict[str, float]:
+    """Start recording connection phases for the request about to run on this thread"""
+    _local.phases = {'dns_ms': 0.0, 'connect_ms': 0.0, 'tls_ms': 0.0}
+    return _local.phases
+
+
+def current_phases() -> Optional[Dict[str, float]]:
+    return getattr(_local, 'phases', None)
+
+
+class _TimedConnectionMixin:
+    """Splits socket setup into name resolution and TCP connect.
+
+    Every resolved address is tried in turn, as urllib3's own
+    ``create_connection`` does, and the last error is raised if none
+    connects. Reused keep-alive connections never reach ``_new_conn``, so
+    their setup phases stay at zero, which is exactly what the request paid.
+    """
+
+    def _new_conn(self):
+        phases = current_phases()
+        host = self._dns_host
+        start = time.perf_counter()
+        try:
+            infos = socket.getaddrinfo(host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except socket.gaierror:
+            # Let urllib3 raise its usual NameResolutionError
+            return super()._new_conn()
+        resolved = time.perf_counter()
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+
+        error = None
+        sock = None
+        try:
+            for address in addresses:
+                self._dns_host = address
+                try:
+                    sock = super()._new_conn()
+                    break
+                except (ConnectTimeoutError, NewConnectionError) as e:
+                    error = e
+        finally:
+            self._dns_host = host
+            if phases is not None:
+                phases['dns_ms'] += (resolved - start) * 1000
+                phases['connect_ms'] += (time.perf_counter() - resolved) * 1000
+
+        if sock is None:
+            if error is None:
+                # getaddrinfo returned nothing usable; urllib3 reports that itself
+                return super()._new_conn()
+            raise error
+        return sock
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        phases = current_phases()
+        before = dict(phases) if phases is not None else None
+        start = time.perf_counter()
+        super().connect()
+        if phases is not None:
+            setup_ms = (phases['dns_ms'] - before['dns_ms']) + (phases['connect_ms'] - before['connect_ms'])
+            phases['tls_ms'] += max(0.0, (time.perf_counter() - start) * 1000 - setup_ms)
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools record per-phase setup timings"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool
+        }
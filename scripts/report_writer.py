@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Streaming Report Writer for BARQ Platform audits
+Writes findings as CSV, JSONL or SARIF (optionally gzipped) while files are
+being scanned, keeping severity/file/line order through a spill-to-disk merge
+"""
+
+import csv
+import gzip
+import heapq
+import io
+import json
+import os
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from audit_diff import finding_fingerprint
+
+SEVERITY_ORDER = {'High': 0, 'Medium': 1, 'Low': 2}
+SARIF_LEVELS = {'High': 'error', 'Medium': 'warning', 'Low': 'note'}
+SARIF_SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+DEFAULT_SORT_BUFFER = 50000
+FORMATS = ('csv', 'jsonl', 'sarif')
+
+
+def report_format(path: str) -> str:
+    """Format implied by the file name, ignoring a trailing .gz"""
+    name = path[:-3] if path.endswith('.gz') else path
+    if name.endswith('.jsonl'):
+        return 'jsonl'
+    if name.endswith(('.sarif', '.sarif.json')):
+        return 'sarif'
+    return 'csv'
+
+
+def sort_key(issue: Dict) -> tuple:
+    return SEVERITY_ORDER.get(issue['severity'], 3), issue['file'], issue['line']
+
+
+class ExternalSorter:
+    """Sorts findings by severity/file/line with at most ``buffer_size`` held in memory.
+
+    Full buffers are sorted and spilled to temporary JSON-lines files, which
+    are merged lazily at the end. A sequence number keeps equal keys in
+    arrival order, matching Python's stable sort.
+    """
+
+    def __init__(self, buffer_size: int = DEFAULT_SORT_BUFFER):
+        self.buffer_size = buffer_size
+        self.buffer: List[tuple] = []
+        self.sequence = 0
+        self.spill_dir: Optional[tempfile.TemporaryDirectory] = None
+        self.spills: List[str] = []
+
+    def add(self, issue: Dict) -> None:
+        self.buffer.append(sort_key(issue) + (self.sequence, issue))
+        self.sequence += 1
+        if len(self.buffer) >= self.buffer_size:
+            self._spill()
+
+    def _spill(self) -> None:
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.TemporaryDirectory(prefix='audit-sort-')
+        self.buffer.sort(key=lambda item: item[:4])
+        path = os.path.join(self.spill_dir.name, f'run{len(self.spills)}.jsonl')
+        with open(path, 'w', encoding='utf-8') as f:
+            for item in self.buffer:
+                f.write(json.dumps(item, separators=(',', ':')) + '\n')
+        self.spills.append(path)
+        self.buffer = []
+
+    @staticmethod
+    def _read(path: str) -> Iterator[tuple]:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield tuple(json.loads(line))
+
+    def sorted(self) -> Iterator[Dict]:
+        self.buffer.sort(key=lambda item: item[:4])
+        runs = [self._read(path) for path in self.spills] + [iter(self.buffer)]
+        try:
+            for item in heapq.merge(*runs, key=lambda item: item[:4]):
+                yield item[4]
+        finally:
+            if self.spill_dir is not None:
+                self.spill_dir.cleanup()
+
+
+class ReportWriter:
+    """Findings report in CSV, JSONL or SARIF, gzipped when the path ends in .gz.
+
+    With ``order='scan'`` each finding is written as soon as it is added, so
+    output starts immediately. With ``order='severity'`` (the default and
+    the historical CSV order) findings go through an ExternalSorter and are
+    written on close().
+    """
+
+    def __init__(self, output_file: str, fieldnames: List[str], fmt: Optional[str] = None,
+                 order: str = 'severity', tool: str = 'audit', rules: Optional[Dict[str, Dict]] = None,
+                 buffer_size: int = DEFAULT_SORT_BUFFER):
+        self.output_file = output_file
+        self.fieldnames = fieldnames
+        self.format = fmt or report_format(output_file)
+        self.order = order
+        self.tool = tool
+        self.rules = dict(rules or {})
+        self.sorter = ExternalSorter(buffer_size) if order == 'severity' else None
+        self.written = 0
+
+        directory = os.path.dirname(output_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if output_file.endswith('.gz'):
+            self.stream = io.TextIOWrapper(gzip.open(output_file, 'wb'), encoding='utf-8', newline='')
+        else:
+            self.stream = open(output_file, 'w', newline='', encoding='utf-8')
+        self.csv_writer = None
+        if self.format == 'csv':
+            self.csv_writer = csv.DictWriter(self.stream, fieldnames=fieldnames, extrasaction='ignore')
+            self.csv_writer.writeheader()
+        elif self.format == 'sarif':
+            self._begin_sarif()
+
+    def add(self, issue: Dict) -> None:
+        if self.sorter is not None:
+            self.sorter.add(issue)
+        else:
+            self._write(issue)
+
+    def add_many(self, issues: Iterable[Dict]) -> None:
+        for issue in issues:
+            self.add(issue)
+
+    def _write(self, issue: Dict) -> None:
+        if self.format == 'csv':
+            self.csv_writer.writerow(issue)
+        elif self.format == 'jsonl':
+            self.stream.write(json.dumps({key: issue.get(key) for key in self.fieldnames}, ensure_ascii=False) + '\n')
+        else:
+            self._write_sarif_result(issue)
+        self.written += 1
+
+    def _begin_sarif(self) -> None:
+        rules = [{'id': 'ScanError', 'shortDescription': {'text': 'File could not be scanned'},
+                  'defaultConfiguration': {'level': 'note'}}]
+        for name, rule in self.rules.items():
+            entry = {'id': name,
+                     'shortDescription': {'text': rule.get('description', name)},
+                     'defaultConfiguration': {'level': SARIF_LEVELS.get(rule.get('severity'), 'warning')}}
+            if rule.get('category'):
+                entry['properties'] = {'tags': [rule['category'].lower()]}
+            rules.append(entry)
+        header = {'$schema': SARIF_SCHEMA, 'version': '2.1.0',
+                  'runs': [{'tool': {'driver': {'name': self.tool, 'rules': rules}}, 'results': []}]}
+        # Everything up to the opening of the results array; results are streamed into it
+        text = json.dumps(header, ensure_ascii=False)
+        self.stream.write(text[:text.rindex('[]')] + '[\n')
+
+    def _write_sarif_result(self, issue: Dict) -> None:
+        location = {'physicalLocation': {'artifactLocation': {'uri': issue['file'].replace(os.sep, '/'),
+                                                              'uriBaseId': 'SRCROOT'}}}
+        if int(issue.get('line') or 0) > 0:
+            location['physicalLocation']['region'] = {'startLine': int(issue['line'])}
+        result = {
+            'ruleId': issue['type'],
+            'level': SARIF_LEVELS.get(issue['severity'], 'warning'),
+            'message': {'text': issue.get('description') or f"{issue['type']}: {issue.get('code', '')}".strip()},
+            'locations': [location],
+            'partialFingerprints': {'barqFinding/v1': finding_fingerprint(issue)}
+        }
+        if issue.get('code'):
+            result['properties'] = {'code': issue['code']}
+        self.stream.write((',\n' if self.written else '') + json.dumps(result, ensure_ascii=False))
+
+    def close(self) -> None:
+        if self.sorter is not None:
+            for issue in self.sorter.sorted():
+                self._write(issue)
+        if self.format == 'sarif':
+            self.stream.write('\n]}]}\n')
+        self.stream.close()
+
+    def __enter__(self) -> 'ReportWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
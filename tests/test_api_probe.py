@@ -0,0 +1,25 @@
+from api_probe import ApiProber
+
+
+class BrokenFixtures:
+    auth = None
+
+    def resolve(self, route_info):
+        if '{id}' in route_info['route']:
+            raise LookupError('no Order to take {id} from')
+        return route_info['route'], []
+
+
+def route(path):
+    return {'controller': 'Orders', 'action': 'Get', 'method': 'GET', 'route': path}
+
+
+def test_fixture_failures_are_not_connection_errors():
+    # Nothing listens on port 9 here, so the request that is sent fails to connect
+    prober = ApiProber('http://127.0.0.1:9', timeout=2, fixtures=BrokenFixtures())
+    for path in ('/api/orders/{id}', '/api/orders/{id}/lines', '/api/orders'):
+        prober.results.append(prober.probe_route(route(path)))
+
+    summary = prober.get_summary()
+    assert (summary['fixture_errors'], summary['connection_errors']) == (2, 1)
+    assert prober.results[0]['error'] == 'Fixture error: no Order to take {id} from'
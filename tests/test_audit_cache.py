@@ -0,0 +1,136 @@
+import os
+from pathlib import Path
+
+import audit_cache
+from audit_cache import ScanCache, scan_with_cache
+
+DAY_NS = 24 * 3600 * 10 ** 9
+
+
+def scan_path(path):
+    return [{'file': Path(path).name, 'text': Path(path).read_text()}]
+
+
+class Counting:
+    def __init__(self):
+        self.scanned = []
+
+    def __call__(self, path):
+        self.scanned.append(Path(path).name)
+        return scan_path(path)
+
+
+def refuse_hashing(path):
+    raise AssertionError(f'hashed {path} although its size and mtime match')
+
+
+def write(path, text, age_ns=DAY_NS):
+    """Write ``text`` and date the file ``age_ns`` back, outside the racy window by default"""
+    path.write_text(text)
+    mtime = os.stat(path).st_mtime_ns - age_ns
+    os.utime(path, ns=(mtime, mtime))
+    return path
+
+
+def run(cache_file, paths, inputs=None, jobs=1, prune=True):
+    scan = Counting()
+    cache = ScanCache(str(cache_file), 'rules-v1', inputs)
+    results = list(scan_with_cache(scan, paths, jobs, cache))
+    cache.save(prune)
+    return results, scan.scanned
+
+
+def test_unchanged_files_come_from_the_cache(tmp_path):
+    paths = [write(tmp_path / 'a.cs', 'a'), write(tmp_path / 'b.cs', 'b')]
+    first, scanned = run(tmp_path / 'cache.json', paths)
+    assert scanned == ['a.cs', 'b.cs']
+    second, scanned = run(tmp_path / 'cache.json', paths)
+    assert scanned == []
+    assert second == first
+
+
+def test_size_and_content_changes_rescan(tmp_path):
+    path = write(tmp_path / 'a.cs', 'one')
+    run(tmp_path / 'cache.json', [path])
+
+    write(path, 'longer')
+    assert run(tmp_path / 'cache.json', [path])[1] == ['a.cs']
+    # Same size, new mtime: the hash decides
+    write(path, 'other!', age_ns=DAY_NS // 2)
+    assert run(tmp_path / 'cache.json', [path])[1] == ['a.cs']
+
+
+def test_touched_file_with_same_content_is_confirmed_by_hash(tmp_path):
+    path = write(tmp_path / 'a.cs', 'same')
+    run(tmp_path / 'cache.json', [path])
+    write(path, 'same', age_ns=DAY_NS // 2)
+    assert run(tmp_path / 'cache.json', [path])[1] == []
+
+
+def test_racy_mtime_is_not_trusted(tmp_path):
+    path = write(tmp_path / 'a.cs', 'abc', age_ns=0)
+    run(tmp_path / 'cache.json', [path])
+    stat = os.stat(path)
+    # Same size and mtime, different content: only a hash check can tell
+    path.write_text('xyz')
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    results, scanned = run(tmp_path / 'cache.json', [path])
+    assert scanned == ['a.cs']
+    assert results == [[{'file': 'a.cs', 'text': 'xyz'}]]
+
+
+def test_old_mtime_is_trusted_without_hashing(tmp_path, monkeypatch):
+    path = write(tmp_path / 'a.cs', 'abc')
+    run(tmp_path / 'cache.json', [path])
+    monkeypatch.setattr(audit_cache, 'file_digest', refuse_hashing)
+    assert run(tmp_path / 'cache.json', [path])[1] == []
+
+
+def test_other_fingerprint_discards_the_cache(tmp_path):
+    path = write(tmp_path / 'a.cs', 'a')
+    run(tmp_path / 'cache.json', [path])
+    cache = ScanCache(str(tmp_path / 'cache.json'), 'rules-v2')
+    assert cache.entries == {}
+
+
+class Inputs:
+    """Each file depends on the entry of ``state`` named after its first line"""
+
+    def __init__(self, state):
+        self.current = state
+
+    def references(self, path):
+        return [Path(path).read_text().split('\n')[0]]
+
+    def state(self, references):
+        return [self.current.get(name) for name in references]
+
+
+def test_inputs_invalidate_only_dependent_files(tmp_path):
+    paths = [write(tmp_path / 'a.cs', 'Orders'), write(tmp_path / 'b.cs', 'Invoices')]
+    inputs = Inputs({'Orders': 'filtered', 'Invoices': 'filtered'})
+    run(tmp_path / 'cache.json', paths, inputs)
+    assert run(tmp_path / 'cache.json', paths, inputs)[1] == []
+
+    inputs.current['Invoices'] = 'unfiltered'
+    assert run(tmp_path / 'cache.json', paths, inputs)[1] == ['b.cs']
+    assert run(tmp_path / 'cache.json', paths, inputs)[1] == []
+
+
+def test_parallel_scan_streams_in_input_order(tmp_path):
+    paths = [write(tmp_path / f'{name}.cs', name) for name in 'abcdefgh']
+    run(tmp_path / 'cache.json', paths[::2])
+    cache = ScanCache(str(tmp_path / 'cache.json'), 'rules-v1')
+    results = list(scan_with_cache(scan_path, paths, jobs=2, cache=cache))
+    assert results == [scan_path(path) for path in paths]
+    assert (cache.hits, cache.misses) == (4, 4)
+
+
+def test_save_without_prune_keeps_unscanned_files(tmp_path):
+    paths = [write(tmp_path / 'a.cs', 'a'), write(tmp_path / 'b.cs', 'b')]
+    run(tmp_path / 'cache.json', paths)
+
+    run(tmp_path / 'cache.json', paths[:1], prune=False)
+    assert sorted(ScanCache(str(tmp_path / 'cache.json'), 'rules-v1').entries) == sorted(map(str, paths))
+    run(tmp_path / 'cache.json', paths[:1])
+    assert list(ScanCache(str(tmp_path / 'cache.json'), 'rules-v1').entries) == [str(paths[0])]
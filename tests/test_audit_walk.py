@@ -0,0 +1,76 @@
+import pytest
+
+from audit_walk import SourceTree, walk_files
+
+
+def make(root, files):
+    for name, text in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+
+def listing(root, *args, **kwargs):
+    return [path.relative_to(root).as_posix() for _, path in walk_files(str(root), *args, **kwargs)]
+
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / '.git').mkdir()
+    make(tmp_path, {
+        '.gitignore': '*.log\n!keep.log\ngenerated/\n/out\n',
+        'a.cs': '', 'debug.log': '', 'keep.log': '',
+        'generated/Model.cs': '',
+        'src/generated.cs': '', 'src/out/Report.cs': '', 'src/trace.log': '',
+        'out/Build.cs': '',
+        'node_modules/lib.js': '',
+        'src/Legacy/.gitignore': '*.cs\n!Keep.cs\n',
+        'src/Legacy/Old.cs': '', 'src/Legacy/Keep.cs': '',
+    })
+    return tmp_path
+
+
+def test_negation_re_includes_a_file(tree):
+    files = listing(tree)
+    assert 'keep.log' in files
+    assert 'debug.log' not in files and 'src/trace.log' not in files
+
+
+def test_directory_patterns_skip_directories_only(tree):
+    files = listing(tree)
+    # 'generated/' ignores the directory, not a file of that name
+    assert 'generated/Model.cs' not in files and 'src/generated.cs' in files
+    # '/out' is anchored to the .gitignore's directory
+    assert 'out/Build.cs' not in files and 'src/out/Report.cs' in files
+
+
+def test_nested_and_ancestor_ignore_files(tree):
+    assert listing(tree / 'src', ['cs']) == ['generated.cs', 'Legacy/Keep.cs', 'out/Report.cs']
+    assert listing(tree / 'src', ['log']) == []
+    assert 'src/trace.log' in listing(tree, gitignore=False)
+
+
+def test_excluded_and_pruned_directories_are_not_entered(tree):
+    assert not [name for name in listing(tree, gitignore=False) if name.startswith('node_modules/')]
+    entered = []
+
+    def prune(name):
+        entered.append(name)
+        return name == 'src'
+
+    files = listing(tree, ['cs'], prune=prune)
+    assert files == ['a.cs']
+    # prune sees top-level directory names only: not excluded ones, nor any below a pruned one
+    assert entered == ['generated', 'out', 'src']
+
+
+def test_files_come_before_subdirectories_in_name_order(tree):
+    assert listing(tree, ['.CS']) == ['a.cs', 'src/generated.cs', 'src/Legacy/Keep.cs', 'src/out/Report.cs']
+
+
+def test_source_tree_listing_matches_walk_files(tree):
+    source = SourceTree([str(tree)])
+    prune = lambda name: name == 'Legacy'
+    assert list(source.files(str(tree / 'src'), ['cs'], prune=prune)) \
+        == list(walk_files(str(tree / 'src'), ['cs'], prune=prune))
+    assert list(source.files(str(tree))) == list(walk_files(str(tree)))
@@ -0,0 +1,81 @@
+import csv
+import subprocess
+
+import pytest
+
+import backend_audit
+
+ENTITIES = '''
+public abstract class TenantEntity { public Guid TenantId { get; set; } }
+public class Order : TenantEntity { public decimal Total { get; set; } }
+'''
+
+CONTEXT = '''
+public class AppDbContext : DbContext
+{
+    public DbSet<Order> Orders { get; set; }
+
+    protected override void OnModelCreating(ModelBuilder modelBuilder)
+    {
+        modelBuilder.Entity<Order>().HasQueryFilter(o => o.TenantId == CurrentTenantId);
+    }
+}
+'''
+
+SERVICE = '''
+public class OrderService
+{
+    public List<Order> Large() => _context.Orders.Where(o => o.Total > 100).ToList();
+}
+'''
+
+
+def git(repo, *args):
+    subprocess.run(['git', '-c', 'user.name=audit', '-c', 'user.email=audit@example.com', *args],
+                   cwd=repo, check=True, capture_output=True)
+
+
+def rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    src = tmp_path / 'src'
+    src.mkdir()
+    (src / 'Entities.cs').write_text(ENTITIES)
+    (src / 'AppDbContext.cs').write_text(CONTEXT)
+    (src / 'OrderService.cs').write_text(SERVICE)
+    git(tmp_path, 'init', '-q')
+    git(tmp_path, 'add', '.')
+    git(tmp_path, 'commit', '-q', '-m', 'base')
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(SystemExit) as exit_info:
+        backend_audit.main(['--src', 'src', '--out', 'base.csv'])
+    assert exit_info.value.code == 0
+    return tmp_path
+
+
+def run_pr(*extra):
+    with pytest.raises(SystemExit) as exit_info:
+        backend_audit.main(['--src', 'src', '--out', 'pr.csv', '--changed-since', 'HEAD',
+                            '--baseline-report', 'base.csv', '--fail-on', 'High', *extra])
+    return exit_info.value.code
+
+
+def test_dropping_a_query_filter_rescans_unchanged_queries(repo):
+    assert not [row for row in rows(repo / 'base.csv') if row['type'] == 'TenantGap']
+    (repo / 'src' / 'AppDbContext.cs').write_text(CONTEXT.replace('.HasQueryFilter(o => o.TenantId == CurrentTenantId)', ''))
+
+    assert run_pr() == 1
+    gaps = [row for row in rows(repo / 'pr.csv') if row['type'] == 'TenantGap']
+    assert [(row['file'], row['line']) for row in gaps] == [('OrderService.cs', '4')]
+
+
+def test_edits_that_leave_the_model_alone_scan_only_changed_files(repo, capsys):
+    (repo / 'src' / 'AppDbContext.cs').write_text(CONTEXT + '\n// formatting only\n')
+
+    assert run_pr() == 0
+    assert 'Entity model changed' not in capsys.readouterr().out
+    assert not [row for row in rows(repo / 'pr.csv') if row['type'] == 'TenantGap']
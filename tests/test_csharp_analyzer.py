@@ -0,0 +1,267 @@
+from audit_rules import BACKEND_RULES, RuleEngine
+from csharp_analyzer import EntityModel, PerformanceAnalyzer, TenantGapAnalyzer, skip_group, tokenize
+
+ENTITIES = '''
+public abstract class TenantEntity { public Guid TenantId { get; set; } }
+public class Order : TenantEntity { public decimal Total { get; set; } }
+public class Invoice : TenantEntity { }
+public class Country { public string Code { get; set; } }
+
+public class AppDbContext : DbContext
+{
+    public DbSet<Order> Orders { get; set; }
+    public DbSet<Invoice> Invoices { get; set; }
+    public DbSet<Country> Countries { get; set; }
+}
+'''
+
+QUERY_FILTER = '''
+public partial class AppDbContext
+{
+    private void SetTenantFilter<TEntity>(ModelBuilder modelBuilder) where TEntity : Invoice
+    {
+        modelBuilder.Entity<TEntity>()
+            .HasQueryFilter(e => e.TenantId == CurrentTenantId);
+    }
+}
+'''
+
+
+def model(*sources):
+    entity_model = EntityModel()
+    for source in sources:
+        entity_model.add_source(source)
+    entity_model.resolve()
+    return entity_model
+
+
+def gaps(code, *sources):
+    return TenantGapAnalyzer(model(ENTITIES, *sources)).scan(code)
+
+
+def strings(source):
+    return [text for kind, text, _ in tokenize(source) if kind == 'string']
+
+
+def test_escaped_quotes_stay_inside_the_string():
+    assert strings('var a = "say \\"hi\\" // not a comment"; b();') == ['"say \\"hi\\" // not a comment"']
+
+
+def test_verbatim_string_doubles_quotes_and_keeps_backslashes():
+    assert strings('var p = @"C:\\dir\\ ""x"" /* y */"; z();') == ['@"C:\\dir\\ ""x"" /* y */"']
+
+
+def test_raw_string_runs_to_the_matching_quote_run():
+    tokens = tokenize('var s = """\n  a "quoted" ""pair""\n  """;\nnext();')
+    assert tokens[3] == ('string', '"""\n  a "quoted" ""pair""\n  """', 1)
+    assert tokens[4] == ('punct', ';', 3)
+    assert tokens[5] == ('ident', 'next', 4)
+
+
+def test_interpolated_string_skips_nested_strings_and_braces():
+    assert strings('var s = $"x {y + "}"} {{z}}"; w();') == ['$"x {y + "}"} {{z}}"']
+    assert strings('var s = $@"a ""{b}"" c"; w();') == ['$@"a ""{b}"" c"']
+
+
+def test_comments_and_directives_are_dropped_but_counted_in_lines():
+    source = '// Where(x => x.TenantId)\n/* block\n   comment */ var e = 1;\n#if DEBUG\nint f;\n'
+    assert tokenize(source) == [('ident', 'var', 3), ('ident', 'e', 3), ('punct', '=', 3),
+                                ('number', '1', 3), ('punct', ';', 3),
+                                ('ident', 'int', 5), ('ident', 'f', 5), ('punct', ';', 5)]
+
+
+def test_unterminated_block_comment_consumes_the_rest():
+    assert tokenize('a(); /* never closed\nb();') == [('ident', 'a', 1), ('punct', '(', 1),
+                                                      ('punct', ')', 1), ('punct', ';', 1)]
+
+
+def group_end(source, open_text, close_text):
+    tokens = tokenize(source)
+    start = next(index for index, token in enumerate(tokens) if token[1] == open_text)
+    end = skip_group(tokens, start, open_text, close_text)
+    return tokens[end][1] if end < len(tokens) else None
+
+
+def test_balanced_groups_skip_nested_blocks_and_for_headers():
+    assert group_end('M(x => { a(); }, [1]) + rest;', '(', ')') == '+'
+    assert group_end('for (int i = 0; i < n; i++) body();', '(', ')') == 'body'
+
+
+def test_unbalanced_groups_stop_at_the_enclosing_block():
+    assert group_end('{ [Route("orders"( }\nclass Next { }', '[', ']') == '}'
+    assert group_end('{ Call(a, b; }\nclass Next { }', '(', ')') == '}'
+    assert group_end('[Obsolete("x"; class Next { }', '[', ']') == ';'
+
+
+def test_multi_line_chain_without_tenant_filter():
+    code = '''
+    var orders = await _context.Orders
+        .Include(o => o.Lines)
+        .Where(o => o.Total > 10)
+        .ToListAsync();
+    '''
+    assert gaps(code) == [4]
+
+
+def test_multi_line_chain_filtered_after_the_where():
+    code = '''
+    var orders = await _context.Orders
+        .Where(o => o.Total > 10)
+        .Where(o => o.TenantId == tenantId)
+        .ToListAsync();
+    '''
+    assert gaps(code) == []
+
+
+def test_non_tenant_entities_are_ignored():
+    assert gaps('var c = _db.Countries.Where(c => c.Code == code).ToList();') == []
+
+
+def test_query_variable_filtered_later_is_not_a_gap():
+    code = '''
+    {
+        var query = _context.Orders.Where(o => o.Total > 10);
+        query = query.Where(o => o.TenantId == tenantId);
+        return await query.ToListAsync();
+    }
+    '''
+    assert gaps(code) == []
+
+
+def test_query_variable_materialized_unfiltered_reports_its_where():
+    code = '''
+    {
+        var query = _context.Orders.AsNoTracking();
+        query = query.Where(o => o.Total > 10);
+        return await query.ToListAsync();
+    }
+    '''
+    assert gaps(code) == [4]
+
+
+def test_query_variable_going_out_of_scope_reports_pending_wheres():
+    code = '''
+    {
+        if (big)
+        {
+            var query = _context.Orders.Where(o => o.Total > 10);
+        }
+    }
+    '''
+    assert gaps(code) == [5]
+
+
+def test_global_query_filter_through_a_generic_constraint():
+    code = 'var invoices = _context.Invoices.Where(i => i.Number > 0).ToList();'
+    assert gaps(code) == [1]
+    assert gaps(code, QUERY_FILTER) == []
+
+
+def test_ignore_query_filters_reopens_the_gap():
+    code = 'var invoices = _context.Invoices.IgnoreQueryFilters().Where(i => i.Number > 0).ToList();'
+    assert gaps(code, QUERY_FILTER) == [1]
+
+
+def test_set_of_t_is_a_query_root():
+    assert gaps('var o = _context.Set<Order>().Where(o => o.Total > 1).ToList();') == [1]
+
+
+def test_facts_round_trip_into_the_same_model():
+    merged = EntityModel()
+    for source in (ENTITIES, QUERY_FILTER):
+        merged.add_facts(EntityModel.facts(source))
+    merged.resolve()
+    direct = model(ENTITIES, QUERY_FILTER)
+    assert (merged.tenant, merged.filtered, merged.db_sets) == (direct.tenant, direct.filtered, direct.db_sets)
+
+
+def test_state_changes_only_for_referenced_entities():
+    code = 'var o = _context.Orders.Where(o => o.Total > 1).ToList();'
+    references = EntityModel.references(code)
+    assert references == {'sets': ['Orders'], 'types': []}
+    before = model(ENTITIES).state(references)
+    assert model(ENTITIES, QUERY_FILTER).state(references) == before
+    assert model(ENTITIES.replace('TenantEntity { public Guid TenantId { get; set; } }',
+                                  'TenantEntity { }')).state(references) != before
+
+
+def performance(code):
+    return PerformanceAnalyzer(model(ENTITIES)).analyze(tokenize(code))
+
+
+def rules(code):
+    return [rule for _, rule in performance(code)]
+
+
+def test_await_inside_foreach_and_do_loops():
+    foreach = '''
+    async Task Load(List<Guid> ids)
+    {
+        foreach (var id in ids)
+        {
+            var order = await _context.Orders.AsNoTracking().FirstOrDefaultAsync(o => o.Id == id);
+        }
+    }
+    '''
+    do_while = '''
+    async Task Load(Queue<Guid> ids)
+    {
+        do
+        {
+            var order = await _context.Orders.AsNoTracking().FirstOrDefaultAsync(o => o.Id == ids.Dequeue());
+        }
+        while (ids.Count > 0);
+    }
+    '''
+    assert performance(foreach) == [(6, 'AwaitInLoop')]
+    assert performance(do_while) == [(6, 'AwaitInLoop')]
+
+
+def test_await_outside_a_loop_is_not_in_loop():
+    code = '''
+    async Task Load(Guid id)
+    {
+        var order = await _context.Orders.AsNoTracking().FirstOrDefaultAsync(o => o.Id == id);
+    }
+    '''
+    assert 'AwaitInLoop' not in rules(code)
+
+
+def test_to_list_before_where_materializes_early():
+    code = 'var big = _context.Orders.AsNoTracking().ToList().Where(o => o.Total > 1).Take(5);'
+    assert 'EarlyMaterialization' in rules(code)
+    assert 'EarlyMaterialization' not in rules(
+        'var big = _context.Orders.AsNoTracking().Where(o => o.Total > 1).Take(5).ToList();')
+
+
+def test_result_blocks_on_calls_and_task_receivers_only():
+    assert rules('var a = LoadAsync().Result;') == ['SyncOverAsync']
+    assert rules('var b = loadTask.Result;') == ['SyncOverAsync']
+    assert rules('service.SaveAsync().GetAwaiter().GetResult();') == ['SyncOverAsync']
+    assert rules('var c = response.Result;') == []
+    assert rules('loadTask.Result = value;') == []
+
+
+def test_count_is_not_an_unbounded_query():
+    assert 'UnboundedQuery' in rules('var all = await _context.Orders.AsNoTracking().ToListAsync();')
+    assert 'UnboundedQuery' not in rules('var n = await _context.Orders.CountAsync();')
+    assert 'UnboundedQuery' not in rules('var page = await _context.Orders.AsNoTracking().Take(20).ToListAsync();')
+
+
+def test_read_only_member_without_as_no_tracking():
+    code = '''
+    public List<Order> All()
+    {
+        return _context.Orders.Take(20).ToList();
+    }
+    '''
+    assert rules(code) == ['MissingAsNoTracking']
+    assert rules(code.replace('return', '_context.SaveChanges();\n        return')) == []
+
+
+def test_per_request_allocation_leaves_bare_http_client_to_its_own_rule():
+    engine = RuleEngine(BACKEND_RULES)
+    assert engine.match_line('var options = new JsonSerializerOptions();') == ['PerRequestAllocation']
+    assert engine.match_line('var client = new HttpClient(handler);') == ['PerRequestAllocation']
+    assert engine.match_line('var client = new HttpClient();') == ['HttpClient']
+    assert engine.match_line('private static readonly JsonSerializerOptions Options = new JsonSerializerOptions();') == []
@@ -0,0 +1,26 @@
+from audit_walk import SourceTree
+from hotspot_report import CodeIndex
+
+CONTROLLER = '''
+public class OrdersController : ControllerBase
+{
+    private readonly IOrderService _orders;
+
+    [HttpGet]
+    public async Task<IActionResult> Get() => Ok(await _orders.ListAsync());
+}
+'''
+
+
+def test_code_index_reuses_a_shared_source_tree(tmp_path):
+    (tmp_path / 'Controllers').mkdir()
+    (tmp_path / 'Controllers' / 'OrdersController.cs').write_text(CONTROLLER)
+    source = SourceTree([str(tmp_path)])
+    source.preload(path for _, path in source.files(str(tmp_path), ['cs']))
+
+    index = CodeIndex(str(tmp_path), source)
+    info = index.find_class('OrdersController')
+    assert info.file == 'Controllers/OrdersController.cs'
+    assert info.fields == {'_orders': 'IOrderService'}
+    assert (source.disk_reads, source.memory_reads) == (1, 1)
+    assert CodeIndex(str(tmp_path)).find_class('OrdersController').fields == info.fields
@@ -0,0 +1,89 @@
+import math
+import random
+
+import pytest
+
+from latency_histogram import LatencyHistogram, record_result
+
+PERCENTILES = (1, 25, 50, 90, 95, 99, 99.9, 100)
+
+
+def exact(samples, percentile):
+    """Nearest-rank percentile of the samples, in ms"""
+    ordered = sorted(samples)
+    return ordered[max(1, math.ceil(len(ordered) * percentile / 100.0)) - 1]
+
+
+def assert_within_bucket(histogram, samples):
+    error = 10 ** -histogram.significant_digits
+    for percentile in PERCENTILES:
+        expected = exact(samples, percentile)
+        # Buckets report their highest value, rounded to 0.01 ms
+        assert expected - 0.005 <= histogram.percentile(percentile) <= expected * (1 + error) + 0.005, percentile
+
+
+def latencies(count, seed):
+    generator = random.Random(seed)
+    return [round(generator.lognormvariate(3, 1.2), 3) for _ in range(count)]
+
+
+@pytest.mark.parametrize('digits', [1, 2, 3])
+def test_percentiles_stay_within_the_bucket_error(digits):
+    samples = latencies(5000, seed=digits)
+    histogram = LatencyHistogram(digits)
+    for sample in samples:
+        histogram.record(sample)
+    assert histogram.total == len(samples)
+    assert histogram.max == round(max(samples), 2)
+    assert_within_bucket(histogram, samples)
+
+
+def test_small_values_are_exact():
+    histogram = LatencyHistogram(2)
+    for sample in (0.001, 0.05, 0.1):
+        histogram.record(sample)
+    assert [histogram.percentile(p) for p in (33, 66, 100)] == [0.0, 0.05, 0.1]
+
+
+def test_merge_equals_recording_everything_in_one():
+    first, second = latencies(700, seed=10), latencies(300, seed=11)
+    left, right, combined = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for sample in first:
+        left.record(sample)
+        combined.record(sample)
+    for sample in second:
+        right.record(sample)
+        combined.record(sample)
+
+    merged = LatencyHistogram.merged([left, LatencyHistogram.from_dict(right.to_dict())])
+    assert merged.to_dict() == combined.to_dict()
+    assert_within_bucket(merged, first + second)
+
+
+def test_merge_rejects_other_precision():
+    with pytest.raises(ValueError):
+        LatencyHistogram(2).merge(LatencyHistogram(3))
+
+
+def test_timeouts_are_lower_bounds_only_where_they_are_reached():
+    histogram = LatencyHistogram()
+    for latency in range(1, 96):
+        record_result(histogram, {'status_code': 200, 'latency_ms': float(latency)})
+    for _ in range(5):
+        record_result(histogram, {'status_code': 0, 'error': 'Timeout', 'latency_ms': 1000.0})
+    record_result(histogram, {'status_code': 0, 'error': 'ConnectionError', 'latency_ms': 3.0})
+
+    summary = histogram.summary()
+    assert (summary['samples'], summary['timeouts']) == (100, 5)
+    assert summary['p90_ms'] == pytest.approx(90.0, rel=0.01)
+    assert summary['p99_ms'] == 1000.0
+    assert summary['lower_bound'] == 'p99'
+    assert histogram.is_lower_bound(96) and not histogram.is_lower_bound(95)
+
+
+def test_merge_keeps_the_earliest_timeout():
+    fast, slow = LatencyHistogram(), LatencyHistogram()
+    fast.record(500, censored=True)
+    slow.record(2000, censored=True)
+    merged = LatencyHistogram.merged([slow, fast])
+    assert (merged.censored, merged.censored_min_us) == (2, 500000)
@@ -0,0 +1,100 @@
+import pytest
+
+import probe_resilience
+from probe_resilience import AdaptiveTimeouts, CircuitBreaker, LatencyEstimator
+
+ROUTE = {'method': 'get', 'route': '/api/orders'}
+
+
+def test_estimator_follows_rfc_6298():
+    estimator = LatencyEstimator()
+    estimator.observe(0.2)
+    assert (estimator.smoothed, estimator.deviation) == (0.2, 0.1)
+    estimator.observe(0.6)
+    # RTTVAR = 3/4 * 0.1 + 1/4 * |0.2 - 0.6|, SRTT = 7/8 * 0.2 + 1/8 * 0.6
+    assert estimator.deviation == pytest.approx(0.175)
+    assert estimator.smoothed == pytest.approx(0.25)
+
+
+def test_timeout_uses_the_maximum_until_enough_observations():
+    timeouts = AdaptiveTimeouts(max_timeout=30.0, min_observations=3)
+    timeouts.observe(ROUTE, 0.1)
+    timeouts.observe(ROUTE, 0.1)
+    assert timeouts.timeout_for(ROUTE) == 30.0
+    timeouts.observe(dict(ROUTE, method='GET'), 0.1)
+    # SRTT 0.1 and RTTVAR 0.05 * 0.75^2 floor at the 0.5 s minimum
+    assert timeouts.timeout_for(ROUTE) == 0.5
+    assert timeouts.timeout_for({'method': 'POST', 'route': '/api/orders'}) == 30.0
+
+
+def test_timeout_is_smoothed_plus_four_deviations():
+    timeouts = AdaptiveTimeouts(max_timeout=30.0, min_observations=1)
+    timeouts.observe(ROUTE, 2.0)
+    assert timeouts.timeout_for(ROUTE) == 2.0 + 4 * 1.0
+
+
+def test_timeouts_back_off_from_the_floor_until_an_answer():
+    timeouts = AdaptiveTimeouts(max_timeout=3.0, min_observations=1)
+    timeouts.observe(ROUTE, 0.01)
+    assert timeouts.timeout_for(ROUTE) == 0.5
+    timeouts.timed_out(ROUTE)
+    assert timeouts.timeout_for(ROUTE) == 1.0
+    timeouts.timed_out(ROUTE)
+    timeouts.timed_out(ROUTE)
+    assert timeouts.timeout_for(ROUTE) == 3.0
+    timeouts.observe(ROUTE, 0.01)
+    assert timeouts.timeout_for(ROUTE) == 0.5
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(probe_resilience.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_breaker_opens_half_opens_and_closes(clock):
+    breaker = CircuitBreaker(threshold=2, cooldown=10.0)
+    breaker.record('Orders', failed=True)
+    assert breaker.allow('Orders')
+    breaker.record('Orders', failed=True)
+    assert breaker.is_open('Orders')
+    assert not breaker.allow('Orders')
+
+    clock[0] += 10.0
+    assert breaker.allow('Orders')
+    # Only one trial request while half-open
+    assert not breaker.allow('Orders')
+    breaker.record('Orders', failed=False)
+    assert not breaker.is_open('Orders')
+    assert breaker.allow('Orders') and breaker.allow('Orders')
+    assert breaker.skipped == {'Orders': 2}
+
+
+def test_failed_trial_reopens_for_another_cooldown(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=10.0)
+    breaker.record('Orders', failed=True)
+    clock[0] += 10.0
+    assert breaker.allow('Orders')
+    breaker.record('Orders', failed=True)
+    clock[0] += 5.0
+    assert not breaker.allow('Orders')
+    clock[0] += 5.0
+    assert breaker.allow('Orders')
+
+
+def test_release_frees_the_trial_without_closing(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=10.0)
+    breaker.record('Orders', failed=True)
+    clock[0] += 10.0
+    assert breaker.allow('Orders')
+    breaker.release('Orders')
+    assert breaker.is_open('Orders')
+    assert breaker.allow('Orders')
+
+
+def test_controllers_are_independent(clock):
+    breaker = CircuitBreaker(threshold=1)
+    breaker.record('Orders', failed=True)
+    assert not breaker.allow('Orders')
+    assert breaker.allow('Invoices')
@@ -0,0 +1,42 @@
+import os
+import random
+
+from report_writer import ExternalSorter, sort_key
+
+
+def issues(count, seed=7):
+    generator = random.Random(seed)
+    return [{'severity': generator.choice(['High', 'Medium', 'Low', 'Info']),
+             'file': generator.choice(['a.cs', 'b.cs', 'c.cs']),
+             'line': generator.randint(1, 5),
+             'id': number}
+            for number in range(count)]
+
+
+def test_spilled_runs_merge_like_a_stable_sort():
+    findings = issues(500)
+    sorter = ExternalSorter(buffer_size=16)
+    for issue in findings:
+        sorter.add(issue)
+    assert len(sorter.spills) == 500 // 16
+    spill_dir = sorter.spill_dir.name
+
+    assert list(sorter.sorted()) == sorted(findings, key=sort_key)
+    assert not os.path.exists(spill_dir)
+
+
+def test_ties_keep_arrival_order_across_runs():
+    findings = [{'severity': 'High', 'file': 'a.cs', 'line': 1, 'id': number} for number in range(10)]
+    sorter = ExternalSorter(buffer_size=3)
+    for issue in reversed(findings):
+        sorter.add(issue)
+    assert [issue['id'] for issue in sorter.sorted()] == list(range(9, -1, -1))
+
+
+def test_without_spills_nothing_touches_disk():
+    findings = issues(10)
+    sorter = ExternalSorter(buffer_size=100)
+    for issue in findings:
+        sorter.add(issue)
+    assert sorter.spill_dir is None
+    assert list(sorter.sorted()) == sorted(findings, key=sort_key)